@@ -1,5 +1,4 @@
 import os
-import joblib
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -20,24 +19,61 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from app.database.engine import configure_engine_options, init_engine
+    configure_engine_options(app) # Ukuran pool SQLite sebelum engine dibuat
+
     db.init_app(app)
+    init_engine(app, db) # PRAGMA WAL/busy_timeout/cache per koneksi (+ engine baca-saja opsional)
     migrate.init_app(app, db)
     login_manager.init_app(app)  # Akan diaktifkan nanti
     csrf.init_app(app) # Inisialisasi CSRFProtect dengan aplikasi
 
     
 
-    with app.app_context():
-        from app.utils.model_handler import load_knn_model
-        app.extensions['knn_model'] = load_knn_model()
+    from app.utils.wilayah import region_index
+    region_index.init_app(app)
+
+    from app.utils.versioning import init_versioning
+    init_versioning()
+
+    from app.utils.kriteria_mask import init_kriteria_mask
+    init_kriteria_mask()
+
+    from app.utils.penerima_search import init_search
+    init_search(app) # Index FTS5 nama penerima (dibuat bersama tabel, dijaga trigger)
+
+    from app.utils.settings_service import init_settings
+    init_settings(app) # Seed baris pengaturan sekali; route membaca salinan cache per proses
+
+    from app.utils.model_registry import model_registry
+    model_registry.init_app(app)
+
+    from app.utils.result_cache import result_cache
+    result_cache.init_app(app) # Cache hasil cek kelayakan individu (memori proses atau SQLite lokal bersama)
+    model_registry.warm_up(app) # Default di thread background; create_app tidak menunggu model dimuat
+
+    from app.utils.metrics import init_metrics
+    init_metrics(app) # Latensi per endpoint, query SQL per request, profiling opsional untuk admin
 
     # Impor dan daftarkan Blueprint di sini
     from app.routes.auth_routes import auth_bp
     from app.routes.admin_routes import admin_bp
     from app.routes.petugas_routes import petugas_bp
+    from app.routes.metrics_routes import metrics_bp
+    from app.routes.wilayah_routes import wilayah_bp
+    from app.utils.wilayah import WILAYAH_API_PREFIX
 
     app.register_blueprint(auth_bp) # url_prefix dihapus agar auth.index menjadi '/'
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(petugas_bp, url_prefix='/petugas')
+    app.register_blueprint(wilayah_bp, url_prefix=WILAYAH_API_PREFIX)
+    if app.config.get('METRICS_ENABLED', True):
+        app.register_blueprint(metrics_bp)
+
+    from app.jobs.worker import job_cli
+    app.cli.add_command(job_cli)
+
+    from app.utils.importer import penerima_cli
+    app.cli.add_command(penerima_cli)
 
     return app
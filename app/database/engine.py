@@ -0,0 +1,238 @@
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+# Nilai bawaan; semuanya dapat diubah lewat Config (lihat config.py, awalan SQLITE_)
+DEFAULT_SQLITE_SETTINGS = {
+    'SQLITE_WAL': True,
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 15000,
+    'SQLITE_CACHE_SIZE_KB': 65536,
+    'SQLITE_MMAP_SIZE_MB': 256,
+    'SQLITE_TEMP_STORE': 'MEMORY',
+    'SQLITE_JOURNAL_SIZE_LIMIT_MB': 64,
+    'SQLITE_POOL_SIZE': 10,
+    'SQLITE_MAX_OVERFLOW': 10,
+    'SQLITE_POOL_TIMEOUT': 30,
+    'SQLITE_READ_ENGINE': False,
+}
+
+
+def sqlite_settings(config):
+    """Mengambil pengaturan SQLITE_* dari config (dict atau app.config) sebagai dict biasa yang bisa di-pickle."""
+    return {key: config.get(key, default) for key, default in DEFAULT_SQLITE_SETTINGS.items()}
+
+
+def is_sqlite_file(url):
+    """True untuk database SQLite berbasis berkas (bukan :memory:), satu-satunya yang mendapat WAL dan pool."""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:') \
+        and 'mode=memory' not in str(url)
+
+
+# ===============================
+# 1. PRAGMA per Koneksi
+# ===============================
+def sqlite_pragmas(settings, read_only=False):
+    """Daftar (pragma, nilai) yang dijalankan pada setiap koneksi baru, berurutan."""
+    pragmas = []
+    if settings['SQLITE_WAL']:
+        # WAL: pembaca tidak pernah memblokir penulis dan sebaliknya; synchronous=NORMAL aman di mode WAL
+        pragmas.append(('journal_mode', 'WAL'))
+        pragmas.append(('journal_size_limit', int(settings['SQLITE_JOURNAL_SIZE_LIMIT_MB']) * 1024 * 1024))
+    pragmas += [
+        ('synchronous', settings['SQLITE_SYNCHRONOUS']),
+        # Menunggu kunci tulis dilepas alih-alih langsung gagal dengan "database is locked"
+        ('busy_timeout', int(settings['SQLITE_BUSY_TIMEOUT_MS'])),
+        ('cache_size', -int(settings['SQLITE_CACHE_SIZE_KB'])), # Nilai negatif = KiB, bukan jumlah halaman
+        ('mmap_size', int(settings['SQLITE_MMAP_SIZE_MB']) * 1024 * 1024),
+        ('temp_store', settings['SQLITE_TEMP_STORE']),
+    ]
+    if read_only:
+        pragmas.append(('query_only', 'ON'))
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, settings, read_only=False):
+    """Memasang listener 'connect' yang menjalankan PRAGMA pada setiap koneksi DBAPI baru milik engine."""
+    pragmas = sqlite_pragmas(settings, read_only)
+
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', _on_connect)
+    return engine
+
+
+# ===============================
+# 2. Opsi Engine & Ukuran Pool
+# ===============================
+def engine_options(url, settings, pool_size=None, max_overflow=None):
+    """
+    Opsi create_engine untuk URL tertentu. SQLite berkas memakai QueuePool: satu proses web multi-thread
+    butuh beberapa koneksi (pool_size + max_overflow), sedangkan proses worker/shard yang satu thread
+    cukup diberi pool_size=1. Pool bersifat lazy, koneksi baru dibuka saat benar-benar dipakai.
+    """
+    if not is_sqlite_file(url):
+        return {}
+    return {
+        'pool_size': settings['SQLITE_POOL_SIZE'] if pool_size is None else pool_size,
+        'max_overflow': settings['SQLITE_MAX_OVERFLOW'] if max_overflow is None else max_overflow,
+        'pool_timeout': settings['SQLITE_POOL_TIMEOUT'],
+        'connect_args': {
+            'timeout': int(settings['SQLITE_BUSY_TIMEOUT_MS']) / 1000, # busy handler bawaan sqlite3
+            'check_same_thread': False, # Koneksi berpindah thread lewat pool
+        },
+    }
+
+
+def create_tuned_engine(url, settings, read_only=False, pool_size=None, max_overflow=None):
+    """Engine berdiri sendiri (mis. di proses shard prediksi massal) dengan PRAGMA dan pool yang sama seperti aplikasi."""
+    settings = sqlite_settings(settings) # Kunci yang tidak ada memakai nilai bawaan
+    engine = create_engine(url, **engine_options(url, settings, pool_size, max_overflow))
+    if is_sqlite_file(url):
+        install_sqlite_pragmas(engine, settings, read_only)
+    return engine
+
+
+# ===============================
+# 3. Integrasi dengan Flask-SQLAlchemy
+# ===============================
+def configure_engine_options(app):
+    """Dipanggil sebelum db.init_app: opsi pool SQLite digabung ke SQLALCHEMY_ENGINE_OPTIONS (opsi eksplisit menang)."""
+    url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not url:
+        return
+    options = engine_options(url, sqlite_settings(app.config))
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_engine(app, db):
+    """
+    Dipanggil setelah db.init_app: memasang PRAGMA pada engine utama dan, jika SQLITE_READ_ENGINE aktif,
+    membuat engine baca-saja terpisah (query_only) untuk query laporan agar tidak berbagi pool dengan penulis.
+    """
+    settings = sqlite_settings(app.config)
+    with app.app_context():
+        engine = db.engine
+    if not is_sqlite_file(engine.url):
+        return
+    install_sqlite_pragmas(engine, settings)
+    if settings['SQLITE_READ_ENGINE']:
+        app.extensions['read_engine'] = create_tuned_engine(engine.url, settings, read_only=True)
+
+
+@contextmanager
+def read_session():
+    """
+    Session untuk query laporan. Memakai engine baca-saja jika tersedia; jika tidak, db.session biasa
+    (tanpa ditutup, karena dikelola Flask-SQLAlchemy).
+    """
+    from flask import current_app
+
+    from app import db
+
+    engine = current_app.extensions.get('read_engine')
+    if engine is None:
+        yield db.session
+        return
+    with Session(engine) as session:
+        yield session
+
+
+# ===============================
+# 4. Benchmark: python -m app.database.engine
+# ===============================
+def _benchmark(url, settings, tuned, writers, readers, seconds, rows_per_write):
+    from sqlalchemy import text
+
+    if tuned:
+        engine = create_tuned_engine(url, settings)
+    else:
+        # Perilaku lama: journal rollback (DELETE), tanpa busy_timeout (sqlite3 default 5 detik diperkecil agar kunci terlihat)
+        engine = create_engine(url, connect_args={'timeout': 0.1, 'check_same_thread': False},
+                               pool_size=writers + readers, max_overflow=0)
+
+        @event.listens_for(engine, 'connect')
+        def _legacy(dbapi_connection, connection_record):
+            dbapi_connection.execute('PRAGMA journal_mode=DELETE')
+
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS bench'))
+        conn.execute(text('CREATE TABLE bench (id INTEGER PRIMARY KEY, grp INTEGER, skor REAL)'))
+        conn.execute(text('CREATE INDEX ix_bench_grp ON bench (grp)'))
+
+    import threading
+    stop_at = time.perf_counter() + seconds
+    counters = {'writes': 0, 'reads': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def _count(name):
+        with lock:
+            counters[name] += 1
+
+    def writer(worker_id):
+        batch = [{'grp': (worker_id * 31 + i) % 97, 'skor': i / rows_per_write} for i in range(rows_per_write)]
+        while time.perf_counter() < stop_at:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text('INSERT INTO bench (grp, skor) VALUES (:grp, :skor)'), batch)
+                _count('writes')
+            except Exception as e:
+                if 'locked' not in str(e):
+                    raise
+                _count('locked')
+
+    def reader(worker_id):
+        while time.perf_counter() < stop_at:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT grp, COUNT(*), AVG(skor) FROM bench WHERE grp = :grp GROUP BY grp'),
+                                 {'grp': worker_id % 97}).all()
+                _count('reads')
+            except Exception as e:
+                if 'locked' not in str(e):
+                    raise
+                _count('locked')
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return {name: round(count / seconds, 1) if name != 'locked' else count for name, count in counters.items()}
+
+
+def main(argv=None):
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Benchmark throughput baca/tulis SQLite bersamaan: pengaturan lama vs tuned.')
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rows-per-write', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    settings = dict(DEFAULT_SQLITE_SETTINGS)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, tuned in (('lama (DELETE journal)', False), ('tuned (WAL + pragma)', True)):
+            url = f"sqlite:///{os.path.join(tmp, f'bench-{int(tuned)}.db')}"
+            result = _benchmark(url, settings, tuned, args.writers, args.readers, args.seconds, args.rows_per_write)
+            print(f"{label:24} tulis/detik={result['writes']:>9}  baca/detik={result['reads']:>9}  error 'locked'={result['locked']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 from app import db, login_manager
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -26,9 +27,28 @@ class Setting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     passing_grade = db.Column(db.Float, default=0.5, nullable=False)
     kuota = db.Column(db.Integer, default=50, nullable=False)
+    # Pembagian kuota: 'global' (kuota = total penerima) atau 'kecamatan'/'desa' (kuota = kuota default tiap wilayah,
+    # dapat diganti per wilayah lewat tabel KuotaWilayah)
+    kuota_level = db.Column(db.String(20), default='global', server_default='global', nullable=False)
+    kuota_wilayah = db.relationship('KuotaWilayah', backref='setting', lazy='dynamic', cascade='all, delete-orphan')
 
     def __repr__(self):
-        return f'<Setting passing_grade={self.passing_grade} kuota={self.kuota}>'
+        return f'<Setting passing_grade={self.passing_grade} kuota={self.kuota} kuota_level={self.kuota_level}>'
+
+# Kuota khusus per wilayah (kode kecamatan/desa) untuk pembagian kuota per wilayah
+class KuotaWilayah(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    setting_id = db.Column(db.Integer, db.ForeignKey('setting.id'), nullable=False)
+    level = db.Column(db.String(20), nullable=False) # 'kecamatan' atau 'desa'
+    wilayah_id = db.Column(db.String(100), nullable=False)
+    kuota = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('setting_id', 'level', 'wilayah_id', name='ux_kuota_wilayah'),
+    )
+
+    def __repr__(self):
+        return f'<KuotaWilayah {self.level} {self.wilayah_id}={self.kuota}>'
 
 # Model untuk data penerima (Struktur Flat)
 class Penerima(db.Model):
@@ -64,6 +84,19 @@ class Penerima(db.Model):
     skor_saw_ternormalisasi = db.Column(db.Float, nullable=True) # New field for SAW score
     status_kelayakan_knn = db.Column(db.String(50), nullable=True) # New field for KNN prediction status
 
+    # --- DENORMALISASI KRITERIA ---
+    # Seluruh kriteria dikemas dalam satu integer (bit 0 = dtks, bit 1..10 = fitur KNN) beserta skor SAW mentahnya.
+    # Dijaga sinkron oleh event di app/utils/kriteria_mask.py; data lama diisi oleh migrasi 8d2e6b4a71c5.
+    kriteria_mask = db.Column(db.Integer, nullable=True, index=True)
+    skor_saw_aktual = db.Column(db.Integer, nullable=True)
+
+    # --- PELACAKAN PENILAIAN ULANG ---
+    # True jika kriteria berubah sejak skor terakhir dihitung (baris baru selalu True).
+    # Versi model dan passing grade yang dipakai disimpan agar prediksi massal tahu kapan semua baris perlu dinilai ulang.
+    perlu_dinilai_ulang = db.Column(db.Boolean, default=True, server_default=db.true(), nullable=False)
+    skor_model_versi = db.Column(db.String(64), nullable=True)
+    skor_passing_grade = db.Column(db.Float, nullable=True)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -90,3 +123,78 @@ class Penerima(db.Model):
 
     def __repr__(self):
         return f'<Penerima {self.nama}>'
+
+# Index untuk daftar penerima yang diurutkan berdasarkan skor (keyset pagination, skor NULL di akhir)
+db.Index('ix_penerima_skor_id', db.func.coalesce(Penerima.skor_saw_ternormalisasi, -1.0), Penerima.id)
+# Index untuk prediksi massal inkremental: hitung/kelompokkan baris kotor per mask dan UPDATE ... WHERE kotor AND mask = m
+db.Index('ix_penerima_dinilai_ulang_mask', Penerima.perlu_dinilai_ulang, Penerima.kriteria_mask)
+# Index untuk ranking kuota per wilayah: ROW_NUMBER() OVER (PARTITION BY desa/kecamatan ORDER BY skor DESC, id) atas baris layak
+db.Index('ix_penerima_desa_status_skor', Penerima.desa, Penerima.status_kelayakan_knn, Penerima.skor_saw_ternormalisasi.desc())
+db.Index('ix_penerima_kecamatan_status_skor', Penerima.kecamatan, Penerima.status_kelayakan_knn, Penerima.skor_saw_ternormalisasi.desc())
+
+# Penghitung versi data (dinaikkan setiap ada perubahan) untuk invalidasi cache lintas proses
+class DataVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True) # 'penerima', 'setting'
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
+
+# Model untuk antrean pekerjaan latar belakang (prediksi massal, pelatihan model, dll.)
+class Job(db.Model):
+    STATUS_AKTIF = ('queued', 'processing')
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True) # queued, processing, completed, error, cancelled
+    params = db.Column(db.Text, nullable=True) # JSON
+    result = db.Column(db.Text, nullable=True) # JSON
+    error = db.Column(db.Text, nullable=True)
+
+    # Progres per job, ditulis oleh proses worker
+    total = db.Column(db.Integer, default=0, nullable=False)
+    processed = db.Column(db.Integer, default=0, nullable=False)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    worker_pid = db.Column(db.Integer, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    # Hanya satu job aktif (queued/processing) per jenis job
+    __table_args__ = (
+        db.Index('ux_job_aktif_per_jenis', 'job_type', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'processing')"),
+                 postgresql_where=db.text("status IN ('queued', 'processing')")),
+    )
+
+    @property
+    def is_active(self):
+        return self.status in self.STATUS_AKTIF
+
+    def to_progress_dict(self):
+        started_at = self.started_at or self.created_at
+        end_time = self.finished_at or datetime.now()
+        elapsed_time = (end_time - started_at).total_seconds() if self.started_at else 0
+        if self.processed > 0 and self.status == 'processing':
+            estimated_time_remaining = int((self.total - self.processed) * (elapsed_time / self.processed))
+        else:
+            estimated_time_remaining = 0
+        return {
+            'job_id': self.id,
+            'job_type': self.job_type,
+            'running': self.is_active,
+            'total': self.total,
+            'processed': self.processed,
+            'percentage': int((self.processed / self.total) * 100) if self.total else (100 if self.status == 'completed' else 0),
+            'start_time': self.started_at.isoformat() if self.started_at else None,
+            'elapsed_time': elapsed_time,
+            'estimated_time_remaining': estimated_time_remaining,
+            'status': self.status,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.job_type} {self.status}>'
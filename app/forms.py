@@ -46,32 +46,55 @@ from wtforms import FloatField
 class MassPredictionForm(FlaskForm):
     passing_grade = FloatField('Passing Grade', validators=[DataRequired(), NumberRange(min=0, max=1)])
     kuota = IntegerField('Kuota', validators=[DataRequired(), NumberRange(min=1)])
+    nilai_ulang_semua = BooleanField('Nilai ulang semua data')
     submit = SubmitField('Mulai Prediksi Massal')
 
 class IndexPredictionForm(FlaskForm):
     nama = StringField('Nama', validators=[DataRequired(), Length(min=2, max=150)])
+    penerima_id = HiddenField() # Diisi saat memilih dari autocomplete / daftar kandidat
     submit = SubmitField('Cari Data')
 
+KUOTA_LEVEL_CHOICES = [
+    ('global', 'Total untuk seluruh wilayah'),
+    ('kecamatan', 'Per kecamatan'),
+    ('desa', 'Per desa'),
+]
+
 class SettingForm(FlaskForm):
     passing_grade = FloatField('Passing Grade', validators=[DataRequired(), NumberRange(min=0)])
     kuota = IntegerField('Kuota', validators=[DataRequired(), NumberRange(min=1)])
+    kuota_level = SelectField('Pembagian Kuota', choices=KUOTA_LEVEL_CHOICES, default='global')
+    kuota_wilayah = TextAreaField('Kuota Khusus per Wilayah', validators=[Optional()])
     submit = SubmitField('Simpan')
 
+    def validate_kuota_wilayah(self, kuota_wilayah):
+        from app.utils.settings_service import parse_kuota_wilayah
+        try:
+            parse_kuota_wilayah(kuota_wilayah.data, self.kuota_level.data)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+class ImportPenerimaForm(FlaskForm):
+    berkas = FileField('Berkas Data (.xlsx / .csv)', validators=[DataRequired(), FileAllowed(['xlsx', 'csv'], 'Hanya berkas .xlsx atau .csv!')])
+    hitung_skor = BooleanField('Langsung hitung skor SAW dan status KNN untuk data baru')
+    submit = SubmitField('Impor Data')
+
+PEKERJAAN_CHOICES = [
+    ('PNS', 'PNS'),
+    ('Swasta', 'Swasta'),
+    ('Wiraswasta', 'Wiraswasta'),
+    ('Petani', 'Petani'),
+    ('Nelayan', 'Nelayan'),
+    ('Lainnya', 'Lainnya')
+]
+
 class PenerimaForm(FlaskForm):
     nama = StringField('Nama Lengkap', validators=[DataRequired(), Length(max=150)])
     provinsi = SelectField('Provinsi', choices=[('', '-- Pilih Provinsi --')], validators=[DataRequired(message="Pilih provinsi.")], validate_choice=False)
     kabupaten = SelectField('Kabupaten/Kota', choices=[('', '-- Pilih Kabupaten/Kota --')], validators=[DataRequired(message="Pilih kabupaten/kota.")], validate_choice=False)
     kecamatan = SelectField('Kecamatan', choices=[('', '-- Pilih Kecamatan --')], validators=[DataRequired(message="Pilih kecamatan.")], validate_choice=False)
     desa = SelectField('Desa', choices=[('', '-- Pilih Desa --')], validators=[DataRequired(message="Pilih desa.")], validate_choice=False)
-    pekerjaan = SelectField('Pekerjaan', choices=[
-        ('', '-- Pilih Pekerjaan --'),
-        ('PNS', 'PNS'),
-        ('Swasta', 'Swasta'),
-        ('Wiraswasta', 'Wiraswasta'),
-        ('Petani', 'Petani'),
-        ('Nelayan', 'Nelayan'),
-        ('Lainnya', 'Lainnya')
-    ], validators=[DataRequired()])
+    pekerjaan = SelectField('Pekerjaan', choices=[('', '-- Pilih Pekerjaan --')] + PEKERJAAN_CHOICES, validators=[DataRequired()])
     dokumen_pendukung = FileField('Dokumen Pendukung', validators=[FileAllowed(['jpg', 'png', 'pdf'], 'Hanya gambar dan PDF!'), FileSize(max_size=2*1024*1024, message='Ukuran file tidak boleh lebih dari 2MB.')])
 
     # --- KRITERIA ---
@@ -0,0 +1,2 @@
+# Antrean job latar belakang berbasis tabel SQLite (lihat app/jobs/queue.py)
+from app.jobs.queue import JobCancelled, enqueue_job, get_active_job, get_latest_job, request_cancel
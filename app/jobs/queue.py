@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.database.models import Job
+
+
+class JobCancelled(Exception):
+    """Dilempar dari dalam task ketika job diminta dibatalkan."""
+
+
+# ===============================
+# 1. Operasi dari Sisi Web (enqueue, status, pembatalan)
+# ===============================
+def enqueue_job(job_type, params=None):
+    """
+    Memasukkan job baru ke antrean. Hanya satu job aktif per jenis yang diizinkan
+    (dijaga oleh unique partial index), sehingga dua pengiriman bersamaan tidak saling menimpa.
+    Mengembalikan tuple (job, created); created=False berarti job aktif yang sudah ada dikembalikan.
+    """
+    job = Job(job_type=job_type, params=json.dumps(params or {}))
+    db.session.add(job)
+    try:
+        db.session.commit()
+        return job, True
+    except IntegrityError:
+        db.session.rollback()
+        return get_active_job(job_type), False
+
+
+def get_active_job(job_type):
+    return Job.query.filter(Job.job_type == job_type, Job.status.in_(Job.STATUS_AKTIF)).first()
+
+
+def get_latest_job(job_type):
+    return Job.query.filter_by(job_type=job_type).order_by(Job.id.desc()).first()
+
+
+def request_cancel(job_id):
+    """Job yang masih antre langsung dibatalkan; job yang sedang berjalan ditandai dan berhenti di titik cek berikutnya."""
+    now = datetime.now()
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='cancelled', cancel_requested=True, finished_at=now)
+        )
+        conn.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'processing')
+            .values(cancel_requested=True)
+        )
+    db.session.expire_all()
+    return db.session.get(Job, job_id)
+
+
+# ===============================
+# 2. Operasi dari Sisi Worker
+# ===============================
+# Semua penulisan status job memakai koneksi/transaksi tersendiri agar tidak ikut
+# ter-commit atau ter-rollback bersama pekerjaan task di db.session.
+
+def claim_next_job(job_types=None):
+    """Mengambil satu job 'queued' tertua secara atomik. Mengembalikan (id, job_type, params) atau None."""
+    query = select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1)
+    if job_types:
+        query = query.where(Job.job_type.in_(job_types))
+
+    with db.engine.begin() as conn:
+        job_id = conn.execute(query).scalar()
+        if job_id is None:
+            return None
+        now = datetime.now()
+        claimed = conn.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='processing', worker_pid=os.getpid(), started_at=now, heartbeat_at=now)
+        ).rowcount
+        if claimed != 1:
+            return None # Diambil worker lain lebih dulu
+        row = conn.execute(select(Job.job_type, Job.params).where(Job.id == job_id)).one()
+    return job_id, row.job_type, json.loads(row.params or '{}')
+
+
+def report_progress(job_id, processed, total):
+    """Menyimpan progres + heartbeat, lalu melempar JobCancelled jika pembatalan diminta."""
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(Job).where(Job.id == job_id)
+            .values(processed=processed, total=total, heartbeat_at=datetime.now())
+        )
+        cancel_requested = conn.execute(select(Job.cancel_requested).where(Job.id == job_id)).scalar()
+    if cancel_requested:
+        raise JobCancelled()
+
+
+def touch_heartbeat(engine, job_id, worker_pid):
+    """Memperbarui heartbeat job yang masih dipegang worker ini (job yang sudah diantrekan ulang tidak disentuh)."""
+    with engine.begin() as conn:
+        conn.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'processing', Job.worker_pid == worker_pid)
+            .values(heartbeat_at=datetime.now())
+        )
+
+
+class JobHeartbeat:
+    """
+    Thread yang menulis heartbeat job setiap `interval` detik selama task berjalan, termasuk selama langkah
+    panjang tanpa callback progres (render WeasyPrint, pencarian hyperparameter), agar job tidak dianggap mati
+    oleh requeue_stale_jobs yang dijalankan berkala oleh setiap worker. Dipakai sebagai context manager di sekitar eksekusi task.
+    """
+
+    def __init__(self, job_id, interval, logger=None):
+        self.job_id = job_id
+        self.interval = interval
+        self.logger = logger
+        self._engine = db.engine # Diambil di thread pemanggil (butuh app context)
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                touch_heartbeat(self._engine, self.job_id, self._pid)
+            except Exception as e: # Database sibuk sesaat: coba lagi pada interval berikutnya
+                if self.logger:
+                    self.logger.warning(f"Gagal menulis heartbeat job {self.job_id}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def finish_job(job_id, status, result=None, error=None):
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(Job).where(Job.id == job_id)
+            .values(status=status, result=json.dumps(result) if result is not None else None,
+                    error=error, finished_at=datetime.now(), heartbeat_at=datetime.now())
+        )
+
+
+def requeue_stale_jobs(stale_after_seconds):
+    """
+    Job 'processing' yang heartbeat-nya berhenti (worker mati/restart) dikembalikan ke antrean.
+    Worker yang hidup menulis heartbeat dari thread JobHeartbeat, jadi stale_after_seconds harus jauh
+    lebih besar dari JOB_HEARTBEAT_INTERVAL.
+    """
+    batas = datetime.now() - timedelta(seconds=stale_after_seconds)
+    with db.engine.begin() as conn:
+        return conn.execute(
+            update(Job).where(Job.status == 'processing', Job.heartbeat_at < batas)
+            .values(status='queued', worker_pid=None)
+        ).rowcount
@@ -0,0 +1,104 @@
+import time
+
+from flask import current_app
+
+from app import db
+from app.jobs.queue import report_progress
+
+# Registry jenis job -> fungsi task. Fungsi task menerima (ctx, **params).
+TASKS = {}
+
+
+def register_task(job_type):
+    def decorator(func):
+        TASKS[job_type] = func
+        return func
+    return decorator
+
+
+class JobContext:
+    """
+    Diberikan ke setiap task: id job dan callback progres yang sekaligus menjadi titik cek pembatalan.
+    Progres hanya ditulis ke database setiap `every_rows` baris atau `interval_ms` milidetik
+    (dan selalu saat selesai), bukan setiap kali dipanggil.
+    """
+
+    def __init__(self, job_id, every_rows=1000, interval_ms=500):
+        self.job_id = job_id
+        self.every_rows = every_rows
+        self.interval = interval_ms / 1000.0
+        self._last_processed = None
+        self._last_report = 0.0
+
+    def progress(self, processed, total):
+        now = time.monotonic()
+        if (self._last_processed is not None
+                and processed < total
+                and processed - self._last_processed < self.every_rows
+                and now - self._last_report < self.interval):
+            return
+        self._last_processed = processed
+        self._last_report = now
+        report_progress(self.job_id, processed, total)
+
+
+# ===============================
+# Task: Prediksi Massal
+# ===============================
+@register_task('mass_predict')
+def mass_predict_task(ctx, passing_grade=None, full=False):
+    from app.utils.mass_prediction import mark_for_rescoring, run_mass_prediction_by_mask
+    from app.utils.model_registry import model_registry
+    from app.utils.settings_service import get_settings
+
+    config = current_app.config
+    # Versi model dikunci di awal job: semua commit memakai model yang sama walau ada model baru terbit di tengah jalan
+    knn_model, model_version = model_registry.get_model(current_app.logger)
+    if knn_model is None:
+        raise RuntimeError('Model KNN belum dilatih.')
+    if passing_grade is None:
+        passing_grade = get_settings().passing_grade
+
+    # Hanya baris yang kriterianya berubah, atau yang dinilai dengan model/passing grade lain, yang dihitung ulang
+    total = mark_for_rescoring(db.session, model_version, passing_grade, full=full)
+    current_app.logger.info(f"Prediksi massal: {total} baris perlu dinilai ulang (model {model_version}, passing grade {passing_grade}).")
+    stamp = {'model_version': model_version, 'passing_grade': passing_grade}
+
+    processed = run_mass_prediction_by_mask(
+        db.session,
+        knn_model,
+        current_app.logger,
+        chunk_size=config.get('MASS_PREDICT_CHUNK_SIZE', 5000),
+        progress_callback=ctx.progress,
+        **stamp
+    )
+    return {'processed': processed, 'passing_grade': passing_grade, 'model_version': model_version, 'full': full}
+
+
+# ===============================
+# Task: Pelatihan Ulang Model KNN
+# ===============================
+@register_task('train_model')
+def train_model_task(ctx):
+    from app.utils.knn_training import train_and_publish
+
+    # Progres mengikuti pembacaan data per chunk; pencarian hyperparameter berjalan setelahnya
+    metrics = train_and_publish(db.session, progress_callback=ctx.progress)
+    if metrics is None:
+        raise RuntimeError('Tidak ada data penerima untuk melatih model KNN.')
+    return metrics
+
+
+# ===============================
+# Task: Render Laporan PDF
+# ===============================
+@register_task('pdf_report')
+def pdf_report_task(ctx, passing_grade, kuota, kuota_level='global'):
+    from app.utils.pdf_report import build_report, cached_report_path, report_key
+    from app.utils.ranking import get_eligible_ranking
+
+    ranking, _ = get_eligible_ranking(passing_grade, kuota, kuota_level)
+    key = report_key(ranking, passing_grade, kuota, kuota_level)
+    if cached_report_path(key) is None:
+        build_report(ranking, passing_grade, kuota, key, progress_callback=ctx.progress, kuota_level=kuota_level)
+    return {'key': key, 'rows': len(ranking)}
@@ -0,0 +1,170 @@
+import multiprocessing
+import threading
+import time
+import traceback
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.jobs.queue import JobCancelled, JobHeartbeat, claim_next_job, finish_job, requeue_stale_jobs
+from app.jobs.tasks import TASKS, JobContext
+
+
+# ===============================
+# 1. Eksekusi Job
+# ===============================
+def run_next_job(job_types=None):
+    """Mengambil dan menjalankan satu job dari antrean. Mengembalikan True jika ada job yang dijalankan."""
+    claimed = claim_next_job(job_types)
+    if claimed is None:
+        return False
+
+    job_id, job_type, params = claimed
+    logger = current_app.logger
+    task = TASKS.get(job_type)
+    if task is None:
+        finish_job(job_id, 'error', error=f'Jenis job tidak dikenal: {job_type}')
+        return True
+
+    logger.info(f"Worker menjalankan job {job_id} ({job_type})")
+    try:
+        ctx = JobContext(
+            job_id,
+            every_rows=current_app.config.get('JOB_PROGRESS_EVERY_ROWS', 1000),
+            interval_ms=current_app.config.get('JOB_PROGRESS_INTERVAL_MS', 500)
+        )
+        with JobHeartbeat(job_id, current_app.config.get('JOB_HEARTBEAT_INTERVAL', 30), logger):
+            result = task(ctx, **params)
+        finish_job(job_id, 'completed', result=result)
+    except JobCancelled:
+        db.session.rollback()
+        finish_job(job_id, 'cancelled')
+        logger.info(f"Job {job_id} ({job_type}) dibatalkan.")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Job {job_id} ({job_type}) gagal: {e}\n{traceback.format_exc()}")
+        finish_job(job_id, 'error', error=str(e))
+    finally:
+        db.session.remove()
+    return True
+
+
+def _requeue_stale(stale_after):
+    requeued = requeue_stale_jobs(stale_after)
+    if requeued:
+        current_app.logger.warning(f"{requeued} job yang terhenti dikembalikan ke antrean.")
+
+
+def run_worker(poll_interval=1.0, stale_after=300, job_types=None, stop_event=None, stale_check_interval=None):
+    """
+    Loop worker: ambil job, jalankan, ulangi; tidur sebentar jika antrean kosong.
+    Job yang heartbeat-nya berhenti (worker lain mati di tengah task) dikembalikan ke antrean saat mulai dan
+    setiap `stale_check_interval` detik, agar job mati tidak menahan slot aktif per jenis sampai worker restart.
+    """
+    if stale_check_interval is None:
+        stale_check_interval = current_app.config.get('JOB_STALE_CHECK_INTERVAL', 60)
+    next_stale_check = 0.0
+    while stop_event is None or not stop_event.is_set():
+        if time.monotonic() >= next_stale_check:
+            _requeue_stale(stale_after)
+            next_stale_check = time.monotonic() + stale_check_interval
+        if not run_next_job(job_types):
+            time.sleep(poll_interval)
+
+
+# ===============================
+# 2. Pool Proses Worker
+# ===============================
+def _worker_process_main(config_class, poll_interval, stale_after):
+    from app import create_app
+    app = create_app(config_class)
+    with app.app_context():
+        run_worker(poll_interval, stale_after)
+
+
+class WorkerPool:
+    """
+    N proses worker terpisah (start method 'spawn': setiap proses membuat app sendiri) dan thread supervisor
+    yang menjalankan ulang proses yang keluar (OOM, SIGKILL), sehingga jumlah worker tetap.
+    Proses tidak dibuat sebagai daemon agar task boleh membuat proses anak sendiri.
+    """
+
+    def __init__(self, app, processes, config_class):
+        self.logger = app.logger
+        self.size = processes
+        self.check_interval = app.config.get('JOB_SUPERVISE_INTERVAL', 5)
+        self._args = (config_class, app.config.get('JOB_POLL_INTERVAL', 1.0), app.config.get('JOB_STALE_AFTER', 300))
+        self._ctx = multiprocessing.get_context('spawn')
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._supervise, name='bansos-job-supervisor', daemon=True)
+        self.processes = []
+
+    def _spawn(self):
+        proc = self._ctx.Process(target=_worker_process_main, args=self._args, name='bansos-job-worker')
+        proc.start()
+        return proc
+
+    def start(self):
+        self.processes = [self._spawn() for _ in range(self.size)]
+        self._thread.start()
+        return self
+
+    def _supervise(self):
+        while not self._stop.wait(self.check_interval):
+            for index, proc in enumerate(self.processes):
+                if proc.is_alive() or self._stop.is_set():
+                    continue
+                self.logger.warning(f"Proses worker {proc.pid} berhenti (exit code {proc.exitcode}); dijalankan ulang.")
+                self.processes[index] = self._spawn()
+
+    def wait(self):
+        """Menunggu sampai stop() dipanggil (join berkala agar KeyboardInterrupt tetap diterima)."""
+        while self._thread.is_alive():
+            self._thread.join(1)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        for proc in self.processes:
+            proc.terminate()
+        for proc in self.processes:
+            proc.join(timeout)
+
+
+def start_worker_pool(app, processes=None, config_class=None):
+    from config import Config
+    processes = processes or app.config.get('JOB_WORKER_PROCESSES', 2)
+    pool = WorkerPool(app, processes, config_class or Config).start()
+    app.logger.info(f"{processes} proses worker job dijalankan.")
+    return pool
+
+
+def stop_worker_pool(pool, timeout=5):
+    if pool:
+        pool.stop(timeout)
+
+
+# ===============================
+# 3. Perintah CLI
+# ===============================
+job_cli = AppGroup('jobs', help='Kelola antrean job latar belakang.')
+
+
+@job_cli.command('worker')
+@click.option('--processes', '-p', default=None, type=int, help='Jumlah proses worker (default: JOB_WORKER_PROCESSES).')
+def worker_command(processes):
+    """Jalankan pool worker job (proses terpisah dari web server)."""
+    app = current_app._get_current_object()
+    processes = processes or app.config.get('JOB_WORKER_PROCESSES', 2)
+    if processes == 1:
+        run_worker(app.config.get('JOB_POLL_INTERVAL', 1.0), app.config.get('JOB_STALE_AFTER', 300))
+        return
+
+    pool = start_worker_pool(app, processes)
+    try:
+        pool.wait()
+    except KeyboardInterrupt:
+        stop_worker_pool(pool)
@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from app import db
-from app.database.models import User, Setting
+from app.database.models import User
 from app.forms import RegistrationForm, SettingForm, EditUserForm # Ditambahkan EditUserForm
+from app.utils.settings_service import get_kuota_wilayah, get_settings, parse_kuota_wilayah, save_settings
 from werkzeug.security import generate_password_hash
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -22,7 +23,7 @@ def admin_required(func):
 @admin_required
 def dashboard():
     user_count = User.query.count()
-    setting = Setting.query.first()
+    setting = get_settings()
     return render_template('admin/dashboard.html', title='Dashboard Admin', user_count=user_count, setting=setting)
 
 @admin_bp.route('/users')
@@ -104,17 +105,14 @@ def delete_user(user_id):
 @admin_required
 def settings():
     form = SettingForm()
-    setting = Setting.query.first()
-    if not setting:
-        setting = Setting(passing_grade=0.5, kuota=50) # Default value for float
-        db.session.add(setting)
-        db.session.commit()
+    setting = get_settings()
 
     if form.validate_on_submit():
-        setting.passing_grade = form.passing_grade.data
-        setting.kuota = form.kuota.data
         try:
-            db.session.commit()
+            setting = save_settings(
+                form.passing_grade.data, form.kuota.data, form.kuota_level.data,
+                parse_kuota_wilayah(form.kuota_wilayah.data, form.kuota_level.data)
+            )
             flash('Pengaturan berhasil disimpan.', 'success')
         except Exception as e:
             db.session.rollback()
@@ -122,5 +120,10 @@ def settings():
 
     form.passing_grade.data = setting.passing_grade
     form.kuota.data = setting.kuota
+    if not form.kuota_wilayah.errors: # Teks yang salah tetap ditampilkan agar bisa diperbaiki
+        form.kuota_level.data = setting.kuota_level
+        form.kuota_wilayah.data = '\n'.join(
+            f"{wilayah_id}, {kuota}" for wilayah_id, kuota in get_kuota_wilayah(setting.kuota_level).items()
+        )
 
     return render_template('admin/settings.html', title='Pengaturan Sistem', form=form)
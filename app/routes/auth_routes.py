@@ -1,12 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from urllib.parse import urlparse
-from app.database.models import User, Setting, Penerima
+from app.database.models import User, Penerima
 from app import db
 from app.forms import LoginForm, RegistrationForm, IndexPredictionForm
-from app.utils.model_handler import predict_individual_status
+from app.utils.result_cache import result_cache
+from app.utils.settings_service import get_settings
+from app.utils.penerima_search import (
+    DEFAULT_SUGGEST_LIMIT, MAX_SUGGEST_LIMIT, lookup_penerima, public_search_allowed, region_filters_from, search_penerima,
+    serialize_suggestions
+)
 import os
-import joblib
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -14,49 +18,90 @@ auth_bp = Blueprint('auth', __name__)
 def index():
     form = IndexPredictionForm()
     prediction = None
-    setting = Setting.query.first()
-    if not setting:
-        setting = Setting(passing_grade=0.5, kuota=50) # Default value for float
-        db.session.add(setting)
-        db.session.commit()
+    kandidat = None
+    setting = get_settings()
 
     if form.validate_on_submit():
         nama = form.nama.data
-        provinsi_id = request.form.get('provinsi')
-        kabupaten_id = request.form.get('kabupaten')
-        kecamatan_id = request.form.get('kecamatan')
-        desa_id = request.form.get('desa')
-
-        penerima_obj = Penerima.query.filter_by(nama=nama).first()
+        region_filters = region_filters_from(request.form)
+        # Nama dicari lewat index FTS dan dipersempit dengan wilayah yang dipilih (jika ada). Halaman publik
+        # tidak pernah menampilkan id, jadi penerima_id dari form diabaikan; kandidat dipilih lewat desanya
+        penerima_obj, daftar, exact = lookup_penerima(nama, None, region_filters)
 
         if not penerima_obj:
-            flash(f'Individu dengan nama \'{nama}\' tidak ditemukan.', 'danger')
+            if _daftar_kandidat_publik(nama, daftar, exact, region_filters):
+                # Lebih dari satu warga bernama sama, atau hanya ada nama yang mirip: pencarian diulang saat GET
+                # dari parameter URL, sehingga daftar kandidat tidak perlu dibawa di cookie session
+                return redirect(url_for('auth.index', cari=nama, **region_filters))
             return redirect(url_for('auth.index'))
 
-        knn_model = current_app.extensions.get('knn_model')
-        if knn_model is None:
-            flash('Model prediksi belum dimuat. Harap hubungi administrator.', 'danger')
+        # Hasil dihitung (atau diambil dari cache) sekarang; redirect hanya membawa token kecil berisi id
+        prediction_result = result_cache.predict(penerima_obj, setting.passing_grade, current_app.logger)
+        if 'error' in prediction_result:
+            flash(prediction_result['error'], 'danger')
             return redirect(url_for('auth.index'))
 
-        passing_grade = setting.passing_grade
-        prediction_result = predict_individual_status(
-            penerima_obj=penerima_obj,
-            knn_model=knn_model,
-            passing_grade=passing_grade,
-            logger=current_app.logger
-        )
+        return redirect(url_for('auth.index', hasil=result_cache.make_token(penerima_obj.id)))
 
-        if 'error' in prediction_result:
-            flash(prediction_result['error'], 'danger')
-        else:
-            session['prediction_data'] = prediction_result
+    penerima_id = result_cache.read_token(request.args.get('hasil'))
+    if penerima_id is not None:
+        penerima_obj = db.session.get(Penerima, penerima_id)
+        if penerima_obj is not None:
+            prediction = result_cache.predict(penerima_obj, setting.passing_grade, current_app.logger)
+            if 'error' in prediction:
+                prediction = None
+
+    cari = request.args.get('cari', '').strip()
+    if cari and prediction is None:
+        region_filters = region_filters_from(request.args)
+        _, daftar, exact = lookup_penerima(cari, None, region_filters)
+        daftar = _daftar_kandidat_publik(cari, daftar, exact, region_filters, notify=False)
+        if daftar:
+            form.nama.data = form.nama.data or cari
+            kandidat = {'nama': cari, 'exact': exact, 'daftar': daftar}
+
+    return render_template('index.html', title='Cek Kelayakan Masyarakat', form=form, prediction=prediction, kandidat=kandidat)
+
+
+def _daftar_kandidat_publik(nama, daftar, exact, region_filters, notify=True):
+    """
+    Daftar kandidat untuk halaman publik (tanpa id). Nama yang sama persis selalu ditampilkan; saran nama mirip
+    hanya jika pencarian publik diizinkan, agar form ini tidak menjadi jalan lain untuk menyalin daftar penerima.
+    Kandidat dipilih lewat desanya, jadi yang berada di desa yang sama digabung. Pesan flash hanya saat POST.
+    """
+    if not exact and not public_search_allowed(nama, region_filters):
+        daftar = []
+    if not daftar:
+        if notify:
+            flash(f'Individu dengan nama \'{nama}\' tidak ditemukan.', 'danger')
+        return []
 
-        return redirect(url_for('auth.index'))
+    unik = {}
+    for item in serialize_suggestions(daftar):
+        unik.setdefault((item['nama'], item['kode_desa']), item)
+    if exact and region_filters.get('desa') and len(daftar) > 1 and len(unik) == 1:
+        # Beberapa warga bernama sama di satu desa tidak bisa dibedakan tanpa id: arahkan ke petugas
+        if notify:
+            flash(f'Terdapat lebih dari satu warga bernama \'{nama}\' di desa ini. Silakan hubungi petugas desa.', 'warning')
+        return []
+    return list(unik.values())
 
-    if 'prediction_data' in session:
-        prediction = session.pop('prediction_data', None)
 
-    return render_template('index.html', title='Cek Kelayakan Masyarakat', form=form, prediction=prediction)
+@auth_bp.route('/api/cari_nama')
+def cari_nama():
+    """
+    Autocomplete nama untuk halaman publik: hanya nama dan lokasi (tanpa id), minimal 3 huruf dan
+    kecamatan/desa harus dipilih. Pencarian lengkap untuk petugas ada di petugas.cari_nama.
+    """
+    query = request.args.get('q', '')
+    region_filters = region_filters_from(request.args)
+    results = []
+    if public_search_allowed(query, region_filters):
+        limit = min(max(request.args.get('limit', DEFAULT_SUGGEST_LIMIT, type=int) or DEFAULT_SUGGEST_LIMIT, 1), MAX_SUGGEST_LIMIT)
+        results = search_penerima(query, region_filters, limit=limit)
+    response = jsonify({'hasil': serialize_suggestions(results)})
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response, abort, request
+
+from app.utils.metrics import metrics_allowed, render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Metrik format teks Prometheus; hanya untuk pembawa METRICS_TOKEN (atau alamat di METRICS_ALLOWED_IPS)."""
+    if not metrics_allowed(request):
+        abort(404)
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
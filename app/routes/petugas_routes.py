@@ -1,32 +1,25 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, session, make_response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, Response, stream_with_context, send_file, abort
 from flask_login import login_required
 from app import db
-from app.database.models import Penerima, Setting
-from app.forms import PenerimaForm, IndexPredictionForm, SettingForm, MassPredictionForm
-from app.utils.model_handler import predict_individual_status, _get_region_name
+from app.database.models import Penerima, Job
+from app.forms import PenerimaForm, IndexPredictionForm, MassPredictionForm, ImportPenerimaForm, PEKERJAAN_CHOICES
+from app.utils.result_cache import result_cache
+from app.utils.ranking import get_eligible_ranking
+from app.utils.pdf_report import REPORT_FILENAME, build_report, cached_report_path, report_key
+from app.jobs import enqueue_job, get_latest_job, request_cancel
+from app.utils.penerima_listing import SORT_OPTIONS, parse_list_args, query_penerima_page, serialize_page
+from app.utils.exporter import EXPORT_DATASETS, EXPORT_FORMATS, export_filename, iter_export
+from app.utils.importer import import_penerima
+from app.utils.model_registry import model_registry
+from app.utils.kriteria_mask import KRITERIA_BIT, count_profile, mask_distribution
+from app.utils.settings_service import get_settings
+from app.utils.penerima_search import (
+    DEFAULT_SUGGEST_LIMIT, MAX_SUGGEST_LIMIT, lookup_penerima, region_filters_from, search_penerima, serialize_suggestions
+)
 from werkzeug.utils import secure_filename
-from flask import current_app as app
-from threading import Lock
 import os
-import joblib
-import threading
+import json
 import time
-from datetime import datetime
-import weasyprint
-
-# Global state for mass prediction progress
-_mass_predict_progress_state = {
-    'running': False,
-    'total': 0,
-    'processed': 0,
-    'percentage': 0,
-    'start_time': None,
-    'elapsed_time': 0,
-    'estimated_time_remaining': 0,
-    'status': 'idle', # idle, processing, completed, error
-    'error': None
-}
-progress_lock = threading.Lock()
 
 petugas_bp = Blueprint('petugas', __name__, url_prefix='/petugas')
 
@@ -44,34 +37,19 @@ def dashboard():
 def prediksi():
     form = IndexPredictionForm()
     prediction = None
-    setting = Setting.query.first()
-    if not setting:
-        setting = Setting(passing_grade=0.5, kuota=50) # Default value for float
-        db.session.add(setting)
-        db.session.commit()
+    setting = get_settings()
 
     if form.validate_on_submit():
         nama = form.nama.data
-        
-        penerima_obj = Penerima.query.filter_by(nama=nama).first()
+
+        penerima_obj, kandidat, exact = lookup_penerima(nama, form.penerima_id.data, region_filters_from(request.form))
         if not penerima_obj:
-            flash(f'Individu dengan nama \'{nama}\' tidak ditemukan.', 'danger')
-            return render_template('petugas/form_prediksi.html', title='Prediksi Kelayakan', form=form, prediction=prediction, setting=setting)
-
-        model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../models/knn_model.pkl')
-        try:
-            knn_model = joblib.load(model_path)
-        except Exception as e:
-            flash(f'Gagal memuat model prediksi: {str(e)}', 'danger')
-            return render_template('petugas/form_prediksi.html', title='Prediksi Kelayakan', form=form)
-
-        passing_grade = setting.passing_grade
-        prediction = predict_individual_status(
-            penerima_obj=penerima_obj,
-            knn_model=knn_model,
-            passing_grade=passing_grade,
-            logger=current_app.logger
-        )
+            if not kandidat:
+                flash(f'Individu dengan nama \'{nama}\' tidak ditemukan.', 'danger')
+            kandidat = {'nama': nama, 'exact': exact, 'daftar': serialize_suggestions(kandidat, include_id=True)} if kandidat else None
+            return render_template('petugas/form_prediksi.html', title='Prediksi Kelayakan', form=form, prediction=prediction, setting=setting, kandidat=kandidat)
+
+        prediction = result_cache.predict(penerima_obj, setting.passing_grade, current_app.logger)
 
         if 'error' in prediction:
             flash(prediction['error'], 'danger')
@@ -79,197 +57,136 @@ def prediksi():
 
     return render_template('petugas/form_prediksi.html', title='Prediksi Kelayakan', form=form, prediction=prediction, setting=setting)
 
-def run_mass_prediction_in_background(app, all_penerima_ids, passing_grade, model_path):
-    with app.app_context():
-        global _mass_predict_progress_state
-        try:
-            knn_model = joblib.load(model_path)
-            all_penerima = Penerima.query.filter(Penerima.id.in_(all_penerima_ids)).all()
-            updated_penerima_objects = []
-            cache = {}
-
-            for i, penerima_obj in enumerate(all_penerima):
-                prediction_result = predict_individual_status(
-                    penerima_obj=penerima_obj,
-                    knn_model=knn_model,
-                    passing_grade=passing_grade,
-                    logger=app.logger
-                )
-                if 'error' not in prediction_result:
-                    penerima_obj.status_kelayakan_knn = prediction_result['status_kelayakan_knn']
-                    penerima_obj.skor_saw_ternormalisasi = prediction_result['skor_saw_ternormalisasi']
-                    updated_penerima_objects.append(penerima_obj)
-                
-                with progress_lock:
-                    _mass_predict_progress_state['processed'] = i + 1
-                    _mass_predict_progress_state['percentage'] = int((_mass_predict_progress_state['processed'] / _mass_predict_progress_state['total']) * 100)
-                    _mass_predict_progress_state['elapsed_time'] = (datetime.now() - _mass_predict_progress_state['start_time']).total_seconds()
-                    if _mass_predict_progress_state['processed'] > 0:
-                        time_per_item = _mass_predict_progress_state['elapsed_time'] / _mass_predict_progress_state['processed']
-                        remaining_items = _mass_predict_progress_state['total'] - _mass_predict_progress_state['processed']
-                        _mass_predict_progress_state['estimated_time_remaining'] = int(remaining_items * time_per_item)
-                    else:
-                        _mass_predict_progress_state['estimated_time_remaining'] = 0
-
-            if updated_penerima_objects:
-                db.session.bulk_save_objects(updated_penerima_objects)
-                db.session.commit()
-            
-            with progress_lock:
-                _mass_predict_progress_state['status'] = 'completed'
-
-        except Exception as e:
-            with progress_lock:
-                _mass_predict_progress_state['status'] = 'error'
-                _mass_predict_progress_state['error'] = str(e)
-        finally:
-            db.session.remove()
-            with progress_lock:
-                _mass_predict_progress_state['running'] = False
+@petugas_bp.route('/api/cari_nama')
+@login_required
+def cari_nama():
+    """Autocomplete nama untuk form prediksi petugas: saran menyertakan id penerima, wilayah boleh kosong."""
+    limit = min(max(request.args.get('limit', DEFAULT_SUGGEST_LIMIT, type=int) or DEFAULT_SUGGEST_LIMIT, 1), MAX_SUGGEST_LIMIT)
+    results = search_penerima(request.args.get('q', ''), region_filters_from(request.args), limit=limit)
+    response = jsonify({'hasil': serialize_suggestions(results, include_id=True)})
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
 
 @petugas_bp.route('/mass_predict', methods=['GET', 'POST'])
 @login_required
 def mass_predict():
     form = MassPredictionForm()
     if form.validate_on_submit():
-        with progress_lock:
-            _mass_predict_progress_state['running'] = False
-            _mass_predict_progress_state['total'] = 0
-            _mass_predict_progress_state['processed'] = 0
-            _mass_predict_progress_state['percentage'] = 0
-            _mass_predict_progress_state['start_time'] = None
-            _mass_predict_progress_state['elapsed_time'] = 0
-            _mass_predict_progress_state['estimated_time_remaining'] = 0
-            _mass_predict_progress_state['status'] = 'idle'
-            _mass_predict_progress_state['error'] = None
-
-        setting = Setting.query.first()
-        if not setting:
-            setting = Setting(passing_grade=0.5, kuota=50) # Default value for float
-            db.session.add(setting)
-            db.session.commit()
-
-        all_penerima_ids = [p.id for p in Penerima.query.with_entities(Penerima.id).all()]
-        model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../models/knn_model.pkl')
-
-        with progress_lock:
-            _mass_predict_progress_state['running'] = True
-            _mass_predict_progress_state['total'] = len(all_penerima_ids)
-            _mass_predict_progress_state['start_time'] = datetime.now()
-            _mass_predict_progress_state['status'] = 'processing'
-
-        app_instance = current_app._get_current_object()
-        threading.Thread(target=run_mass_prediction_in_background, args=(app_instance, all_penerima_ids, setting.passing_grade, model_path)).start()
-
-        return jsonify({'status': 'started', 'message': 'Proses prediksi massal dimulai di latar belakang.'})
-
-    return render_template('petugas/mass_predict.html', title='Prediksi Massal Kelayakan', form=form)
+        setting = get_settings()
+
+        job, created = enqueue_job('mass_predict', {'passing_grade': setting.passing_grade, 'full': form.nilai_ulang_semua.data})
+        if not created:
+            return jsonify({'status': 'started', 'job_id': job.id, 'message': 'Prediksi massal sedang berjalan. Menampilkan progres job yang aktif.'})
+
+        return jsonify({'status': 'started', 'job_id': job.id, 'message': 'Proses prediksi massal dimulai di latar belakang.'})
+
+    return render_template('petugas/mass_predict.html', title='Prediksi Massal Kelayakan', form=form, model_info=model_registry.active_info())
 
 @petugas_bp.route('/mass_predict_progress')
 @login_required
 def get_mass_predict_progress():
-    global _mass_predict_progress_state
-    with progress_lock:
-        return jsonify(_mass_predict_progress_state)
-
+    job_id = request.args.get('job_id', type=int)
+    job = db.session.get(Job, job_id) if job_id else get_latest_job('mass_predict')
+    if job is None:
+        return jsonify({'running': False, 'total': 0, 'processed': 0, 'percentage': 0, 'elapsed_time': 0,
+                        'estimated_time_remaining': 0, 'status': 'idle', 'error': None})
+    return jsonify(job.to_progress_dict())
+
+@petugas_bp.route('/jobs/<int:job_id>/events')
+@login_required
+def job_events(job_id):
+    """Server-Sent Events: mengirim progres job paling sering sekali per PROGRESS_STREAM_INTERVAL detik sampai job selesai."""
+    interval = current_app.config.get('PROGRESS_STREAM_INTERVAL', 1.0)
+
+    def generate():
+        while True:
+            job = db.session.get(Job, job_id)
+            if job is None:
+                yield 'event: error\ndata: {"message": "Job tidak ditemukan."}\n\n'
+                return
+            progress = job.to_progress_dict()
+            db.session.remove() # Jangan tahan koneksi/transaksi selama menunggu
+            yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+            if not progress['running']:
+                return
+            time.sleep(interval)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Nonaktifkan buffering proxy (nginx)
+    return response
 
+@petugas_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    job = request_cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job tidak ditemukan.'}), 404
+    return jsonify(job.to_progress_dict())
 
 @petugas_bp.route('/train_model_now')
 @login_required
 def train_model_now():
-    from app.utils.model_handler import train_knn_model
-    train_knn_model(db.session)
-    flash('Model KNN berhasil dilatih ulang!', 'success')
-    
-    return redirect(url_for('petugas.dashboard'))
-
-
+    job, created = enqueue_job('train_model')
+    if created:
+        flash('Pelatihan ulang model KNN dimulai di latar belakang.', 'success')
+    else:
+        flash('Pelatihan ulang model KNN sedang berjalan.', 'info')
 
+    return redirect(url_for('petugas.dashboard'))
 
 @petugas_bp.route('/eligible_recipients')
 @login_required
 def eligible_recipients():
-    setting = Setting.query.first()
-    if not setting:
-        flash('Pengaturan passing grade dan kuota belum ditentukan. Harap atur di Pengaturan Sistem.', 'danger')
-        return redirect(url_for('petugas.settings'))
-
+    setting = get_settings()
     passing_grade = setting.passing_grade
     kuota = setting.kuota
+    kuota_level = setting.kuota_level
 
-    eligible_list = Penerima.query.filter(
-        Penerima.status_kelayakan_knn == 'Layak',
-        Penerima.skor_saw_ternormalisasi >= passing_grade
-    ).order_by(Penerima.skor_saw_ternormalisasi.desc()).limit(kuota).all()
-
-    eligible_list_data = []
-    for penerima_obj in eligible_list:
-        provinsi_name = _get_region_name(penerima_obj.provinsi, 'provinces.json', current_app.logger)
-        kabupaten_name = _get_region_name(penerima_obj.kabupaten, f'regencies/{penerima_obj.provinsi}.json', current_app.logger)
-        kecamatan_name = _get_region_name(penerima_obj.kecamatan, f'districts/{penerima_obj.kabupaten}.json', current_app.logger)
-        desa_name = _get_region_name(penerima_obj.desa, f'villages/{penerima_obj.kecamatan}.json', current_app.logger)
-
-        eligible_list_data.append({
-            'nama': penerima_obj.nama,
-            'provinsi': provinsi_name if provinsi_name else penerima_obj.provinsi,
-            'kabupaten': kabupaten_name if kabupaten_name else penerima_obj.kabupaten,
-            'kecamatan': kecamatan_name if kecamatan_name else penerima_obj.kecamatan,
-            'desa': desa_name if desa_name else penerima_obj.desa,
-            'pekerjaan': penerima_obj.pekerjaan,
-            'skor_saw_ternormalisasi': penerima_obj.skor_saw_ternormalisasi,
-            'status_kelayakan_knn': penerima_obj.status_kelayakan_knn
-        })
+    eligible_list_data, _ = get_eligible_ranking(passing_grade, kuota, kuota_level)
 
     return render_template(
         'petugas/eligible_recipients.html',
         title='Daftar Penerima Layak',
         eligible_list=eligible_list_data,
         passing_grade=passing_grade,
-        kuota=kuota
+        kuota=kuota,
+        kuota_level=kuota_level
     )
 
 @petugas_bp.route('/eligible_recipients/pdf')
 @login_required
 def eligible_recipients_pdf():
-    setting = Setting.query.first()
-    if not setting:
-        flash('Pengaturan passing grade dan kuota belum ditentukan. Harap atur di Pengaturan Sistem.', 'danger')
-        return redirect(url_for('petugas.settings'))
-
+    setting = get_settings()
     passing_grade = setting.passing_grade
     kuota = setting.kuota
+    kuota_level = setting.kuota_level
+
+    ranking, _ = get_eligible_ranking(passing_grade, kuota, kuota_level)
+    key = report_key(ranking, passing_grade, kuota, kuota_level)
+    path = cached_report_path(key)
+    if path is None and len(ranking) <= current_app.config.get('REPORT_INLINE_MAX_ROWS', 200):
+        path = build_report(ranking, passing_grade, kuota, key, kuota_level=kuota_level) # Laporan kecil cukup dirender langsung
 
-    eligible_list = Penerima.query.filter(
-        Penerima.status_kelayakan_knn == 'Layak',
-        Penerima.skor_saw_ternormalisasi >= passing_grade
-    ).order_by(Penerima.skor_saw_ternormalisasi.desc()).limit(kuota).all()
-
-    eligible_list_data = []
-    for penerima_obj in eligible_list:
-        provinsi_name = _get_region_name(penerima_obj.provinsi, 'provinces.json', current_app.logger)
-        kabupaten_name = _get_region_name(penerima_obj.kabupaten, f'regencies/{penerima_obj.provinsi}.json', current_app.logger)
-        kecamatan_name = _get_region_name(penerima_obj.kecamatan, f'districts/{penerima_obj.kabupaten}.json', current_app.logger)
-        desa_name = _get_region_name(penerima_obj.desa, f'villages/{penerima_obj.kecamatan}.json', current_app.logger)
-
-        eligible_list_data.append({
-            'nama': penerima_obj.nama,
-            'provinsi': provinsi_name if provinsi_name else penerima_obj.provinsi,
-            'kabupaten': kabupaten_name if kabupaten_name else penerima_obj.kabupaten,
-            'kecamatan': kecamatan_name if kecamatan_name else penerima_obj.kecamatan,
-            'desa': desa_name if desa_name else penerima_obj.desa,
-            'pekerjaan': penerima_obj.pekerjaan,
-            'skor_saw_ternormalisasi': penerima_obj.skor_saw_ternormalisasi,
-            'status_kelayakan_knn': penerima_obj.status_kelayakan_knn
-        })
-        current_app.logger.info(f"DEBUG PDF: {penerima_obj.nama} - {provinsi_name}, {kabupaten_name}, {kecamatan_name}, {desa_name}")
-
-    rendered_html = render_template('petugas/eligible_recipients_print.html', eligible_list=eligible_list_data, passing_grade=passing_grade, kuota=kuota, now=datetime.now())
-    pdf = weasyprint.HTML(string=rendered_html).write_pdf()
-
-    response = make_response(pdf)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = 'inline; filename=daftar_penerima_layak.pdf'
+    if path:
+        # ETag = hash konten laporan, sehingga unduhan ulang dijawab 304 oleh conditional GET
+        return send_file(path, mimetype='application/pdf', download_name=REPORT_FILENAME, conditional=True, etag=key, max_age=0)
 
+    job, _ = enqueue_job('pdf_report', {'passing_grade': passing_grade, 'kuota': kuota, 'kuota_level': kuota_level})
+    return render_template('petugas/report_pending.html', title='Menyiapkan Laporan PDF', job=job, rows=len(ranking))
+
+@petugas_bp.route('/export/<dataset>.<fmt>')
+@login_required
+def export_data(dataset, fmt):
+    """Ekspor CSV/XLSX yang dialirkan langsung dari cursor database; 'penerima' mengikuti filter daftar penerima."""
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        abort(404)
+    filters = parse_list_args(request.args)[0] if dataset == 'penerima' else None
+
+    response = Response(stream_with_context(iter_export(dataset, fmt, filters)), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(dataset, fmt)}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no' # Nonaktifkan buffering proxy (nginx)
     return response
 
 @petugas_bp.route('/tambah_penerima', methods=['GET', 'POST'])
@@ -326,11 +243,61 @@ def tambah_penerima():
         submit_button_text='Simpan Data Penerima'
     )
 
+@petugas_bp.route('/import_penerima', methods=['GET', 'POST'])
+@login_required
+def import_penerima_route():
+    form = ImportPenerimaForm()
+    report = None
+    if form.validate_on_submit():
+        file = form.berkas.data
+        max_bytes = current_app.config.get('IMPORT_MAX_UPLOAD_MB', 20) * 1024 * 1024
+        file.stream.seek(0, os.SEEK_END)
+        too_large = file.stream.tell() > max_bytes
+        file.stream.seek(0)
+        if too_large:
+            flash(f"Ukuran berkas melebihi {current_app.config.get('IMPORT_MAX_UPLOAD_MB', 20)}MB. Gunakan `flask penerima import` untuk berkas besar.", 'danger')
+        else:
+            try:
+                report = import_penerima(
+                    file.stream,
+                    secure_filename(file.filename),
+                    score=form.hitung_skor.data,
+                    chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 2000)
+                )
+            except ValueError as e:
+                flash(str(e), 'danger')
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Impor data penerima gagal: {e}", exc_info=True)
+                flash(f'Impor gagal: {str(e)}', 'danger')
+            else:
+                category = 'success' if report.error_count == 0 else 'warning'
+                flash(f'{report.inserted} dari {report.total_rows} baris berhasil diimpor.', category)
+
+    return render_template('petugas/import_penerima.html', title='Impor Data Penerima', form=form, report=report)
+
 @petugas_bp.route('/list_penerima')
 @login_required
 def list_penerima():
-    all_penerima = Penerima.query.all()
-    return render_template('petugas/list_penerima.html', title='Rakyat Negara', penerima_list=all_penerima)
+    filters, sort, cursor, limit = parse_list_args(request.args)
+    penerima_list, next_cursor = query_penerima_page(filters, sort, cursor, limit)
+    return render_template(
+        'petugas/list_penerima.html',
+        title='Rakyat Negara',
+        penerima_list=penerima_list,
+        next_cursor=next_cursor,
+        filters=request.args.to_dict(),
+        sort=sort,
+        sort_options=SORT_OPTIONS,
+        pekerjaan_choices=PEKERJAAN_CHOICES
+    )
+
+@petugas_bp.route('/api/penerima')
+@login_required
+def api_list_penerima():
+    filters, sort, cursor, limit = parse_list_args(request.args)
+    penerima_list, next_cursor = query_penerima_page(filters, sort, cursor, limit)
+    return jsonify({'data': serialize_page(penerima_list), 'next_cursor': next_cursor})
 
 @petugas_bp.route('/edit_penerima/<int:penerima_id>', methods=['GET', 'POST'])
 @login_required
@@ -408,4 +375,17 @@ def hapus_penerima(penerima_id):
     db.session.delete(penerima)
     db.session.commit()
     flash('Data penerima berhasil dihapus.', 'success')
-    return redirect(url_for('petugas.list_penerima'))
\ No newline at end of file
+    return redirect(url_for('petugas.list_penerima'))
+
+@petugas_bp.route('/api/profil_kriteria')
+@login_required
+def api_profil_kriteria():
+    """Distribusi profil kriteria, atau jumlah rumah tangga untuk satu profil (?wajib=difabel,pkh&kecuali=dtks)."""
+    wajib = [field for field in request.args.get('wajib', '').split(',') if field]
+    kecuali = [field for field in request.args.get('kecuali', '').split(',') if field]
+    unknown = [field for field in wajib + kecuali if field not in KRITERIA_BIT]
+    if unknown:
+        return jsonify({'error': f"Kriteria tidak dikenal: {', '.join(unknown)}"}), 400
+    if wajib or kecuali:
+        return jsonify({'wajib': wajib, 'kecuali': kecuali, 'jumlah': count_profile(wajib, kecuali)})
+    return jsonify({'data': mask_distribution()})
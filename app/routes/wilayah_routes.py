@@ -0,0 +1,22 @@
+from flask import Blueprint, abort
+
+from app.utils.wilayah import WILAYAH_API_LEVELS, region_index, wilayah_api_base_url, wilayah_json_response
+
+wilayah_bp = Blueprint('wilayah', __name__)
+
+@wilayah_bp.app_context_processor
+def inject_wilayah_api():
+    """Base URL dan versi data wilayah untuk script dropdown provinsi..desa, serta status berkas data wilayah."""
+    return {'wilayah_api_base_url': wilayah_api_base_url, 'wilayah_version': region_index.version,
+            'wilayah_loaded': region_index.loaded}
+
+@wilayah_bp.route('/provinces.json')
+def provinces():
+    return wilayah_json_response()
+
+@wilayah_bp.route('/<level>/<parent_id>.json')
+def children(level, parent_id):
+    """regencies/<id provinsi>, districts/<id kabupaten>, villages/<id kecamatan> (sama dengan EMSIFA)."""
+    if WILAYAH_API_LEVELS.get(level) != len(parent_id) or not parent_id.isdigit():
+        abort(404)
+    return wilayah_json_response(parent_id)
@@ -0,0 +1,130 @@
+// Autocomplete nama penerima untuk input dengan atribut data-autocomplete-url.
+// Permintaan ditunda (debounce) sampai pengguna berhenti mengetik, permintaan lama dibatalkan,
+// dan hasil per kata kunci disimpan agar tidak diminta ulang. Halaman publik memakai data-min-length dan
+// data-require-region (mis. "kecamatan,desa") agar saran hanya diminta setelah wilayahnya dipilih.
+(function () {
+    const DEBOUNCE_MS = 250;
+    const DEFAULT_MIN_LENGTH = 2;
+    const REGION_FIELDS = ['provinsi', 'kabupaten', 'kecamatan', 'desa'];
+
+    function regionParams(form) {
+        const params = new URLSearchParams();
+        REGION_FIELDS.forEach(function (field) {
+            const select = form ? form.querySelector(`[name="${field}"]`) : null;
+            if (select && !select.disabled && select.value && !select.value.startsWith('-')) {
+                params.set(field, select.value);
+            }
+        });
+        return params;
+    }
+
+    function initAutocomplete(input) {
+        const form = input.form;
+        const hiddenId = form ? form.querySelector('input[name="penerima_id"]') : null;
+        const minLength = parseInt(input.dataset.minLength, 10) || DEFAULT_MIN_LENGTH;
+        const requiredRegion = (input.dataset.requireRegion || '').split(',').filter(Boolean);
+        const container = input.closest('.input-group') || input.parentNode;
+        const menu = document.createElement('div');
+        menu.className = 'list-group shadow-sm w-100';
+        menu.style.cssText = 'position:absolute; top:100%; left:0; z-index:1050; display:none;';
+        container.style.position = 'relative';
+        container.appendChild(menu);
+
+        const cache = new Map();
+        let timer = null;
+        let controller = null;
+        let activeIndex = -1;
+
+        function hide() {
+            menu.style.display = 'none';
+            menu.innerHTML = '';
+            activeIndex = -1;
+        }
+
+        function choose(item) {
+            input.value = item.nama;
+            if (hiddenId) hiddenId.value = item.id || '';
+            hide();
+        }
+
+        function render(items) {
+            menu.innerHTML = '';
+            activeIndex = -1;
+            if (!items.length) {
+                hide();
+                return;
+            }
+            items.forEach(function (item) {
+                const option = document.createElement('button');
+                option.type = 'button';
+                option.className = 'list-group-item list-group-item-action py-2';
+                const nama = document.createElement('strong');
+                nama.textContent = item.nama;
+                const wilayah = document.createElement('small');
+                wilayah.className = 'text-muted d-block';
+                wilayah.textContent = item.wilayah || '';
+                option.appendChild(nama);
+                option.appendChild(wilayah);
+                option.addEventListener('mousedown', function (event) {
+                    event.preventDefault(); // Jangan sampai input kehilangan fokus sebelum pilihan diproses
+                    choose(item);
+                });
+                menu.appendChild(option);
+            });
+            menu.style.display = 'block';
+        }
+
+        function fetchSuggestions() {
+            const query = input.value.trim();
+            const params = regionParams(form);
+            if (query.length < minLength || (requiredRegion.length && !requiredRegion.some(field => params.has(field)))) {
+                hide();
+                return;
+            }
+            params.set('q', query);
+            const url = `${input.dataset.autocompleteUrl}?${params.toString()}`;
+            if (cache.has(url)) {
+                render(cache.get(url));
+                return;
+            }
+            if (controller) controller.abort();
+            controller = new AbortController();
+            fetch(url, { signal: controller.signal })
+                .then(response => response.json())
+                .then(data => {
+                    cache.set(url, data.hasil || []);
+                    if (input.value.trim() === query) render(data.hasil || []);
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') hide();
+                });
+        }
+
+        input.addEventListener('input', function () {
+            if (hiddenId) hiddenId.value = ''; // Nama diubah: pilihan sebelumnya tidak berlaku lagi
+            clearTimeout(timer);
+            timer = setTimeout(fetchSuggestions, DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', function (event) {
+            const options = menu.querySelectorAll('.list-group-item');
+            if (!options.length) return;
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                activeIndex = (activeIndex + (event.key === 'ArrowDown' ? 1 : -1) + options.length) % options.length;
+                options.forEach((option, index) => option.classList.toggle('active', index === activeIndex));
+            } else if (event.key === 'Enter' && activeIndex >= 0) {
+                event.preventDefault();
+                options[activeIndex].dispatchEvent(new MouseEvent('mousedown'));
+            } else if (event.key === 'Escape') {
+                hide();
+            }
+        });
+
+        input.addEventListener('blur', hide);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('input[data-autocomplete-url]').forEach(initAutocomplete);
+    });
+})();
@@ -0,0 +1,86 @@
+// Data dropdown wilayah (provinsi, kabupaten, kecamatan, desa) dari /api/wilayah aplikasi.
+// Setiap daftar disimpan di memori dan di localStorage per versi data wilayah, sehingga form yang dibuka
+// berulang kali tidak meminta ulang wilayah yang sama; versi data baru otomatis membuang cache lama.
+// Jika data wilayah lokal belum dibangun, base URL menunjuk ke EMSIFA dan hanya cache memori yang dipakai.
+(function () {
+    const STORAGE_PREFIX = 'wilayah:';
+    const memory = new Map();
+
+    function storage() {
+        try {
+            return window.localStorage;
+        } catch (e) {
+            return null; // localStorage dinonaktifkan browser
+        }
+    }
+
+    function pruneOtherVersions(prefix) {
+        const store = storage();
+        if (!store) return;
+        for (let i = store.length - 1; i >= 0; i--) {
+            const key = store.key(i);
+            if (key && key.startsWith(STORAGE_PREFIX) && !key.startsWith(prefix)) {
+                store.removeItem(key);
+            }
+        }
+    }
+
+    function readStored(key) {
+        const store = storage();
+        const text = store ? store.getItem(key) : null;
+        if (!text) return null;
+        try {
+            return JSON.parse(text);
+        } catch (e) {
+            store.removeItem(key);
+            return null;
+        }
+    }
+
+    function writeStored(key, data) {
+        const store = storage();
+        if (!store) return;
+        try {
+            store.setItem(key, JSON.stringify(data));
+        } catch (e) {
+            // Kuota localStorage penuh: cache memori tetap dipakai
+        }
+    }
+
+    function create(baseUrl, version) {
+        const prefix = `${STORAGE_PREFIX}${version}:`;
+        if (version) {
+            pruneOtherVersions(prefix);
+        }
+
+        function load(path) {
+            const key = prefix + path;
+            if (memory.has(key)) {
+                return memory.get(key);
+            }
+            const stored = version ? readStored(key) : null;
+            const url = baseUrl + path + (version ? `?v=${encodeURIComponent(version)}` : '');
+            const promise = stored ? Promise.resolve(stored) : fetch(url)
+                .then(function (response) {
+                    if (!response.ok) throw new Error(`Gagal memuat ${url}: HTTP ${response.status}`);
+                    return response.json();
+                })
+                .then(function (data) {
+                    if (version) writeStored(key, data);
+                    return data;
+                });
+            promise.catch(function () { memory.delete(key); }); // Permintaan gagal boleh diulang
+            memory.set(key, promise);
+            return promise;
+        }
+
+        return {
+            provinces: function () { return load('provinces.json'); },
+            regencies: function (provinsiId) { return load(`regencies/${provinsiId}.json`); },
+            districts: function (kabupatenId) { return load(`districts/${kabupatenId}.json`); },
+            villages: function (kecamatanId) { return load(`villages/${kecamatanId}.json`); },
+        };
+    }
+
+    window.WilayahApi = { create: create };
+})();
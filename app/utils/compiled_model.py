@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+
+# Ruang fitur di atas batas ini terlalu besar untuk ditabelkan; model dipakai apa adanya
+MAX_COMPILED_FEATURES = 16
+
+
+class CompiledKNNModel:
+    """
+    Model KNN "terkompilasi": hasil predict untuk setiap kemungkinan kombinasi fitur boolean disimpan
+    dalam tabel (indeks = fitur ke-j sebagai bit ke-j). Prediksi menjadi satu operasi indeks array,
+    tanpa sklearn maupun data latih di memori. Antarmuka `.predict(X)` sama dengan estimator sklearn.
+    """
+
+    def __init__(self, table):
+        self.table = np.asarray(table)
+        self.n_features_in_ = int(self.table.shape[0]).bit_length() - 1
+        self._bit_weights = np.left_shift(1, np.arange(self.n_features_in_, dtype=np.int64))
+
+    def encode(self, X):
+        """Mengubah matriks fitur (n x n_fitur, 0/1 atau bool) menjadi kode integer per baris."""
+        X = np.asarray(X)
+        return (X.reshape(-1, self.n_features_in_) != 0).astype(np.int64) @ self._bit_weights
+
+    def predict_codes(self, codes):
+        return self.table[codes]
+
+    def predict(self, X):
+        return self.table[self.encode(X)]
+
+
+def all_feature_patterns(n_features):
+    """
+    Seluruh 2^n kombinasi fitur boolean, baris ke-i adalah representasi bit dari i. Bertipe bool, bukan 0/1 int:
+    metrik jaccard sklearn mengonversi masukan non-bool dengan DataConversionWarning.
+    """
+    codes = np.arange(1 << n_features, dtype=np.int64)
+    return ((codes[:, None] >> np.arange(n_features)) & 1).astype(bool)
+
+
+def compile_model(model):
+    """Mengevaluasi model pada semua kombinasi fitur sekali saja. Mengembalikan CompiledKNNModel atau None."""
+    if isinstance(model, CompiledKNNModel):
+        return model
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features is None or n_features > MAX_COMPILED_FEATURES:
+        return None
+    predictions = np.asarray(model.predict(all_feature_patterns(n_features)))
+    if predictions.dtype.kind in 'iub' and predictions.min() >= np.iinfo(np.int8).min and predictions.max() <= np.iinfo(np.int8).max:
+        predictions = predictions.astype(np.int8)
+    return CompiledKNNModel(predictions)
+
+
+def verify_compiled_model(model, compiled):
+    """
+    Memastikan tabel memberi hasil yang sama dengan model asli untuk setiap kombinasi fitur (lewat jalur
+    encode, bukan indeks langsung). Melempar ValueError jika ada kode yang berbeda.
+    """
+    patterns = all_feature_patterns(compiled.n_features_in_)
+    expected = np.asarray(model.predict(patterns))
+    mismatched = np.flatnonzero(compiled.predict(patterns) != expected)
+    if mismatched.size:
+        raise ValueError(f"Tabel model terkompilasi tidak cocok dengan model pada {mismatched.size} kode fitur "
+                         f"(mis. kode {mismatched[:5].tolist()})")
+
+
+# ===============================
+# Penyimpanan Tabel di Samping Berkas Model
+# ===============================
+def lut_path_for(model_path):
+    return f'{os.path.splitext(model_path)[0]}.lut.npy'
+
+
+def save_lut(compiled, model_path):
+    path = lut_path_for(model_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp.npy'
+    np.save(tmp_path, compiled.table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_model_file(model_path, compiled=True):
+    """
+    Memuat model dari berkas. Dengan compiled=True, tabel `.lut.npy` di samping berkas dipakai jika masih
+    sebaru berkas model (tanpa unpickle sklearn); jika belum ada, model dikompilasi lalu tabelnya disimpan.
+    """
+    if compiled:
+        lut_path = lut_path_for(model_path)
+        if os.path.exists(lut_path) and os.path.getmtime(lut_path) >= os.path.getmtime(model_path):
+            return CompiledKNNModel(np.load(lut_path))
+
+    import joblib # Unpickle sklearn hanya jika tabel belum ada/basi; jalur LUT tidak memuat sklearn
+
+    model = joblib.load(model_path)
+    if hasattr(model, 'feature_names_in_'):
+        del model.feature_names_in_
+    if not compiled:
+        return model
+
+    compiled_model = compile_model(model)
+    if compiled_model is None:
+        return model
+    try:
+        save_lut(compiled_model, model_path)
+    except OSError:
+        pass # Direktori model read-only: tabel tetap dipakai dari memori
+    return compiled_model
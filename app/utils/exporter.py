@@ -0,0 +1,192 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+
+import click
+from flask import current_app
+
+from app import db
+from app.database.engine import read_session
+from app.database.models import Penerima
+from app.utils.importer import penerima_cli
+from app.utils.model_handler import BATCH_FEATURE_FIELDS
+from app.utils.penerima_listing import filter_penerima
+from app.utils.ranking import eligible_select
+from app.utils.settings_service import get_settings
+from app.utils.wilayah import REGION_FIELDS, resolve_region_names
+
+DEFAULT_EXPORT_BATCH_SIZE = 2000
+CSV_FLUSH_ROWS = 500 # Baris per potongan yang dikirim ke klien
+XLSX_READ_CHUNK = 64 * 1024
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+EXPORT_DATASETS = ('penerima', 'layak')
+
+# Header memakai nama field agar berkas ekspor bisa diimpor kembali (`flask penerima import`)
+PENERIMA_HEADER = ['id', 'nama'] + REGION_FIELDS + ['pekerjaan'] + BATCH_FEATURE_FIELDS + ['skor_saw_ternormalisasi', 'status_kelayakan_knn']
+LAYAK_HEADER = ['peringkat', 'nama'] + REGION_FIELDS + ['pekerjaan', 'skor_saw_ternormalisasi', 'status_kelayakan_knn']
+
+_PENERIMA_COLUMNS = [getattr(Penerima, field) for field in PENERIMA_HEADER]
+_LAYAK_COLUMNS = [getattr(Penerima, field) for field in LAYAK_HEADER[1:]]
+
+
+# ===============================
+# 1. Baris Ekspor (cursor server-side, per batch)
+# ===============================
+def _iter_batches(statement, batch_size):
+    """
+    Baris hasil query per batch lewat yield_per: hanya satu batch yang ada di memori, berapa pun jumlah barisnya.
+    Nama wilayah diresolusi sekaligus per batch.
+    """
+    with read_session() as session:
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch, resolve_region_names(batch)
+
+
+def _bool_text(value):
+    return 'Ya' if value else 'Tidak'
+
+
+def _safe_text(value):
+    # Teks yang diawali '=', '+' atau '@' akan dijalankan sebagai rumus oleh Excel
+    if isinstance(value, str) and value[:1] in ('=', '+', '@'):
+        return "'" + value
+    return value
+
+
+def iter_penerima_rows(filters=None, batch_size=DEFAULT_EXPORT_BATCH_SIZE):
+    """Seluruh tabel penerima (dengan filter daftar penerima, jika ada) berurutan id, satu tuple per baris."""
+    statement = filter_penerima(db.select(*_PENERIMA_COLUMNS), filters or {}).order_by(Penerima.id)
+    for batch, names in _iter_batches(statement, batch_size):
+        for row, region_names in zip(batch, names):
+            yield (
+                row.id, _safe_text(row.nama), *(region_names[field] for field in REGION_FIELDS), _safe_text(row.pekerjaan),
+                *(_bool_text(getattr(row, field)) for field in BATCH_FEATURE_FIELDS),
+                row.skor_saw_ternormalisasi, row.status_kelayakan_knn,
+            )
+
+
+def iter_layak_rows(passing_grade, kuota, kuota_level='global', batch_size=DEFAULT_EXPORT_BATCH_SIZE):
+    """
+    Daftar penerima layak, sama dengan halaman/PDF daftar layak, tetapi dibaca bertahap dan tanpa cache.
+    Kolom peringkat = urutan global, atau urutan di dalam kecamatan/desa pada pembagian kuota per wilayah.
+    """
+    statement = eligible_select(passing_grade, kuota, kuota_level, _LAYAK_COLUMNS)
+    peringkat = 0
+    for batch, names in _iter_batches(statement, batch_size):
+        for row, region_names in zip(batch, names):
+            peringkat += 1
+            yield (
+                row._mapping.get('peringkat', peringkat), _safe_text(row.nama), *(region_names[field] for field in REGION_FIELDS), _safe_text(row.pekerjaan),
+                row.skor_saw_ternormalisasi, row.status_kelayakan_knn,
+            )
+
+
+def export_rows(dataset, filters=None, batch_size=None):
+    """(header, iterator baris) untuk dataset 'penerima' atau 'layak' (memakai pengaturan aktif)."""
+    batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', DEFAULT_EXPORT_BATCH_SIZE)
+    if dataset == 'layak':
+        setting = get_settings()
+        return LAYAK_HEADER, iter_layak_rows(setting.passing_grade, setting.kuota, setting.kuota_level, batch_size)
+    return PENERIMA_HEADER, iter_penerima_rows(filters, batch_size)
+
+
+# ===============================
+# 2. Penulis CSV & XLSX
+# ===============================
+def iter_csv(header, rows, flush_rows=CSV_FLUSH_ROWS):
+    """
+    CSV UTF-8 (dengan BOM agar langsung terbaca Excel) sebagai potongan bytes. Header dikirim sebelum
+    query dijalankan sehingga byte pertama keluar seketika; setelah itu satu potongan per flush_rows baris.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % flush_rows == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(header, rows, target, sheet_title='Data'):
+    """Menulis XLSX dengan mode write-only openpyxl: baris langsung ditulis ke berkas sementara, bukan ditahan di memori."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(target)
+
+
+def iter_xlsx(header, rows, sheet_title='Data'):
+    """
+    XLSX sebagai potongan bytes. Format zip baru bisa ditutup setelah baris terakhir, jadi berkas dibangun
+    di berkas sementara (memori tetap) lalu dialirkan per XLSX_READ_CHUNK.
+    """
+    with tempfile.TemporaryFile() as f:
+        write_xlsx(header, rows, f, sheet_title)
+        f.seek(0)
+        while True:
+            chunk = f.read(XLSX_READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_export(dataset, fmt, filters=None):
+    header, rows = export_rows(dataset, filters)
+    if fmt == 'xlsx':
+        return iter_xlsx(header, rows, sheet_title=dataset.capitalize())
+    return iter_csv(header, rows)
+
+
+def export_filename(dataset, fmt):
+    prefix = 'daftar_penerima_layak' if dataset == 'layak' else 'data_penerima'
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}"
+
+
+# ===============================
+# 3. Perintah CLI
+# ===============================
+@penerima_cli.command('export')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--dataset', type=click.Choice(EXPORT_DATASETS), default='penerima', show_default=True,
+              help="'penerima' = seluruh tabel, 'layak' = daftar penerima layak sesuai pengaturan aktif.")
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default=None,
+              help='Default: dari ekstensi berkas.')
+def export_command(path, dataset, fmt):
+    """Ekspor data penerima ke berkas .csv atau .xlsx."""
+    fmt = fmt or ('xlsx' if os.path.splitext(path)[1].lower() == '.xlsx' else 'csv')
+    header, rows = export_rows(dataset)
+    total = 0
+
+    def counted():
+        nonlocal total
+        for row in rows:
+            total += 1
+            yield row
+
+    if fmt == 'xlsx':
+        write_xlsx(header, counted(), path, sheet_title=dataset.capitalize())
+    else:
+        with open(path, 'wb') as f:
+            for chunk in iter_csv(header, counted()):
+                f.write(chunk)
+    click.echo(f"{total} baris diekspor ke {path}.")
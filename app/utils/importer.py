@@ -0,0 +1,242 @@
+import csv
+import io
+import os
+import re
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import insert
+
+from app import db
+from app.database.models import Penerima
+from app.utils.model_handler import BATCH_FEATURE_FIELDS, compute_saw_scores, masks_from_feature_matrix, predict_batch_status
+from app.utils.model_registry import model_registry
+from app.utils.settings_service import get_settings
+from app.utils.versioning import PENERIMA, bump_version
+from app.utils.wilayah import REGION_FIELDS, region_index
+
+DEFAULT_IMPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 500
+
+TEXT_FIELDS = ['nama', 'pekerjaan'] + REGION_FIELDS
+BOOLEAN_FIELDS = BATCH_FEATURE_FIELDS
+
+# Nama kolom berkas (dinormalisasi: huruf kecil, non-alfanumerik -> '_') yang dikenali selain nama field itu sendiri
+COLUMN_ALIASES = {
+    'nama_lengkap': 'nama',
+    'tidak_berkerja': 'tidak_bekerja',
+    'penyakit_menahun_kronis': 'penyakit_kronis',
+    'penyakit_menahun': 'penyakit_kronis',
+    'bansos_pemerintah_lainnya': 'bansos_lainnya',
+    'kabupaten_kota': 'kabupaten',
+    'desa_kelurahan': 'desa',
+    'kelurahan': 'desa',
+}
+
+TRUE_VALUES = {'V', 'YA', 'Y', 'TRUE', 'T', '1', 'X'}
+FALSE_VALUES = {'-', 'TIDAK', 'N', 'FALSE', 'F', '0', ''}
+# Kolom 0/1 di xlsx yang memuat sel kosong dibaca pandas sebagai float: 1.0 -> '1', 0.0 -> '0'
+_ANGKA_BOOLEAN_RE = r'^([01])\.0*$'
+
+
+class ImportReport:
+    """Ringkasan hasil impor: jumlah baris, baris yang masuk, dan galat per baris (dibatasi MAX_REPORTED_ERRORS)."""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.inserted = 0
+        self.scored = 0
+        self.error_count = 0
+        self.errors = []
+        self.warnings = []
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+# ===============================
+# 1. Pembacaan Berkas Secara Streaming
+# ===============================
+def _normalize_header(header):
+    key = re.sub(r'[^a-z0-9]+', '_', str(header or '').strip().lower()).strip('_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def iter_source_rows(stream, filename):
+    """Menghasilkan baris (tuple) dari xlsx (openpyxl read-only) atau csv, baris pertama adalah header."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield row
+        finally:
+            workbook.close()
+    elif extension == '.csv':
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='') if 'b' in getattr(stream, 'mode', 'b') else stream
+        sample = text.read(4096)
+        text.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t') if sample else csv.excel
+        for row in csv.reader(text, dialect):
+            yield row
+    else:
+        raise ValueError(f'Format berkas tidak didukung: {extension or filename}. Gunakan .xlsx atau .csv.')
+
+
+# ===============================
+# 2. Validasi & Koersi per Chunk (Vektorisasi dengan pandas)
+# ===============================
+def _resolve_region_column(frame, field, parent_field, invalid):
+    """Kolom wilayah boleh berisi ID atau nama; nama diterjemahkan ke ID lewat indeks wilayah lokal."""
+    values = frame[field]
+    is_id = values.str.fullmatch(r'\d+')
+    if not region_index.loaded or is_id.all():
+        return values
+    import pandas as pd
+
+    resolved = values.copy()
+    parents = frame[parent_field] if parent_field else pd.Series([None] * len(frame), index=frame.index)
+    for idx in values.index[~is_id]:
+        region_id = region_index.find_id(values[idx], parents[idx])
+        if region_id is None:
+            invalid.setdefault(idx, f"{field.capitalize()} '{values[idx]}' tidak dikenal")
+        else:
+            resolved[idx] = region_id
+    return resolved
+
+
+def coerce_chunk(rows, columns, row_numbers, report):
+    """
+    Mengubah sekumpulan baris mentah menjadi DataFrame bertipe benar. row_numbers = nomor baris asal
+    di berkas untuk setiap baris (dipakai di laporan galat). Baris yang tidak valid dicatat di report
+    dan dibuang. Mengembalikan DataFrame baris valid.
+    """
+    import pandas as pd # Hanya saat impor berjalan; tidak ikut dimuat ketika aplikasi mulai
+
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    frame = frame.reindex(columns=TEXT_FIELDS + BOOLEAN_FIELDS)
+    frame.index = list(row_numbers)
+    invalid = {}
+
+    for field in TEXT_FIELDS:
+        frame[field] = frame[field].fillna('').astype(str).str.strip()
+        for idx in frame.index[frame[field] == '']:
+            invalid.setdefault(idx, f"Kolom '{field}' wajib diisi")
+
+    for field in BOOLEAN_FIELDS:
+        values = frame[field].fillna('').astype(str).str.strip().str.upper().str.replace(_ANGKA_BOOLEAN_RE, r'\1', regex=True)
+        is_true = values.isin(TRUE_VALUES)
+        for idx in frame.index[~(is_true | values.isin(FALSE_VALUES))]:
+            invalid.setdefault(idx, f"Nilai '{frame.at[idx, field]}' pada kolom '{field}' bukan Ya/Tidak")
+        frame[field] = is_true
+
+    parent_field = None
+    for field in REGION_FIELDS:
+        frame[field] = _resolve_region_column(frame, field, parent_field, invalid)
+        parent_field = field
+
+    for idx in sorted(invalid):
+        report.add_error(idx, invalid[idx])
+    return frame.drop(index=list(invalid))
+
+
+# ===============================
+# 3. Pipeline Impor
+# ===============================
+def import_penerima(stream, filename, score=False, chunk_size=DEFAULT_IMPORT_CHUNK_SIZE, logger=None):
+    """
+    Impor data penerima dari xlsx/csv: baca streaming, validasi per chunk, lalu INSERT massal per chunk
+    dalam transaksi tersendiri. Jika score=True, skor SAW dan status KNN langsung dihitung (batch) untuk baris baru.
+    """
+    logger = logger or current_app.logger
+    report = ImportReport()
+    knn_model = model_version = passing_grade = None
+    if score:
+        try:
+            knn_model, model_version = model_registry.get_model(logger)
+        except Exception as e:
+            logger.error(f"Gagal memuat model KNN: {e}")
+        passing_grade = get_settings().passing_grade
+    if score and knn_model is None:
+        report.warnings.append('Model KNN belum tersedia; baris baru tidak diberi skor.')
+    if not region_index.loaded:
+        report.warnings.append('Data wilayah lokal belum tersedia; kolom wilayah disimpan apa adanya.')
+
+    rows_iter = iter_source_rows(stream, filename)
+    header = next(rows_iter, None)
+    if header is None:
+        return report
+    columns = [_normalize_header(h) for h in header]
+    missing = [field for field in TEXT_FIELDS + BOOLEAN_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"Kolom berikut tidak ditemukan di berkas: {', '.join(missing)}")
+
+    def flush(chunk, row_numbers):
+        frame = coerce_chunk(chunk, columns, row_numbers, report)
+        if frame.empty:
+            return
+        # INSERT massal tidak memicu event ORM, jadi kolom denormalisasi diisi di sini
+        feature_matrix = frame[BOOLEAN_FIELDS].to_numpy(dtype=bool)
+        frame['kriteria_mask'] = masks_from_feature_matrix(feature_matrix)
+        frame['skor_saw_aktual'] = compute_saw_scores(feature_matrix)[0]
+        if knn_model is not None:
+            skor_saw, status_knn = predict_batch_status(feature_matrix, knn_model, logger)
+            frame['skor_saw_ternormalisasi'] = skor_saw
+            frame['status_kelayakan_knn'] = status_knn
+            # Dicatat seperti prediksi massal, agar prediksi massal inkremental berikutnya tidak menilai ulang baris ini
+            frame['perlu_dinilai_ulang'] = False
+            frame['skor_model_versi'] = model_version
+            frame['skor_passing_grade'] = passing_grade
+            report.scored += len(frame)
+        records = frame.replace({np.nan: None}).to_dict('records')
+        db.session.execute(insert(Penerima), records)
+        bump_version(PENERIMA)
+        db.session.commit()
+        report.inserted += len(records)
+
+    chunk = []
+    row_numbers = []
+    for row_number, row in enumerate(rows_iter, 2): # Baris 1 adalah header
+        if not any(value not in (None, '') for value in row):
+            continue
+        report.total_rows += 1
+        row = tuple(row)[:len(columns)]
+        chunk.append(row + (None,) * (len(columns) - len(row))) # xlsx read-only membuang sel kosong di ujung baris
+        row_numbers.append(row_number)
+        if len(chunk) >= chunk_size:
+            flush(chunk, row_numbers)
+            chunk = []
+            row_numbers = []
+    if chunk:
+        flush(chunk, row_numbers)
+
+    logger.info(f"Impor {filename}: {report.inserted}/{report.total_rows} baris masuk, {report.error_count} galat.")
+    return report
+
+
+# ===============================
+# 4. Perintah CLI
+# ===============================
+penerima_cli = AppGroup('penerima', help='Kelola data penerima.')
+
+
+@penerima_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--score/--no-score', default=False, help='Langsung hitung skor SAW dan status KNN untuk baris baru.')
+@click.option('--chunk-size', default=DEFAULT_IMPORT_CHUNK_SIZE, show_default=True, help='Jumlah baris per transaksi.')
+def import_command(path, score, chunk_size):
+    """Impor data penerima dari berkas .xlsx atau .csv."""
+    with open(path, 'rb') as f:
+        report = import_penerima(f, path, score=score, chunk_size=chunk_size)
+    for warning in report.warnings:
+        click.echo(f"Peringatan: {warning}")
+    for row_number, message in report.errors:
+        click.echo(f"Baris {row_number}: {message}")
+    if report.error_count > len(report.errors):
+        click.echo(f"... dan {report.error_count - len(report.errors)} galat lainnya")
+    click.echo(f"{report.inserted} dari {report.total_rows} baris berhasil diimpor ({report.scored} diberi skor).")
@@ -0,0 +1,219 @@
+import time
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from app.database.models import Penerima
+from app.utils.compiled_model import all_feature_patterns, compile_model
+from app.utils.model_handler import KNN_FEATURE_FIELDS
+from app.utils.model_registry import model_registry
+from app.utils.settings_service import get_settings
+
+# Ruang pencarian hyperparameter. Untuk fitur biner, jarak euclidean/manhattan/hamming menghasilkan urutan
+# tetangga yang sama, jadi cukup dibandingkan dengan jaccard yang memang berbeda.
+KNN_SEARCH_NEIGHBORS = [3, 5, 7, 9, 11, 15]
+KNN_SEARCH_METRICS = ['euclidean', 'jaccard']
+DEFAULT_TRAIN_CHUNK_SIZE = 50000
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+N_CODES = 1 << len(KNN_FEATURE_FIELDS)
+
+
+# ===============================
+# 1. Pembacaan Data Latih (proyeksi kolom, per chunk)
+# ===============================
+def load_training_counts(session, passing_grade, chunk_size=DEFAULT_TRAIN_CHUNK_SIZE, progress_callback=None):
+    """
+    Membaca hanya (id, kriteria_mask, skor) per chunk keyset dan langsung mengakumulasikannya menjadi
+    jumlah baris per (kode fitur KNN, label). Memori tetap 2 x 1.024 angka berapa pun ukuran tabel.
+    Mengembalikan array counts berukuran (1024, 2): counts[kode, label].
+    """
+    total = session.execute(select(Penerima.id).order_by(Penerima.id.desc()).limit(1)).scalar() or 0
+    counts = np.zeros((N_CODES, 2), dtype=np.int64)
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(Penerima.id, Penerima.kriteria_mask, Penerima.skor_saw_ternormalisasi)
+            .where(Penerima.id > last_id).order_by(Penerima.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        ids, masks, skor = zip(*rows)
+        codes = np.asarray(masks, dtype=np.int64) >> 1 # Bit 0 (DTKS) bukan fitur KNN
+        skor = np.asarray([s if s is not None else np.nan for s in skor], dtype=float)
+        labels = (skor >= passing_grade).astype(np.int64) # Belum diprediksi (NaN) -> 0
+        counts += np.bincount(codes * 2 + labels, minlength=N_CODES * 2).reshape(N_CODES, 2)
+        last_id = ids[-1]
+        if progress_callback:
+            progress_callback(last_id, total)
+    return counts
+
+
+def split_counts(counts, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Pembagian latih/uji per baris, dilakukan langsung pada tabel jumlah (sampling binomial per sel)."""
+    rng = np.random.default_rng(random_state)
+    test_counts = rng.binomial(counts, test_size)
+    return counts - test_counts, test_counts
+
+
+def fold_counts(counts, n_folds, random_state=RANDOM_STATE):
+    """Membagi setiap baris ke salah satu dari n_folds lipatan secara acak. Mengembalikan array (n_folds, 1024, 2)."""
+    rng = np.random.default_rng(random_state)
+    folds = rng.multinomial(counts, [1 / n_folds] * n_folds)
+    return np.moveaxis(folds, -1, 0)
+
+
+def expand_counts(counts, max_copies):
+    """
+    Deduplikasi: setiap profil (kode) diwakili paling banyak sekitar `max_copies` baris identik, dengan
+    perbandingan label yang dipertahankan. KNeighborsClassifier tidak menerima sample_weight, dan lebih dari
+    k salinan titik yang sama tidak pernah bisa ikut memilih sekaligus, sehingga salinan selebihnya hanya memperlambat.
+    Bobot sebenarnya (jumlah baris) dipakai saat menghitung akurasi.
+    """
+    totals = counts.sum(axis=1, keepdims=True)
+    scale = np.minimum(1.0, max_copies / np.maximum(totals, 1))
+    repeats = np.rint(counts * scale).astype(np.int64)
+    repeats[(counts > 0) & (repeats == 0)] = 1 # Label minoritas tetap terwakili
+    codes, labels = np.nonzero(repeats)
+    reps = repeats[codes, labels]
+    patterns = all_feature_patterns(len(KNN_FEATURE_FIELDS))
+    return np.repeat(patterns[codes], reps, axis=0), np.repeat(labels, reps)
+
+
+# ===============================
+# 2. Pencarian Hyperparameter & Evaluasi
+# ===============================
+def weighted_scores(model, counts):
+    """
+    Akurasi dan confusion matrix berbobot jumlah baris. Model cukup memprediksi sekali per kode
+    (maksimal 1.024 titik), bukan sekali per baris data.
+    """
+    from sklearn.metrics import accuracy_score, confusion_matrix
+
+    codes, labels = np.nonzero(counts)
+    if len(codes) == 0:
+        return None, None
+    predicted = compile_model(model).predict_codes(codes)
+    weights = counts[codes, labels]
+    accuracy = accuracy_score(labels, predicted, sample_weight=weights)
+    matrix = confusion_matrix(labels, predicted, labels=[0, 1], sample_weight=weights)
+    return float(accuracy), matrix.astype(np.int64).tolist()
+
+
+def _fit_knn(counts, params):
+    """Melatih KNeighborsClassifier pada counts yang sudah dideduplikasi. Mengembalikan (model, label latih)."""
+    from sklearn.neighbors import KNeighborsClassifier
+
+    X, y = expand_counts(counts, max(KNN_SEARCH_NEIGHBORS))
+    knn = KNeighborsClassifier(algorithm='brute', **params)
+    knn.fit(X, y)
+    return knn, y
+
+
+def _score_fold(folds, fold_index, metric):
+    """
+    Akurasi validasi satu lipatan untuk semua k sekaligus: tetangga dicari sekali dengan k terbesar,
+    lalu suara mayoritas k pertama dihitung kumulatif (k pada grid ganjil, label biner).
+    """
+    validation = folds[fold_index]
+    train = folds.sum(axis=0) - validation
+    neighbors = [k for k in KNN_SEARCH_NEIGHBORS if k <= train.sum()]
+    codes, labels = np.nonzero(validation)
+    if not neighbors or len(codes) == 0:
+        return [None] * len(KNN_SEARCH_NEIGHBORS)
+    knn, y_train = _fit_knn(train, {'n_neighbors': max(neighbors), 'metric': metric})
+    patterns = all_feature_patterns(len(KNN_FEATURE_FIELDS))
+    _, neighbor_index = knn.kneighbors(patterns[codes])
+    votes = np.cumsum(y_train[neighbor_index], axis=1) # Jumlah tetangga berlabel 1 di antara k pertama
+    weights = validation[codes, labels]
+    scores = []
+    for k in KNN_SEARCH_NEIGHBORS:
+        if k not in neighbors:
+            scores.append(None)
+            continue
+        predicted = (votes[:, k - 1] * 2 > k).astype(np.int64)
+        scores.append(float(np.average(predicted == labels, weights=weights)))
+    return scores
+
+
+def search_knn(counts, n_jobs=None, cv_folds=5):
+    """
+    Validasi silang paralel (joblib, n_jobs) atas k dan metrik jarak, langsung pada tabel jumlah.
+    Mengembalikan (model terbaik dilatih pada seluruh counts, best_params, akurasi CV rata-rata).
+    """
+    from joblib import Parallel, delayed
+
+    if (counts.sum(axis=0) < cv_folds).any():
+        # Hanya satu kelas (atau hampir): validasi silang tidak bermakna, pakai konfigurasi bawaan
+        params = {'n_neighbors': int(min(3, counts.sum())), 'metric': 'minkowski'}
+        return _fit_knn(counts, params)[0], params, None
+
+    folds = fold_counts(counts, cv_folds)
+    tasks = [(metric, fold_index) for metric in KNN_SEARCH_METRICS for fold_index in range(cv_folds)]
+    results = Parallel(n_jobs=n_jobs)(delayed(_score_fold)(folds, fold_index, metric) for metric, fold_index in tasks)
+
+    best_params, best_score = None, -1.0
+    for metric in KNN_SEARCH_METRICS:
+        per_fold = [scores for (task_metric, _), scores in zip(tasks, results) if task_metric == metric]
+        for position, k in enumerate(KNN_SEARCH_NEIGHBORS):
+            fold_scores = [scores[position] for scores in per_fold if scores[position] is not None]
+            if fold_scores and np.mean(fold_scores) > best_score: # Seri: k terkecil / metrik pertama menang
+                best_params, best_score = {'n_neighbors': k, 'metric': metric}, float(np.mean(fold_scores))
+    if best_params is None:
+        best_params, best_score = {'n_neighbors': 3, 'metric': 'minkowski'}, None
+    return _fit_knn(counts, best_params)[0], best_params, best_score
+
+
+# ===============================
+# 3. Pipeline Pelatihan
+# ===============================
+def train_and_publish(session, progress_callback=None):
+    """
+    Melatih model KNN dari data penerima lalu menerbitkannya sebagai versi baru di registry,
+    beserta metrik (akurasi, confusion matrix, parameter terbaik, waktu latih). Mengembalikan metrik, atau None jika tidak ada data.
+    """
+    from app.utils.kriteria_mask import backfill_kriteria_mask
+
+    config = current_app.config
+    logger = current_app.logger
+    started = time.perf_counter()
+
+    passing_grade = get_settings().passing_grade
+
+    backfill_kriteria_mask(session)
+    counts = load_training_counts(session, passing_grade, config.get('TRAIN_CHUNK_SIZE', DEFAULT_TRAIN_CHUNK_SIZE), progress_callback)
+    total_rows = int(counts.sum())
+    if total_rows == 0:
+        logger.warning("Tidak ada data penerima untuk melatih model KNN.")
+        return None
+    if (counts.sum(axis=0) == 0).any():
+        logger.warning("Hanya ada satu kelas di data target. Model KNN mungkin tidak dapat dilatih dengan baik atau akan sangat bias. "
+                       "Pastikan data pelatihan memiliki variasi yang cukup dalam status kelayakan (Layak/Tidak Layak).")
+
+    train_counts, test_counts = split_counts(counts)
+    if train_counts.sum() == 0:
+        train_counts = test_counts = counts
+    unique_profiles = int(np.count_nonzero(counts.sum(axis=1)))
+    logger.info(f"Data latih: {total_rows} baris, {unique_profiles} profil kriteria unik.")
+
+    knn, best_params, cv_score = search_knn(train_counts, n_jobs=config.get('TRAIN_N_JOBS', -1))
+    accuracy, matrix = weighted_scores(knn, test_counts)
+    train_seconds = round(time.perf_counter() - started, 3)
+    logger.info(f"Model KNN dilatih dengan akurasi: {accuracy} (parameter {best_params}, {train_seconds} detik)")
+
+    metrics = {
+        'accuracy': accuracy,
+        'confusion_matrix': matrix, # [[TN, FP], [FN, TP]], label 1 = Layak
+        'cv_accuracy': cv_score,
+        'best_params': best_params,
+        'passing_grade': passing_grade,
+        'rows': total_rows,
+        'unique_profiles': unique_profiles,
+        'train_rows': int(knn.n_samples_fit_), # Setelah deduplikasi
+        'train_seconds': train_seconds,
+    }
+    # Diterbitkan sebagai versi baru; proses lain beralih ke model ini pada request berikutnya
+    metrics['version'] = model_registry.publish(knn, metrics, logger=logger)
+    return metrics
@@ -0,0 +1,132 @@
+import click
+from sqlalchemy import case, event, func, select, update
+
+from app import db
+from app.database.models import Penerima
+from app.utils.importer import penerima_cli
+from app.utils.model_handler import BATCH_FEATURE_FIELDS, SAW_WEIGHTS, feature_matrix_from_masks
+
+DEFAULT_BACKFILL_CHUNK_SIZE = 50000
+
+# Bit tiap kriteria pada Penerima.kriteria_mask
+KRITERIA_BIT = {field: 1 << index for index, field in enumerate(BATCH_FEATURE_FIELDS)}
+
+
+# ===============================
+# 1. Rumus Mask & Skor Mentah (Python dan SQL)
+# ===============================
+def kriteria_mask_of(penerima):
+    """Bitmask kriteria dari objek Penerima (atau objek lain dengan atribut kriteria yang sama)."""
+    return sum(bit for field, bit in KRITERIA_BIT.items() if getattr(penerima, field))
+
+
+def skor_saw_aktual_of(penerima):
+    skor = sum(int(weight) for field, weight in zip(BATCH_FEATURE_FIELDS, SAW_WEIGHTS) if getattr(penerima, field))
+    return max(0, skor)
+
+
+def kriteria_mask_sql():
+    """Ekspresi SQL yang menghitung bitmask dari kolom-kolom Boolean (untuk backfill dalam satu UPDATE)."""
+    return sum(case((getattr(Penerima, field), bit), else_=0) for field, bit in KRITERIA_BIT.items())
+
+
+def skor_saw_aktual_sql():
+    skor = sum(case((getattr(Penerima, field), int(weight)), else_=0) for field, weight in zip(BATCH_FEATURE_FIELDS, SAW_WEIGHTS))
+    return case((skor < 0, 0), else_=skor)
+
+
+# ===============================
+# 2. Sinkronisasi Otomatis (Event ORM)
+# ===============================
+def _sync_kriteria_mask(mapper, connection, target):
+    mask = kriteria_mask_of(target)
+    if mask != target.kriteria_mask:
+        target.perlu_dinilai_ulang = True # Kriteria berubah: skor lama tidak berlaku lagi
+    target.kriteria_mask = mask
+    target.skor_saw_aktual = skor_saw_aktual_of(target)
+
+
+def init_kriteria_mask():
+    """
+    Setiap insert/update Penerima lewat ORM mengisi ulang kriteria_mask dan skor_saw_aktual,
+    dan menandai baris perlu dinilai ulang jika kriterianya berubah.
+    INSERT/UPDATE massal (impor, prediksi massal) tidak memicu event ini dan mengisi kolomnya sendiri.
+    """
+    for event_name in ('before_insert', 'before_update'):
+        if not event.contains(Penerima, event_name, _sync_kriteria_mask):
+            event.listen(Penerima, event_name, _sync_kriteria_mask)
+
+
+def backfill_kriteria_mask(session=None, only_missing=True, chunk_size=DEFAULT_BACKFILL_CHUNK_SIZE):
+    """Mengisi kolom mask dan skor mentah dengan UPDATE berbasis SQL per rentang id. Mengembalikan jumlah baris."""
+    session = session or db.session
+    max_id = session.execute(select(func.max(Penerima.id))).scalar() or 0
+    updated = 0
+    for after_id in range(0, max_id, chunk_size):
+        query = update(Penerima).where(Penerima.id > after_id, Penerima.id <= after_id + chunk_size)
+        if only_missing:
+            query = query.where(Penerima.kriteria_mask.is_(None))
+        result = session.execute(
+            query.values(kriteria_mask=kriteria_mask_sql(), skor_saw_aktual=skor_saw_aktual_sql()),
+            execution_options={'synchronize_session': False}
+        )
+        updated += result.rowcount
+        session.commit()
+    return updated
+
+
+# ===============================
+# 3. Analitik Profil Kriteria
+# ===============================
+def profile_mask(fields):
+    return sum(KRITERIA_BIT[field] for field in fields)
+
+
+def count_profile(required=(), excluded=(), session=None):
+    """Jumlah rumah tangga yang memenuhi semua kriteria `required` dan tidak satu pun kriteria `excluded`."""
+    session = session or db.session
+    required_mask = profile_mask(required)
+    excluded_mask = profile_mask(excluded)
+    return session.execute(
+        select(func.count(Penerima.id)).where(
+            Penerima.kriteria_mask.op('&')(required_mask) == required_mask,
+            Penerima.kriteria_mask.op('&')(excluded_mask) == 0
+        )
+    ).scalar()
+
+
+def mask_distribution(session=None):
+    """
+    Distribusi profil kriteria (GROUP BY kriteria_mask): list dict berisi mask, jumlah rumah tangga,
+    dan kriteria yang terpenuhi. Paling banyak 2.048 baris berapa pun ukuran tabel.
+    """
+    session = session or db.session
+    rows = session.execute(
+        select(Penerima.kriteria_mask, func.count(Penerima.id))
+        .where(Penerima.kriteria_mask.is_not(None))
+        .group_by(Penerima.kriteria_mask)
+        .order_by(func.count(Penerima.id).desc())
+    ).all()
+    if not rows:
+        return []
+    feature_matrix = feature_matrix_from_masks([mask for mask, _ in rows])
+    return [
+        {
+            'mask': mask,
+            'jumlah': jumlah,
+            'kriteria': [field for field, present in zip(BATCH_FEATURE_FIELDS, features) if present],
+        }
+        for (mask, jumlah), features in zip(rows, feature_matrix.tolist())
+    ]
+
+
+# ===============================
+# 4. Perintah CLI
+# ===============================
+@penerima_cli.command('backfill-mask')
+@click.option('--all', 'recompute_all', is_flag=True, help='Hitung ulang semua baris, bukan hanya yang masih kosong.')
+@click.option('--chunk-size', default=DEFAULT_BACKFILL_CHUNK_SIZE, show_default=True)
+def backfill_mask_command(recompute_all, chunk_size):
+    """Isi kolom kriteria_mask dan skor_saw_aktual untuk data yang sudah ada."""
+    updated = backfill_kriteria_mask(only_missing=not recompute_all, chunk_size=chunk_size)
+    click.echo(f"{updated} baris diperbarui.")
@@ -0,0 +1,84 @@
+import numpy as np
+from sqlalchemy import func, or_, select, update
+
+from app.database.models import Penerima
+from app.utils.versioning import PENERIMA, bump_version
+from app.utils.model_handler import feature_matrix_from_masks, predict_batch_status
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+# ===============================
+# 0. Penandaan Baris yang Perlu Dinilai Ulang
+# ===============================
+def mark_for_rescoring(session, model_version, passing_grade, full=False):
+    """
+    Menandai baris yang skornya tidak lagi berlaku: dinilai dengan versi model atau passing grade lain
+    (atau semua baris jika full=True). Baris yang kriterianya berubah sudah ditandai oleh event ORM.
+    Mengembalikan jumlah baris yang perlu dinilai ulang.
+    """
+    query = update(Penerima).where(Penerima.perlu_dinilai_ulang.is_(False))
+    if not full:
+        query = query.where(or_(
+            Penerima.skor_model_versi.is_(None),
+            Penerima.skor_model_versi != model_version,
+            Penerima.skor_passing_grade.is_(None),
+            Penerima.skor_passing_grade != passing_grade,
+        ))
+    session.execute(query.values(perlu_dinilai_ulang=True), execution_options={'synchronize_session': False})
+    session.commit()
+    return count_dirty(session)
+
+
+def count_dirty(session):
+    return session.execute(select(func.count(Penerima.id)).where(Penerima.perlu_dinilai_ulang.is_(True))).scalar()
+
+
+def _score_stamp(model_version, passing_grade):
+    """Kolom yang ikut ditulis bersama skor: menandai baris bersih dan mencatat asal skornya."""
+    return {'perlu_dinilai_ulang': False, 'skor_model_versi': model_version, 'skor_passing_grade': passing_grade}
+
+
+# ===============================
+# 1. Prediksi Massal per Profil Kriteria (GROUP BY kriteria_mask)
+# ===============================
+def run_mass_prediction_by_mask(session, knn_model, logger, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None,
+                                model_version=None, passing_grade=None):
+    """
+    Baris dengan kriteria_mask yang sama pasti mendapat skor dan status yang sama, jadi cukup menilai
+    mask berbeda di antara baris kotor (maksimal 2.048) lalu menjalankan satu UPDATE ... WHERE kriteria_mask = m per mask.
+    Commit dilakukan setiap kurang lebih chunk_size baris. Mengembalikan jumlah baris yang diproses.
+    """
+    from app.utils.kriteria_mask import backfill_kriteria_mask
+
+    backfill_kriteria_mask(session)
+    groups = session.execute(
+        select(Penerima.kriteria_mask, func.count(Penerima.id))
+        .where(Penerima.perlu_dinilai_ulang.is_(True))
+        .group_by(Penerima.kriteria_mask)
+    ).all()
+    total = sum(count for _, count in groups)
+    if not groups:
+        return 0
+    masks = [mask for mask, _ in groups]
+    skor_saw, status_knn = predict_batch_status(feature_matrix_from_masks(masks), knn_model, logger)
+    logger.info(f"Prediksi massal per mask: {total} baris, {len(masks)} profil kriteria berbeda.")
+
+    stamp = _score_stamp(model_version, passing_grade)
+    processed = 0
+    uncommitted = 0
+    for (mask, count), skor, status in zip(groups, np.asarray(skor_saw, dtype=float).tolist(), list(status_knn)):
+        session.execute(
+            update(Penerima).where(Penerima.kriteria_mask == mask, Penerima.perlu_dinilai_ulang.is_(True))
+            .values(skor_saw_ternormalisasi=skor, status_kelayakan_knn=status, **stamp),
+            execution_options={'synchronize_session': False}
+        )
+        processed += count
+        uncommitted += count
+        if uncommitted >= chunk_size or processed == total:
+            bump_version(PENERIMA, session)
+            session.commit()
+            uncommitted = 0
+            if progress_callback:
+                progress_callback(processed, total)
+    return processed
@@ -0,0 +1,301 @@
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+PROFILE_HEADER = 'X-Profile'
+PROFILE_TOP_N = 40
+
+
+# ===============================
+# 1. Counter & Histogram (format teks Prometheus)
+# ===============================
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f'{self.name}{_label_text(self.labelnames, key)} {value}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {} # key -> [jumlah per bucket..., jumlah total, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                yield f'{self.name}_bucket{_label_text(self.labelnames, key, [("le", bound)])} {count}'
+            yield f'{self.name}_bucket{_label_text(self.labelnames, key, [("le", "+Inf")])} {state[-2]}'
+            yield f'{self.name}_count{_label_text(self.labelnames, key)} {state[-2]}'
+            yield f'{self.name}_sum{_label_text(self.labelnames, key)} {state[-1]}'
+
+
+class MetricsRegistry:
+    """Metrik per proses. Dengan beberapa proses web, setiap scrape /metrics membaca proses yang melayaninya."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return lines
+
+
+registry = MetricsRegistry()
+REQUESTS = registry.counter('bansos_http_requests_total', 'Jumlah request per endpoint dan status.', ('endpoint', 'method', 'status'))
+REQUEST_LATENCY = registry.histogram('bansos_http_request_duration_seconds', 'Latensi request per endpoint (respons streaming: sampai byte pertama).', ('endpoint', 'method'))
+REQUEST_SQL_QUERIES = registry.histogram('bansos_http_request_sql_queries', 'Jumlah query SQL per request.', ('endpoint',), SQL_COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = registry.histogram('bansos_http_request_sql_seconds', 'Total waktu query SQL per request.', ('endpoint',))
+SQL_QUERIES = registry.counter('bansos_sql_queries_total', 'Query SQL yang dijalankan proses ini (request, job, CLI).')
+SQL_SECONDS = registry.counter('bansos_sql_query_seconds_total', 'Total waktu query SQL proses ini.')
+OPERATION_LATENCY = registry.histogram('bansos_operation_duration_seconds', 'Waktu operasi internal: prediksi model, resolusi wilayah, render PDF.', ('operation',))
+
+
+@contextmanager
+def timed(operation):
+    """Mengukur waktu sebuah blok ke bansos_operation_duration_seconds. Bisa dipakai sebagai `with` maupun dekorator."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        OPERATION_LATENCY.observe(time.perf_counter() - started, operation=operation)
+
+
+# ===============================
+# 2. Query SQL (event engine)
+# ===============================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    SQL_QUERIES.inc()
+    SQL_SECONDS.inc(elapsed)
+    if has_request_context() and '_metrics_started' in g:
+        g._sql_queries += 1
+        g._sql_seconds += elapsed
+
+
+def install_sql_events():
+    """Dipasang di kelas Engine agar engine utama, engine baca-saja, dan engine shard ikut terukur."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# ===============================
+# 3. Hook Request & Profiling Admin
+# ===============================
+def _is_admin():
+    from flask_login import current_user
+
+    return current_user.is_authenticated and getattr(current_user, 'role', None) == 'admin'
+
+
+def _profiling_requested():
+    if not current_app.config.get('PROFILING_ENABLED') or not request.headers.get(PROFILE_HEADER):
+        return False
+    return _is_admin()
+
+
+def _server_timing_allowed():
+    """Server-Timing membuka jumlah query dan waktu DB; hanya untuk admin, kecuali SERVER_TIMING_ENABLED."""
+    return current_app.config.get('SERVER_TIMING_ENABLED') or _is_admin()
+
+
+def _start_profiler():
+    if request.headers.get(PROFILE_HEADER, '').lower() == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return 'pyinstrument', profiler
+        except ImportError:
+            pass
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return 'cprofile', profiler
+
+
+def _profile_response(kind, profiler, response):
+    """Mengganti isi respons dengan laporan profil; dump mentah cProfile disimpan di PROFILE_DIR untuk snakeviz dkk."""
+    import io
+    import pstats
+
+    if kind == 'pyinstrument':
+        profiler.stop()
+        response.set_data(profiler.output_text(unicode=True))
+    else:
+        profiler.disable()
+        profile_dir = current_app.config.get('PROFILE_DIR') or os.path.join(current_app.instance_path, 'profiles')
+        os.makedirs(profile_dir, exist_ok=True)
+        filename = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{request.endpoint or 'unknown'}.prof"
+        profiler.dump_stats(os.path.join(profile_dir, filename))
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        response.set_data(output.getvalue())
+        response.headers['X-Profile-File'] = filename
+    response.mimetype = 'text/plain'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _before_request():
+    g._metrics_started = time.perf_counter()
+    g._sql_queries = 0
+    g._sql_seconds = 0.0
+    if _profiling_requested():
+        g._profiler = _start_profiler()
+
+
+def _after_request(response):
+    started = g.pop('_metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    REQUEST_LATENCY.observe(elapsed, endpoint=endpoint, method=request.method)
+    REQUEST_SQL_QUERIES.observe(g._sql_queries, endpoint=endpoint)
+    REQUEST_SQL_SECONDS.observe(g._sql_seconds, endpoint=endpoint)
+    if _server_timing_allowed():
+        response.headers['Server-Timing'] = f'app;dur={elapsed * 1000:.1f}, db;dur={g._sql_seconds * 1000:.1f};desc="{g._sql_queries} query"'
+
+    profiler = g.pop('_profiler', None)
+    if profiler is not None:
+        response = _profile_response(*profiler, response)
+    return response
+
+
+def init_metrics(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    install_sql_events()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.extensions['metrics'] = registry
+
+
+# ===============================
+# 4. Endpoint /metrics
+# ===============================
+def metrics_allowed(req):
+    """
+    Hanya pembawa METRICS_TOKEN, atau alamat yang eksplisit didaftarkan di METRICS_ALLOWED_IPS (default kosong).
+    Tanpa keduanya /metrics tertutup: di belakang reverse proxy semua request datang dari localhost.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and hmac.compare_digest(req.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    allowed = current_app.config.get('METRICS_ALLOWED_IPS') or ''
+    return req.remote_addr in {address.strip() for address in allowed.split(',') if address.strip()}
+
+
+def _job_lines():
+    """Throughput job dibaca dari tabel Job, karena job berjalan di proses worker yang tidak di-scrape."""
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from app import db
+    from app.database.models import Job
+
+    try:
+        counts = db.session.execute(
+            select(Job.job_type, Job.status, func.count()).group_by(Job.job_type, Job.status)
+        ).all()
+        latest_ids = select(func.max(Job.id)).where(Job.status == 'completed').group_by(Job.job_type)
+        latest = db.session.execute(
+            select(Job.job_type, Job.processed, Job.started_at, Job.finished_at).where(Job.id.in_(latest_ids))
+        ).all()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return []
+
+    lines = ['# HELP bansos_jobs Jumlah job per jenis dan status.', '# TYPE bansos_jobs gauge']
+    lines += [f'bansos_jobs{_label_text(("job_type", "status"), (job_type, status))} {count}' for job_type, status, count in counts]
+    lines += ['# HELP bansos_job_last_duration_seconds Durasi job terakhir yang selesai.', '# TYPE bansos_job_last_duration_seconds gauge']
+    throughput = ['# HELP bansos_job_last_rows_per_second Baris per detik pada job terakhir yang selesai.', '# TYPE bansos_job_last_rows_per_second gauge']
+    for job_type, processed, started_at, finished_at in latest:
+        if started_at is None or finished_at is None:
+            continue
+        seconds = max((finished_at - started_at).total_seconds(), 1e-6)
+        labels = _label_text(('job_type',), (job_type,))
+        lines.append(f'bansos_job_last_duration_seconds{labels} {seconds}')
+        throughput.append(f'bansos_job_last_rows_per_second{labels} {processed / seconds:.1f}')
+    return lines + throughput
+
+
+def render_metrics():
+    return '\n'.join(registry.render() + _job_lines()) + '\n'
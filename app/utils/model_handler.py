@@ -1,9 +1,9 @@
 import numpy as np
-import joblib
-import os
-import requests
 from flask import current_app
 from datetime import datetime
+from app.utils.metrics import timed
+from app.utils.model_registry import model_registry
+from app.utils.wilayah import resolve_region_names
 
 # ===============================
 # 0. Konfigurasi Global & Kriteria
@@ -18,37 +18,24 @@ PENGURANG_KRITERIA_FIELDS = [
     'pkh', 'kartu_pra_kerja', 'bst', 'bansos_lainnya'
 ]
 
-APP_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-MODEL_PATH = os.path.join(APP_ROOT_DIR, 'models', 'knn_model.pkl')
+# Urutan kolom fitur untuk KNN dan matriks batch (DTKS di kolom pertama, lalu fitur KNN)
+KNN_FEATURE_FIELDS = PENAMBAH_KRITERIA_FIELDS + PENGURANG_KRITERIA_FIELDS
+BATCH_FEATURE_FIELDS = ['dtks'] + KNN_FEATURE_FIELDS
 
-API_WILAYAH_BASE_URL = "https://www.emsifa.com/api-wilayah-indonesia/api/"
-
-_region_name_cache = {}
-
-def _get_region_name(region_id, endpoint, logger):
-    if not region_id:
-        return None
-    # Check cache first
-    if endpoint in _region_name_cache and region_id in _region_name_cache[endpoint]:
-        return _region_name_cache[endpoint][region_id]
-    
-    try:
-        response = requests.get(f"{API_WILAYAH_BASE_URL}{endpoint}")
-        response.raise_for_status()
-        data = response.json()
-        # Populate cache for the entire endpoint
-        if endpoint not in _region_name_cache:
-            _region_name_cache[endpoint] = {str(item['id']): item['name'] for item in data}
-        
-        return _region_name_cache[endpoint].get(str(region_id))
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching region data from {endpoint} for ID {region_id}: {e}")
-    return "Tidak Diketahui"
+# Bobot SAW per kolom BATCH_FEATURE_FIELDS: DTKS +10, penambah +1, pengurang -1
+BOBOT_DTKS = 10
+SAW_WEIGHTS = np.array(
+    [BOBOT_DTKS] + [1] * len(PENAMBAH_KRITERIA_FIELDS) + [-1] * len(PENGURANG_KRITERIA_FIELDS),
+    dtype=np.int64
+)
+MAX_TOTAL_NILAI_GLOBAL = BOBOT_DTKS + len(PENAMBAH_KRITERIA_FIELDS)
+# Bobot bit tiap kriteria pada kolom Penerima.kriteria_mask (urutan BATCH_FEATURE_FIELDS)
+KRITERIA_MASK_BITS = np.left_shift(1, np.arange(len(BATCH_FEATURE_FIELDS), dtype=np.int64))
 
 # ===============================
 # 1. Fungsi Prediksi Individu (Hybrid: SAW Score + KNN Prediction)
 # ===============================
+@timed('model_predict_individual')
 def predict_individual_status(penerima_obj, knn_model, passing_grade, logger):
     # --- SAW Score Calculation ---
     skor_individu = 0
@@ -56,7 +43,7 @@ def predict_individual_status(penerima_obj, knn_model, passing_grade, logger):
     alasan_pengurang = []
 
     if penerima_obj.dtks:
-        skor_individu += 10
+        skor_individu += BOBOT_DTKS
         alasan_penambah.append("DTKS")
 
     for field_name in PENAMBAH_KRITERIA_FIELDS:
@@ -72,9 +59,8 @@ def predict_individual_status(penerima_obj, knn_model, passing_grade, logger):
     skor_individu = max(0, skor_individu)
 
     # --- KNN Prediction ---
-    features_for_knn = PENAMBAH_KRITERIA_FIELDS + PENGURANG_KRITERIA_FIELDS
-    X_individual_list = [1 if getattr(penerima_obj, field) else 0 for field in features_for_knn]
-    X_individual = np.array(X_individual_list).reshape(1, -1)
+    X_individual_list = [bool(getattr(penerima_obj, field)) for field in KNN_FEATURE_FIELDS]
+    X_individual = np.array(X_individual_list, dtype=bool).reshape(1, -1) # bool: metrik jaccard tanpa konversi
 
     if knn_model is None:
         knn_prediction = "Model KNN belum dilatih"
@@ -93,20 +79,16 @@ def predict_individual_status(penerima_obj, knn_model, passing_grade, logger):
         "Faktor Pengurang Skor": alasan_pengurang,
     }
 
-    max_total_nilai_global = 10 + len(PENAMBAH_KRITERIA_FIELDS)
-    skor_saw_individu = skor_individu / max_total_nilai_global if max_total_nilai_global != 0 else 0.0
+    skor_saw_individu = skor_individu / MAX_TOTAL_NILAI_GLOBAL if MAX_TOTAL_NILAI_GLOBAL != 0 else 0.0
 
-    provinsi_name = _get_region_name(penerima_obj.provinsi, 'provinces.json', logger)
-    kabupaten_name = _get_region_name(penerima_obj.kabupaten, f'regencies/{penerima_obj.provinsi}.json', logger)
-    kecamatan_name = _get_region_name(penerima_obj.kecamatan, f'districts/{penerima_obj.kabupaten}.json', logger)
-    desa_name = _get_region_name(penerima_obj.desa, f'villages/{penerima_obj.kecamatan}.json', logger)
+    region_names = resolve_region_names([penerima_obj])[0]
 
     return {
         "nama": penerima_obj.nama,
-        "provinsi": provinsi_name if provinsi_name else penerima_obj.provinsi,
-        "kabupaten": kabupaten_name if kabupaten_name else penerima_obj.kabupaten,
-        "kecamatan": kecamatan_name if kecamatan_name else penerima_obj.kecamatan,
-        "desa": desa_name if desa_name else penerima_obj.desa,
+        "provinsi": region_names['provinsi'],
+        "kabupaten": region_names['kabupaten'],
+        "kecamatan": region_names['kecamatan'],
+        "desa": region_names['desa'],
         "skor_total_saw_aktual": skor_individu,
         "skor_saw_ternormalisasi": round(skor_saw_individu, 4),
         "status_kelayakan_knn": knn_prediction,
@@ -116,77 +98,88 @@ def predict_individual_status(penerima_obj, knn_model, passing_grade, logger):
     }
 
 # ===============================
-# 2. Fungsi Pelatihan Model (Jika diperlukan)
+# 1b. Fungsi Prediksi Batch (Vektorisasi SAW + satu panggilan KNN)
 # ===============================
-def train_knn_model(db_session):
-    from app.database.models import Penerima, Setting
-    from sklearn.neighbors import KNeighborsClassifier
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import accuracy_score
-
-    setting = db_session.query(Setting).first()
-    if not setting:
-        current_app.logger.warning("Pengaturan passing grade tidak ditemukan saat melatih model KNN. Menggunakan nilai default 0.5.")
-        training_passing_grade = 0.5
+def build_feature_matrix(rows):
+    """
+    Menyusun matriks fitur boolean (n x 11) dengan urutan kolom BATCH_FEATURE_FIELDS.
+    `rows` boleh berupa objek Penerima atau tuple/Row hasil query kolom dengan urutan yang sama.
+    """
+    rows = list(rows)
+    if not rows:
+        return np.zeros((0, len(BATCH_FEATURE_FIELDS)), dtype=bool)
+    if hasattr(rows[0], BATCH_FEATURE_FIELDS[0]):
+        data = [[getattr(row, field) for field in BATCH_FEATURE_FIELDS] for row in rows]
     else:
-        training_passing_grade = setting.passing_grade
-
-    all_penerima = Penerima.query.all()
-    if not all_penerima:
-        current_app.logger.warning("Tidak ada data penerima untuk melatih model KNN.")
-        return False
-
-    data = []
-    target = []
-
-    feature_columns = PENAMBAH_KRITERIA_FIELDS + PENGURANG_KRITERIA_FIELDS
-
-    for p in all_penerima:
-        row_features = [getattr(p, col) for col in feature_columns]
-        data.append(row_features)
-        target.append(1 if p.skor_saw_ternormalisasi is not None and p.skor_saw_ternormalisasi >= training_passing_grade else 0)
-
-    X = np.array(data)
-    y = np.array(target)
-
-    if len(np.unique(y)) < 2:
-        warning_message = "Hanya ada satu kelas di data target. Model KNN mungkin tidak dapat dilatih dengan baik atau akan sangat bias. Pastikan data pelatihan memiliki variasi yang cukup dalam status kelayakan (Layak/Tidak Layak)."
-        current_app.logger.warning(warning_message)
-        # Optionally, you might want to return False here if you want to prevent training with biased data
-        # For now, we'll allow it but log a warning.
-        # return False
+        data = [tuple(row) for row in rows]
+    return np.asarray(data, dtype=bool).reshape(len(rows), len(BATCH_FEATURE_FIELDS))
+
+def masks_from_feature_matrix(feature_matrix):
+    """
+    Mengemas matriks fitur (urutan BATCH_FEATURE_FIELDS) menjadi bitmask integer per baris:
+    bit 0 = dtks, bit 1+j = KNN_FEATURE_FIELDS[j], sehingga `mask >> 1` adalah kode fitur KNN.
+    """
+    feature_matrix = np.asarray(feature_matrix, dtype=bool)
+    return feature_matrix.astype(np.int64) @ KRITERIA_MASK_BITS
+
+def feature_matrix_from_masks(masks):
+    """Kebalikan masks_from_feature_matrix: bitmask -> matriks fitur boolean (n x 11)."""
+    masks = np.asarray(masks, dtype=np.int64).reshape(-1)
+    return ((masks[:, None] >> np.arange(len(BATCH_FEATURE_FIELDS))) & 1).astype(bool)
+
+def compute_saw_scores(feature_matrix):
+    """Skor SAW aktual dan ternormalisasi untuk seluruh baris dengan satu perkalian matriks-vektor."""
+    skor_aktual = np.maximum(feature_matrix.astype(np.int64) @ SAW_WEIGHTS, 0)
+    skor_ternormalisasi = np.round(skor_aktual / MAX_TOTAL_NILAI_GLOBAL, 4)
+    return skor_aktual, skor_ternormalisasi
+
+@timed('model_predict_batch')
+def predict_batch_status(feature_matrix, knn_model, logger):
+    """
+    Versi batch dari predict_individual_status untuk prediksi massal.
+    Mengembalikan tuple (skor_saw_ternormalisasi, status_kelayakan_knn) berupa array sepanjang n baris,
+    dengan nilai yang identik dengan hasil per baris.
+    """
+    feature_matrix = np.asarray(feature_matrix, dtype=bool)
+    n_rows = feature_matrix.shape[0]
+    _, skor_ternormalisasi = compute_saw_scores(feature_matrix)
+
+    if n_rows == 0:
+        return skor_ternormalisasi, np.array([], dtype=object)
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    knn = KNeighborsClassifier(n_neighbors=3)
-    knn.fit(X_train, y_train)
+    if knn_model is None:
+        return skor_ternormalisasi, np.full(n_rows, "Model KNN belum dilatih", dtype=object)
 
-    if hasattr(knn, 'feature_names_in_'):
-        del knn.feature_names_in_
+    try:
+        raw_prediction = knn_model.predict(feature_matrix[:, 1:])
+        status = np.where(raw_prediction == 1, "Layak", "Tidak Layak").astype(object)
+    except Exception as e:
+        logger.error(f"Error saat prediksi KNN batch ({n_rows} baris): {e}")
+        status = np.full(n_rows, f"Error prediksi KNN: {e}", dtype=object)
 
-    y_pred = knn.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    current_app.logger.info(f"Model KNN dilatih dengan akurasi: {accuracy}")
+    return skor_ternormalisasi, status
 
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(knn, MODEL_PATH)
-    current_app.logger.info(f"Model KNN berhasil disimpan di: {MODEL_PATH}")
-    return True
+# ===============================
+# 2. Fungsi Pelatihan Model (Jika diperlukan)
+# ===============================
+def train_knn_model(db_session, progress_callback=None):
+    """
+    Melatih ulang model KNN (pencarian k & metrik jarak dengan validasi silang) dan menerbitkannya ke registry.
+    Lihat app/utils/knn_training.py. Mengembalikan True jika model baru diterbitkan.
+    """
+    from app.utils.knn_training import train_and_publish
+    return train_and_publish(db_session, progress_callback) is not None
 
 # ===============================
-# 3. Fungsi untuk memuat model (dipanggil saat aplikasi dimulai)
+# 3. Fungsi untuk memuat model (dipanggil saat aplikasi dimulai dan oleh setiap pemakai model)
 # ===============================
 def load_knn_model():
-    if os.path.exists(MODEL_PATH):
-        try:
-            model = joblib.load(MODEL_PATH)
-            if hasattr(model, 'feature_names_in_'):
-                current_app.logger.info("feature_names_in_ ditemukan dan akan dihapus.")
-                del model.feature_names_in_
-            current_app.logger.info("Model KNN berhasil dimuat.")
-            return model
-        except Exception as e:
-            current_app.logger.error(f"Gagal memuat model KNN: {e}")
-            return None
-    current_app.logger.warning("Model KNN tidak ditemukan. Harap latih model terlebih dahulu.")
-    return None
\ No newline at end of file
+    """Model KNN aktif dari registry (di-cache per proses, dimuat ulang hanya jika versi berubah), atau None."""
+    try:
+        model, _ = model_registry.get_model(current_app.logger)
+    except Exception as e:
+        current_app.logger.error(f"Gagal memuat model KNN: {e}")
+        return None
+    if model is None:
+        current_app.logger.warning("Model KNN tidak ditemukan. Harap latih model terlebih dahulu.")
+    return model
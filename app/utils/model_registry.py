@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from app.utils.compiled_model import compile_model, load_model_file, lut_path_for, save_lut, verify_compiled_model
+
+APP_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_MODEL_DIR = os.path.join(APP_ROOT_DIR, 'models')
+
+LEGACY_MODEL_FILENAME = 'knn_model.pkl' # Model lama (sebelum registry) tetap dipakai jika belum ada versi terbit
+LEGACY_VERSION = 'legacy'
+ACTIVE_POINTER_FILENAME = 'ACTIVE.json'
+VERSIONS_DIRNAME = 'versions'
+
+
+class ModelRegistry:
+    """
+    Registry model KNN berversi.
+
+    Setiap model yang dilatih disimpan sebagai berkas baru `versions/knn_model-<versi>.pkl` (tidak pernah ditimpa),
+    lalu diterbitkan dengan mengganti berkas penunjuk `ACTIVE.json` secara atomik (tulis sementara + os.replace).
+    Setiap proses menyimpan model aktif di memori dan hanya memuat ulang jika mtime penunjuk berubah
+    dan isinya menunjuk versi lain; pengecekan per request cukup satu os.stat.
+    Dengan MODEL_COMPILED (default), yang disimpan di memori adalah tabel prediksi CompiledKNNModel.
+    """
+
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir or DEFAULT_MODEL_DIR
+        self.keep_versions = 5
+        self.compiled = True
+        self._lock = threading.Lock()
+        self._pointer_stamp = None
+        self._active = None # dict metadata versi aktif
+        self._model = None
+        self._model_version = None
+        # Proses anak hasil fork (mis. gunicorn --preload) bisa mewarisi lock yang sedang dipegang thread pemanasan
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.model_dir = app.config.get('MODEL_DIR') or DEFAULT_MODEL_DIR
+        self.keep_versions = app.config.get('MODEL_KEEP_VERSIONS', 5)
+        self.compiled = app.config.get('MODEL_COMPILED', True)
+        self._pointer_stamp = None
+        self._active = None
+        self._model = None
+        self._model_version = None
+        app.extensions['model_registry'] = self
+
+    # ===============================
+    # 1. Lokasi Berkas
+    # ===============================
+    @property
+    def pointer_path(self):
+        return os.path.join(self.model_dir, ACTIVE_POINTER_FILENAME)
+
+    @property
+    def legacy_path(self):
+        return os.path.join(self.model_dir, LEGACY_MODEL_FILENAME)
+
+    def version_path(self, version):
+        if version == LEGACY_VERSION:
+            return self.legacy_path
+        return os.path.join(self.model_dir, VERSIONS_DIRNAME, f'knn_model-{version}.pkl')
+
+    def metrics_path(self, version):
+        return f'{os.path.splitext(self.version_path(version))[0]}.json'
+
+    def version_metrics(self, version):
+        """Metrik pelatihan yang disimpan bersama sebuah versi (akurasi, confusion matrix, dst.), atau None."""
+        try:
+            with open(self.metrics_path(version), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_versions(self):
+        """Metadata semua versi yang masih tersimpan, terbaru lebih dulu."""
+        versions_dir = os.path.join(self.model_dir, VERSIONS_DIRNAME)
+        if not os.path.isdir(versions_dir):
+            return []
+        versions = sorted(
+            (name[len('knn_model-'):-len('.pkl')] for name in os.listdir(versions_dir)
+             if name.startswith('knn_model-') and name.endswith('.pkl')),
+            reverse=True
+        )
+        return [dict(self.version_metrics(version) or {}, version=version) for version in versions]
+
+    # ===============================
+    # 2. Versi Aktif (dicek murah lewat mtime penunjuk)
+    # ===============================
+    def _pointer_stamp_now(self):
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def active_info(self):
+        """Metadata versi aktif ({'version', 'published_at', ...}) atau None jika belum ada model sama sekali."""
+        stamp = self._pointer_stamp_now()
+        if stamp is not None and stamp == self._pointer_stamp and self._active is not None:
+            return self._active
+        if stamp is None:
+            active = {'version': LEGACY_VERSION} if os.path.exists(self.legacy_path) else None
+        else:
+            with open(self.pointer_path, encoding='utf-8') as f:
+                active = json.load(f)
+        with self._lock:
+            self._pointer_stamp = stamp
+            self._active = active
+        return active
+
+    def active_version(self):
+        active = self.active_info()
+        return active['version'] if active else None
+
+    def active_path(self):
+        version = self.active_version()
+        return self.version_path(version) if version else None
+
+    # ===============================
+    # 3. Model di Memori per Proses
+    # ===============================
+    def get_model(self, logger=None):
+        """Mengembalikan (model, versi) aktif; model hanya di-unpickle saat versi berubah. (None, None) jika belum ada."""
+        version = self.active_version()
+        if version is None:
+            return None, None
+        if version == self._model_version and self._model is not None:
+            return self._model, version
+        with self._lock:
+            if version != self._model_version or self._model is None:
+                model = load_model_file(self.version_path(version), compiled=self.compiled)
+                self._model = model
+                self._model_version = version
+                if logger:
+                    logger.info(f"Model KNN versi {version} dimuat.")
+            return self._model, self._model_version
+
+    def warm_up(self, app):
+        """
+        Memuat model aktif sesuai MODEL_WARMUP tanpa memperlambat create_app (kecuali mode 'eager').
+        Request yang datang selama pemanasan background menunggu di lock get_model, bukan memuat ulang.
+        """
+        mode = app.config.get('MODEL_WARMUP', 'background')
+        if mode == 'lazy':
+            return None
+        if mode == 'eager':
+            return self._warm_up(app)
+        thread = threading.Thread(target=self._warm_up, args=(app,), name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up(self, app):
+        try:
+            self.get_model(app.logger)
+        except Exception as e:
+            app.logger.error(f"Gagal memanaskan model KNN: {e}")
+
+    # ===============================
+    # 4. Menerbitkan Versi Baru
+    # ===============================
+    def publish(self, model, metadata=None, logger=None):
+        """Menyimpan model sebagai versi baru lalu menjadikannya aktif secara atomik. Mengembalikan versi baru."""
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+        path = self.version_path(version)
+        compiled_model = compile_model(model) if self.compiled else None
+        if compiled_model is not None:
+            verify_compiled_model(model, compiled_model) # Tabel yang salah tidak pernah diaktifkan
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        import joblib
+
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+        if compiled_model is not None:
+            save_lut(compiled_model, path) # Tabel siap sebelum versi diaktifkan
+
+        active = dict(metadata or {}, version=version, published_at=datetime.now().isoformat(timespec='seconds'))
+        with open(self.metrics_path(version), 'w', encoding='utf-8') as f:
+            json.dump(active, f)
+        tmp_pointer = f'{self.pointer_path}.{os.getpid()}.tmp'
+        with open(tmp_pointer, 'w', encoding='utf-8') as f:
+            json.dump(active, f)
+        os.replace(tmp_pointer, self.pointer_path)
+
+        self._prune_versions(keep={version})
+        if logger:
+            logger.info(f"Model KNN versi {version} diterbitkan: {path}")
+        return version
+
+    def _prune_versions(self, keep):
+        versions_dir = os.path.join(self.model_dir, VERSIONS_DIRNAME)
+        files = sorted(
+            (os.path.join(versions_dir, name) for name in os.listdir(versions_dir) if name.endswith('.pkl')),
+            key=os.path.getmtime, reverse=True
+        )
+        keep_paths = {self.version_path(version) for version in keep}
+        # Versi lama disisakan beberapa agar proses yang masih memakainya (mis. shard prediksi massal) tidak kehilangan berkas
+        for old_file in files[self.keep_versions:]:
+            if old_file not in keep_paths:
+                for stale_path in (old_file, lut_path_for(old_file), f'{os.path.splitext(old_file)[0]}.json'):
+                    try:
+                        os.remove(stale_path)
+                    except OSError:
+                        pass
+
+
+model_registry = ModelRegistry()
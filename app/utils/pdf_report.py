@@ -0,0 +1,128 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, render_template
+
+from app.utils.metrics import timed
+
+REPORT_TEMPLATE = 'petugas/eligible_recipients_print.html'
+REPORT_FILENAME = 'daftar_penerima_layak.pdf'
+# Dinaikkan jika tampilan template laporan berubah agar berkas lama tidak dipakai lagi
+REPORT_FORMAT_VERSION = 3
+
+
+# ===============================
+# 1. Kunci Konten & Lokasi Cache
+# ===============================
+def report_cache_dir():
+    cache_dir = current_app.config.get('REPORT_CACHE_DIR') or os.path.join(current_app.instance_path, 'reports')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def report_key(ranking, passing_grade, kuota, kuota_level='global'):
+    """Hash SHA-256 dari seluruh masukan laporan: isi ranking, passing grade, kuota, pembagian kuota, dan versi format."""
+    payload = json.dumps(
+        {'v': REPORT_FORMAT_VERSION, 'passing_grade': passing_grade, 'kuota': kuota, 'kuota_level': kuota_level, 'rows': ranking},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def report_path(key):
+    return os.path.join(report_cache_dir(), f'{key}.pdf')
+
+
+def cached_report_path(key):
+    path = report_path(key)
+    return path if os.path.exists(path) else None
+
+
+# ===============================
+# 2. Render PDF (per chunk halaman, paralel)
+# ===============================
+def _write_pdf(html_string):
+    import weasyprint
+    return weasyprint.HTML(string=html_string).write_pdf()
+
+
+def _concat_pdfs(pdf_parts):
+    from pypdf import PdfWriter, PdfReader
+    writer = PdfWriter()
+    for part in pdf_parts:
+        writer.append(PdfReader(io.BytesIO(part)))
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def render_report_chunks(ranking, passing_grade, kuota, chunk_rows, key, kuota_level='global'):
+    """
+    HTML per chunk: chunk pertama memuat kop laporan dan kriteria, chunk berikutnya melanjutkan nomor urut tabel.
+    Kaki halaman mencetak kode laporan (awal `key`), bukan waktu cetak: PDF di-cache per isi, jadi waktu render
+    akan salah untuk setiap unduhan berikutnya.
+    """
+    chunks = [ranking[start:start + chunk_rows] for start in range(0, len(ranking), chunk_rows)] or [[]]
+    return [
+        render_template(
+            REPORT_TEMPLATE,
+            eligible_list=rows,
+            passing_grade=passing_grade,
+            kuota=kuota,
+            kuota_level=kuota_level,
+            kode_laporan=key[:12],
+            start_index=index * chunk_rows,
+            show_header=(index == 0)
+        )
+        for index, rows in enumerate(chunks)
+    ]
+
+
+def build_report(ranking, passing_grade, kuota, key, progress_callback=None, kuota_level='global'):
+    """
+    Membuat PDF laporan dan menyimpannya di cache dengan nama `<key>.pdf` (tulis ke berkas sementara lalu rename).
+    Laporan besar dipecah per REPORT_CHUNK_ROWS baris, dirender paralel di beberapa proses, lalu digabung.
+    """
+    config = current_app.config
+    chunk_rows = config.get('REPORT_CHUNK_ROWS', 500)
+    workers = config.get('REPORT_RENDER_WORKERS', 2)
+    with timed('pdf_html'):
+        html_chunks = render_report_chunks(ranking, passing_grade, kuota, chunk_rows, key, kuota_level)
+
+    with timed('pdf_render'): # WeasyPrint, termasuk chunk yang dirender di proses lain
+        if len(html_chunks) == 1:
+            pdf = _write_pdf(html_chunks[0])
+        else:
+            pdf_parts = []
+            with ProcessPoolExecutor(max_workers=min(workers, len(html_chunks)), mp_context=multiprocessing.get_context('spawn')) as executor:
+                for part in executor.map(_write_pdf, html_chunks):
+                    pdf_parts.append(part)
+                    if progress_callback:
+                        progress_callback(len(pdf_parts), len(html_chunks))
+            pdf = _concat_pdfs(pdf_parts)
+
+    path = report_path(key)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp_path, path)
+    _prune_cache(config.get('REPORT_CACHE_MAX_FILES', 50))
+    current_app.logger.info(f"Laporan PDF {key[:12]} dibuat: {len(ranking)} baris, {len(html_chunks)} chunk.")
+    return path
+
+
+def _prune_cache(max_files):
+    cache_dir = report_cache_dir()
+    files = sorted(
+        (os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith('.pdf')),
+        key=os.path.getmtime, reverse=True
+    )
+    for old_file in files[max_files:]:
+        try:
+            os.remove(old_file)
+        except OSError:
+            pass
@@ -0,0 +1,139 @@
+import base64
+import json
+
+from sqlalchemy import and_, func, or_
+
+from app.database.models import Penerima
+from app.utils.wilayah import resolve_region_names
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Filter persis pada kolom yang sudah ber-index
+EXACT_FILTER_FIELDS = ['provinsi', 'kabupaten', 'kecamatan', 'desa', 'pekerjaan']
+SORT_OPTIONS = {
+    'id': 'Urutan Input',
+    'skor': 'Skor Tertinggi',
+}
+
+# Skor NULL (belum diprediksi) diurutkan paling akhir; ekspresi ini sama dengan index ix_penerima_skor_id
+_SKOR_URUT = func.coalesce(Penerima.skor_saw_ternormalisasi, -1.0)
+
+
+# ===============================
+# 1. Cursor Keyset
+# ===============================
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor, sort='id'):
+    """
+    Cursor -> list nilai keyset untuk mode urutan `sort` ('skor': [skor, id], 'id': [id]).
+    Cursor rusak, diubah tangan, atau milik mode urutan lain menghasilkan None (daftar mulai dari halaman 1).
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list):
+        return None
+    if sort == 'skor':
+        valid = len(values) == 2 and (values[0] is None or _is_number(values[0])) and _is_id(values[1])
+    else:
+        valid = len(values) == 1 and _is_id(values[0])
+    return values if valid else None
+
+
+# ===============================
+# 2. Query Daftar Penerima
+# ===============================
+def parse_list_args(args):
+    """Membaca filter, urutan, cursor dan limit dari query string (request.args)."""
+    filters = {field: args.get(field) for field in EXACT_FILTER_FIELDS if args.get(field)}
+    nama = (args.get('nama') or '').strip()
+    if nama:
+        filters['nama'] = nama
+    dtks = args.get('dtks')
+    if dtks in ('True', 'False'):
+        filters['dtks'] = dtks == 'True'
+
+    sort = args.get('sort') if args.get('sort') in SORT_OPTIONS else 'id'
+    limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    return filters, sort, args.get('cursor'), limit
+
+
+def filter_penerima(query, filters):
+    """Menerapkan filter dari parse_list_args pada Query atau select() Penerima (dipakai juga oleh ekspor)."""
+    for field in EXACT_FILTER_FIELDS:
+        if field in filters:
+            query = query.filter(getattr(Penerima, field) == filters[field])
+    if 'dtks' in filters:
+        query = query.filter(Penerima.dtks == filters['dtks'])
+    if 'nama' in filters:
+        # Pencarian awalan berbentuk rentang agar tetap memakai index pada kolom nama
+        query = query.filter(Penerima.nama >= filters['nama'], Penerima.nama < filters['nama'] + '\uffff')
+    return query
+
+
+def query_penerima_page(filters, sort='id', cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Mengambil satu halaman Penerima dengan keyset pagination: biaya per halaman tetap,
+    tidak bergantung pada posisi halaman maupun jumlah baris tabel (tanpa OFFSET dan COUNT).
+    Mengembalikan (list Penerima, next_cursor atau None).
+    """
+    query = filter_penerima(Penerima.query, filters)
+
+    after = decode_cursor(cursor, sort)
+    if sort == 'skor':
+        if after:
+            skor, last_id = after
+            skor = -1.0 if skor is None else skor
+            query = query.filter(or_(_SKOR_URUT < skor, and_(_SKOR_URUT == skor, Penerima.id < last_id)))
+        query = query.order_by(_SKOR_URUT.desc(), Penerima.id.desc())
+    else:
+        if after:
+            query = query.filter(Penerima.id > after[0])
+        query = query.order_by(Penerima.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        if sort == 'skor':
+            skor = last.skor_saw_ternormalisasi if last.skor_saw_ternormalisasi is not None else -1.0
+            next_cursor = encode_cursor([skor, last.id])
+        else:
+            next_cursor = encode_cursor([last.id])
+    return rows, next_cursor
+
+
+def serialize_page(rows):
+    """Baris halaman untuk endpoint JSON, dengan nama wilayah yang sudah diresolusi."""
+    return [
+        {
+            'id': penerima.id,
+            'nama': penerima.nama,
+            'pekerjaan': penerima.pekerjaan,
+            'dtks': penerima.dtks,
+            'desa': region_names['desa'],
+            'kecamatan': region_names['kecamatan'],
+            'skor_saw_ternormalisasi': penerima.skor_saw_ternormalisasi,
+            'status_kelayakan_knn': penerima.status_kelayakan_knn,
+        }
+        for penerima, region_names in zip(rows, resolve_region_names(rows))
+    ]
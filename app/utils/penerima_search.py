@@ -0,0 +1,238 @@
+import re
+
+import click
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.database.models import Penerima
+from app.utils.importer import penerima_cli
+from app.utils.wilayah import REGION_FIELDS, resolve_region_names
+
+SEARCH_TABLE = 'penerima_fts'
+DEFAULT_SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 25
+MAX_CANDIDATES = 20
+MIN_QUERY_LENGTH = 2
+# Halaman publik: minimal 3 huruf dan kecamatan/desa wajib dipilih, agar daftar penerima tidak bisa disalin lewat awalan nama
+PUBLIC_MIN_QUERY_LENGTH = 3
+PUBLIC_REGION_FIELDS = ('kecamatan', 'desa')
+
+# Prefix kode wilayah di kolom `wilayah` FTS, agar id provinsi "34" tidak bertabrakan dengan kabupaten "34.."
+_REGION_TOKEN_PREFIX = {'provinsi': 'p', 'kabupaten': 'k', 'kecamatan': 'c', 'desa': 'd'}
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# ===============================
+# 1. Skema Index FTS5 (tabel virtual + trigger)
+# ===============================
+def _wilayah_tokens_sql(alias):
+    """Ekspresi SQL: 'p34 k3404 c3404010 d3404010001' dari kolom wilayah baris `alias` (new/old/penerima)."""
+    parts = [f"'{prefix}' || replace(coalesce({alias}.{field}, ''), '.', '')" for field, prefix in _REGION_TOKEN_PREFIX.items()]
+    return " || ' ' || ".join(parts)
+
+
+SEARCH_DDL = [
+    # nama: unicode61 tanpa diakritik (case-insensitive), index awalan 2 & 3 huruf untuk autocomplete
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        nama, wilayah, tokenize = "unicode61 remove_diacritics 2", prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON penerima BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, nama, wilayah) VALUES (new.id, new.nama, {_wilayah_tokens_sql('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON penerima BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END""",
+    # Hanya perubahan nama/wilayah yang menyentuh index; UPDATE skor (prediksi massal) tidak
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF nama, provinsi, kabupaten, kecamatan, desa ON penerima BEGIN
+        UPDATE {SEARCH_TABLE} SET nama = new.nama, wilayah = {_wilayah_tokens_sql('new')} WHERE rowid = old.id;
+    END""",
+]
+
+
+def _create_search_schema(target, connection, **kw):
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+
+
+def init_search(app):
+    """
+    Index FTS ikut dibuat oleh db.create_all() (event after_create tabel penerima). Database lama
+    yang belum punya index diberi peringatan: jalankan `flask penerima search-index`.
+    """
+    if not event.contains(Penerima.__table__, 'after_create', _create_search_schema):
+        event.listen(Penerima.__table__, 'after_create', _create_search_schema)
+    with app.app_context():
+        try:
+            if db.engine.dialect.name == 'sqlite' and not search_index_exists() and _penerima_table_exists():
+                app.logger.warning("Index pencarian nama belum dibuat. Jalankan `flask penerima search-index`; "
+                                   "sementara itu pencarian memakai awalan nama biasa.")
+        finally:
+            db.session.remove()
+
+
+def _penerima_table_exists():
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'penerima'")
+    ).first() is not None
+
+
+def search_index_exists():
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': SEARCH_TABLE}
+    ).first() is not None
+
+
+def build_search_index():
+    """Membuat tabel FTS + trigger (jika belum ada) lalu mengisi ulang seluruh isinya dengan satu INSERT ... SELECT."""
+    connection = db.session.connection()
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {SEARCH_TABLE}(rowid, nama, wilayah) SELECT id, nama, {_wilayah_tokens_sql('penerima')} FROM penerima"
+    ))
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"))
+    db.session.commit()
+    return db.session.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+
+
+# ===============================
+# 2. Query Pencarian
+# ===============================
+def region_filters_from(args):
+    """Filter wilayah dari form/query string; nilai placeholder dropdown ('-- Pilih ... --') diabaikan."""
+    filters = {}
+    for field in REGION_FIELDS:
+        value = (args.get(field) or '').strip()
+        if value and not value.startswith('-'):
+            filters[field] = value
+    return filters
+
+
+def build_match_query(query, region_filters=None, all_prefix=False):
+    """
+    Mengubah teks bebas menjadi ekspresi MATCH FTS5: kata terakhir (yang sedang diketik) menjadi awalan,
+    kata sebelumnya harus utuh ("budi" "san"*), atau semuanya awalan jika all_prefix. Semua kata wajib ada
+    dalam urutan apa pun, ditambah token wilayah yang dipilih. None jika tidak ada kata.
+    """
+    words = _WORD_RE.findall(query or '')
+    if not words:
+        return None
+    quoted = [f'"{word}"' + ('*' if all_prefix or index == len(words) - 1 else '') for index, word in enumerate(words)]
+    terms = ['nama : (' + ' '.join(quoted) + ')']
+    for field, value in (region_filters or {}).items():
+        token = _REGION_TOKEN_PREFIX[field] + value.replace('.', '')
+        terms.append(f'wilayah : "{token}"')
+    return ' AND '.join(terms)
+
+
+def _fallback_query(query, region_filters, limit):
+    """Tanpa index FTS: awalan nama (case-sensitive) memakai index kolom nama, seperti daftar penerima."""
+    prefix = (query or '').strip()
+    q = Penerima.query.with_entities(Penerima.id, Penerima.nama, *[getattr(Penerima, field) for field in REGION_FIELDS])
+    q = q.filter(Penerima.nama >= prefix, Penerima.nama < prefix + '\uffff')
+    for field, value in region_filters.items():
+        q = q.filter(getattr(Penerima, field) == value)
+    return [row._mapping for row in q.order_by(Penerima.nama, Penerima.id).limit(limit)]
+
+
+def _fts_query(query, match, limit):
+    # Kandidat diambil berdasarkan bm25 lebih dulu, lalu nama yang persis sama diletakkan paling atas
+    return db.session.execute(text(
+        f"""SELECT p.id, p.nama, p.provinsi, p.kabupaten, p.kecamatan, p.desa
+            FROM (SELECT rowid, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match
+                  ORDER BY rank LIMIT :candidates) AS hit
+            JOIN penerima AS p ON p.id = hit.rowid
+            ORDER BY lower(p.nama) = lower(:query) DESC, hit.rank, p.id
+            LIMIT :limit"""
+    ), {'match': match, 'query': query.strip(), 'candidates': limit * 4, 'limit': limit}).mappings().all()
+
+
+def search_penerima(query, region_filters=None, limit=DEFAULT_SUGGEST_LIMIT):
+    """
+    Mencari penerima berdasarkan awalan kata nama (tidak peka huruf besar/kecil dan diakritik), dipersempit
+    dengan wilayah. Urutan: nama yang persis sama lebih dulu, lalu relevansi bm25. Mengembalikan list dict
+    {id, nama, provinsi..desa (nama wilayah), kode_desa}.
+    """
+    region_filters = region_filters or {}
+    if build_match_query(query) is None or len((query or '').strip()) < MIN_QUERY_LENGTH:
+        return []
+
+    try:
+        rows = _fts_query(query, build_match_query(query, region_filters), limit)
+        if not rows and len(_WORD_RE.findall(query)) > 1:
+            # Kata sebelumnya mungkin belum lengkap ("bud sant"): ulangi dengan semua kata sebagai awalan
+            rows = _fts_query(query, build_match_query(query, region_filters, all_prefix=True), limit)
+    except OperationalError:
+        db.session.rollback()
+        rows = _fallback_query(query, region_filters, limit)
+
+    return [
+        dict(id=row['id'], nama=row['nama'], kode_desa=row['desa'], **names)
+        for row, names in zip(rows, resolve_region_names([dict(row) for row in rows]))
+    ]
+
+
+def find_penerima_candidates(nama, region_filters=None, limit=MAX_CANDIDATES):
+    """
+    Penerima dengan nama yang sama persis (tidak peka huruf besar/kecil) di wilayah terpilih, untuk cek kelayakan.
+    Jika tidak ada yang persis sama, dikembalikan hasil pencarian awalan sebagai saran.
+    Mengembalikan tuple (list kandidat, exact).
+    """
+    results = search_penerima(nama, region_filters, limit=limit)
+    wanted = ' '.join((nama or '').split()).lower()
+    exact = [row for row in results if ' '.join(row['nama'].split()).lower() == wanted]
+    return (exact, True) if exact else (results, False)
+
+
+def lookup_penerima(nama, penerima_id=None, region_filters=None):
+    """
+    Menentukan penerima yang dimaksud pada form cek kelayakan. penerima_id (dari pilihan autocomplete/daftar kandidat)
+    dipakai jika namanya masih cocok; selain itu nama dicari persis di wilayah terpilih.
+    Mengembalikan (Penerima atau None, kandidat, exact): None berarti tidak ada atau lebih dari satu yang cocok.
+    """
+    wanted = ' '.join((nama or '').split()).lower()
+    if penerima_id and str(penerima_id).isdigit():
+        penerima = db.session.get(Penerima, int(penerima_id))
+        if penerima is not None and ' '.join(penerima.nama.split()).lower() == wanted:
+            return penerima, [], True
+
+    candidates, exact = find_penerima_candidates(nama, region_filters)
+    if exact and len(candidates) == 1:
+        return db.session.get(Penerima, candidates[0]['id']), candidates, True
+    return None, candidates, exact
+
+
+def public_search_allowed(query, region_filters):
+    """Pencarian awalan untuk pengunjung tanpa login hanya boleh jika kata kunci cukup panjang dan wilayahnya sempit."""
+    return (len((query or '').strip()) >= PUBLIC_MIN_QUERY_LENGTH
+            and any(region_filters.get(field) for field in PUBLIC_REGION_FIELDS))
+
+
+def serialize_suggestions(results, include_id=False):
+    """
+    Bentuk JSON autocomplete: hanya nama dan lokasi, tanpa skor maupun kriteria. id penerima hanya
+    disertakan untuk petugas (include_id); halaman publik memilih kandidat lewat kode desanya.
+    """
+    suggestions = []
+    for row in results:
+        item = {
+            'nama': row['nama'],
+            'kode_desa': row.get('kode_desa'),
+            'wilayah': ', '.join(str(row[field]) for field in ('desa', 'kecamatan', 'kabupaten') if row.get(field)),
+        }
+        if include_id:
+            item['id'] = row['id']
+        suggestions.append(item)
+    return suggestions
+
+
+# ===============================
+# 3. Perintah CLI
+# ===============================
+@penerima_cli.command('search-index')
+def search_index_command():
+    """Bangun (ulang) index pencarian nama FTS5 untuk data yang sudah ada."""
+    total = build_search_index()
+    click.echo(f"Index pencarian berisi {total} penerima.")
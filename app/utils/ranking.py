@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import and_, func
+
+from app import db
+from app.database.engine import read_session
+from app.database.models import KuotaWilayah, Penerima
+from app.utils.settings_service import KUOTA_GLOBAL, SETTING_ID
+from app.utils.versioning import data_version
+from app.utils.wilayah import resolve_region_names
+
+# Jumlah kombinasi (passing_grade, kuota, pembagian kuota, versi data) yang disimpan per proses
+MAX_CACHED_RANKINGS = 8
+
+# Kolom partisi untuk pembagian kuota per wilayah; 'global' = satu kuota untuk seluruh daftar
+KUOTA_PARTITIONS = {
+    'kecamatan': Penerima.kecamatan,
+    'desa': Penerima.desa,
+}
+
+_ranking_cache = OrderedDict()
+_ranking_lock = threading.Lock()
+
+_RANKING_COLUMNS = [
+    Penerima.nama, Penerima.provinsi, Penerima.kabupaten, Penerima.kecamatan, Penerima.desa,
+    Penerima.pekerjaan, Penerima.skor_saw_ternormalisasi, Penerima.status_kelayakan_knn,
+]
+
+
+def eligible_select(passing_grade, kuota, kuota_level=KUOTA_GLOBAL, columns=_RANKING_COLUMNS):
+    """
+    Query penerima layak berurutan skor, dibatasi kuota (dipakai ranking, PDF, dan ekspor).
+
+    - 'global': ORDER BY skor DESC, id LIMIT kuota.
+    Skor yang sama diurutkan berdasarkan id di kedua mode, sehingga batas kuota deterministik
+    (HTML, PDF, dan ekspor memotong daftar di baris yang sama).
+    - 'kecamatan'/'desa': satu query dengan ROW_NUMBER() OVER (PARTITION BY wilayah ORDER BY skor DESC);
+      setiap wilayah dibatasi kuotanya sendiri (baris KuotaWilayah, atau `kuota` sebagai default).
+      Hasil berurutan kode wilayah lalu peringkat, dengan kolom tambahan `peringkat` (urutan di dalam wilayah).
+    """
+    layak = (Penerima.status_kelayakan_knn == 'Layak', Penerima.skor_saw_ternormalisasi >= passing_grade)
+    partition = KUOTA_PARTITIONS.get(kuota_level)
+    if partition is None:
+        return db.select(*columns).where(*layak).order_by(
+            Penerima.skor_saw_ternormalisasi.desc(), Penerima.id
+        ).limit(kuota)
+
+    peringkat = func.row_number().over(
+        partition_by=partition, order_by=(Penerima.skor_saw_ternormalisasi.desc(), Penerima.id)
+    )
+    ranked = db.select(*columns, partition.label('wilayah_kuota'), peringkat.label('peringkat')).where(*layak).subquery('ranked')
+    return db.select(*(ranked.c[column.key] for column in columns), ranked.c.peringkat).outerjoin(
+        KuotaWilayah,
+        and_(
+            KuotaWilayah.setting_id == SETTING_ID,
+            KuotaWilayah.level == kuota_level,
+            KuotaWilayah.wilayah_id == ranked.c.wilayah_kuota,
+        )
+    ).where(
+        ranked.c.peringkat <= func.coalesce(KuotaWilayah.kuota, kuota)
+    ).order_by(ranked.c.wilayah_kuota, ranked.c.peringkat)
+
+
+def _compute_ranking(passing_grade, kuota, kuota_level):
+    with read_session() as session:
+        rows = session.execute(eligible_select(passing_grade, kuota, kuota_level)).mappings().all()
+
+    ranking = []
+    for index, (row, region_names) in enumerate(zip(rows, resolve_region_names([dict(row) for row in rows])), 1):
+        ranking.append({
+            'peringkat': row.get('peringkat', index),
+            'nama': row['nama'],
+            'provinsi': region_names['provinsi'],
+            'kabupaten': region_names['kabupaten'],
+            'kecamatan': region_names['kecamatan'],
+            'desa': region_names['desa'],
+            'pekerjaan': row['pekerjaan'],
+            'skor_saw_ternormalisasi': row['skor_saw_ternormalisasi'],
+            'status_kelayakan_knn': row['status_kelayakan_knn']
+        })
+    return ranking
+
+
+def get_eligible_ranking(passing_grade, kuota, kuota_level=KUOTA_GLOBAL):
+    """
+    Daftar penerima layak (sudah diurutkan dan nama wilayahnya diresolusi) untuk tampilan HTML dan PDF.
+    Hasil disimpan per (passing_grade, kuota, pembagian kuota, versi data); versi data naik setiap ada perubahan
+    (termasuk kuota per wilayah) sehingga cache tidak pernah basi, dan permintaan berulang tidak mengulang
+    query maupun resolusi wilayah. Mengembalikan tuple (ranking, versi data).
+    """
+    version = data_version()
+    key = (passing_grade, kuota, kuota_level, version)
+    with _ranking_lock:
+        if key in _ranking_cache:
+            _ranking_cache.move_to_end(key)
+            return _ranking_cache[key], version
+
+    ranking = _compute_ranking(passing_grade, kuota, kuota_level)
+
+    with _ranking_lock:
+        _ranking_cache[key] = ranking
+        while len(_ranking_cache) > MAX_CACHED_RANKINGS:
+            _ranking_cache.popitem(last=False)
+    return ranking, version
+
+
+def clear_ranking_cache():
+    with _ranking_lock:
+        _ranking_cache.clear()
@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 600 # detik
+DEFAULT_TOKEN_MAX_AGE = 900 # detik
+_TOKEN_SALT = 'hasil-prediksi'
+MODEL_UNAVAILABLE_MESSAGE = 'Model prediksi belum tersedia. Harap latih model terlebih dahulu atau hubungi administrator.'
+
+
+# ===============================
+# 1. Penyimpanan Hasil (LRU + TTL)
+# ===============================
+class MemoryResultStore:
+    """LRU di memori proses dengan TTL per entri. Cepat, tetapi tidak dibagi antar proses web."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResultStore:
+    """
+    Cache bersama di berkas SQLite lokal (WAL), dipakai semua proses web di mesin yang sama.
+    Satu koneksi per thread; entri kedaluwarsa dan kelebihan LRU dibersihkan berkala saat menulis.
+    """
+    PRUNE_EVERY = 200
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS hasil (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_hasil_accessed ON hasil (accessed)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF') # Isi cache boleh hilang saat crash
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute('SELECT value FROM hasil WHERE key = ? AND expires > ?', (key, now)).fetchone()
+        if row is None:
+            return None
+        try:
+            conn.execute('UPDATE hasil SET accessed = ? WHERE key = ?', (now, key))
+        except sqlite3.OperationalError:
+            pass # Urutan LRU hanya perkiraan; jangan gagal karena kunci tulis
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._connection()
+        try:
+            conn.execute('INSERT OR REPLACE INTO hasil (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                         (key, json.dumps(value), now + self.ttl, now))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn, now)
+        except sqlite3.OperationalError:
+            pass # Cache penuh kunci: hasil tetap dikembalikan ke pemanggil, hanya tidak disimpan
+
+    def _prune(self, conn, now):
+        conn.execute('DELETE FROM hasil WHERE expires <= ?', (now,))
+        conn.execute(
+            'DELETE FROM hasil WHERE key IN (SELECT key FROM hasil ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM hasil')
+
+
+# ===============================
+# 2. Cache Hasil Prediksi Individu
+# ===============================
+class ResultCache:
+    """
+    Hasil predict_individual_status per (id penerima, versi baris, versi model, passing grade).
+    Versi baris = kriteria_mask + checksum nama/wilayah, yaitu semua input hasil prediksi; setiap edit
+    yang mengubah hasil otomatis memakai kunci baru, sehingga entri lama tidak pernah dibaca lagi.
+    """
+
+    def __init__(self):
+        self.store = MemoryResultStore()
+        self.token_max_age = DEFAULT_TOKEN_MAX_AGE
+
+    def init_app(self, app):
+        max_entries = app.config.get('RESULT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        ttl = app.config.get('RESULT_CACHE_TTL', DEFAULT_TTL)
+        if app.config.get('RESULT_CACHE_BACKEND', 'memory') == 'sqlite':
+            path = app.config.get('RESULT_CACHE_PATH') or os.path.join(app.instance_path, 'result_cache.sqlite')
+            self.store = SQLiteResultStore(path, max_entries, ttl)
+        else:
+            self.store = MemoryResultStore(max_entries, ttl)
+        self.token_max_age = app.config.get('RESULT_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE)
+        app.extensions['result_cache'] = self
+
+    @staticmethod
+    def row_version(penerima):
+        # Mask dihitung langsung dari objek agar perubahan yang belum di-flush pun ikut terlihat
+        from app.utils.kriteria_mask import kriteria_mask_of
+        from app.utils.wilayah import REGION_FIELDS
+
+        text = '|'.join(str(getattr(penerima, field) or '') for field in ['nama'] + REGION_FIELDS)
+        return f'{kriteria_mask_of(penerima)}-{zlib.crc32(text.encode()):08x}'
+
+    def key_for(self, penerima, model_version, passing_grade):
+        return f'{penerima.id}:{self.row_version(penerima)}:{model_version}:{passing_grade}'
+
+    def predict(self, penerima, passing_grade, logger):
+        """
+        predict_individual_status dengan cache; model dan versinya diambil dari registry. Mengembalikan dict hasil.
+        Nilai cache tidak menyimpan `timestamp`; waktu pemeriksaan ditambahkan setiap kali hasil dikembalikan.
+        Jika model belum ada atau gagal dimuat, hasilnya {'error': MODEL_UNAVAILABLE_MESSAGE}.
+        """
+        from app.utils.model_handler import predict_individual_status
+        from app.utils.model_registry import model_registry
+
+        try:
+            knn_model, model_version = model_registry.get_model(logger)
+        except Exception as e:
+            logger.error(f"Gagal memuat model KNN: {e}")
+            knn_model = None
+        if knn_model is None:
+            return {'error': MODEL_UNAVAILABLE_MESSAGE}
+        key = self.key_for(penerima, model_version, passing_grade)
+        result = self.store.get(key)
+        if result is None:
+            result = predict_individual_status(penerima, knn_model, passing_grade, logger)
+            result.pop('timestamp', None)
+            if 'error' not in result:
+                self.store.set(key, result)
+        return dict(result, timestamp=datetime.now().strftime("%d-%m-%Y %H:%M:%S"))
+
+    # Token kecil untuk redirect: id penerima yang ditandatangani dan berumur terbatas,
+    # bukan seluruh hasil di cookie session. Proses mana pun dapat membacanya.
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.secret_key, salt=_TOKEN_SALT)
+
+    def make_token(self, penerima_id):
+        return self._serializer().dumps(penerima_id)
+
+    def read_token(self, token):
+        if not token:
+            return None
+        try:
+            return self._serializer().loads(token, max_age=self.token_max_age)
+        except BadSignature:
+            return None
+
+
+result_cache = ResultCache()
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app import db
+from app.database.models import KuotaWilayah, Setting
+from app.utils.versioning import SETTING, bump_version, get_versions
+
+DEFAULT_PASSING_GRADE = 0.5
+DEFAULT_KUOTA = 50
+SETTING_ID = 1 # Satu-satunya baris pengaturan
+
+KUOTA_GLOBAL = 'global'
+# Pembagian kuota -> panjang kode wilayah (format Kemendagri) yang boleh diberi kuota khusus
+KODE_WILAYAH_LENGTH = {'kecamatan': 7, 'desa': 10}
+KUOTA_LEVELS = (KUOTA_GLOBAL,) + tuple(KODE_WILAYAH_LENGTH)
+
+# Salinan pengaturan yang aman dibagi antar request/thread (atributnya sama dengan model Setting)
+SettingSnapshot = namedtuple('SettingSnapshot', ['passing_grade', 'kuota', 'kuota_level'])
+
+_cache = {'value': None, 'version': None, 'checked_at': 0.0}
+_cache_lock = threading.Lock()
+
+
+# ===============================
+# 1. Seed Baris Pengaturan
+# ===============================
+def seed_setting(session=None):
+    """
+    Memastikan baris pengaturan ada. INSERT dengan id tetap sehingga dua proses yang melakukan seed
+    bersamaan tidak menghasilkan dua baris (yang kalah mendapat IntegrityError dan diabaikan).
+    """
+    session = session or db.session
+    if session.execute(select(Setting.id).limit(1)).first() is not None:
+        return False
+    try:
+        session.execute(insert(Setting).values(id=SETTING_ID, passing_grade=DEFAULT_PASSING_GRADE, kuota=DEFAULT_KUOTA))
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return False
+    return True
+
+
+def init_settings(app):
+    """Seed sekali saat aplikasi mulai. Tabel yang belum dibuat (sebelum `flask db upgrade`) dilewati tanpa error."""
+    with app.app_context():
+        try:
+            if seed_setting():
+                app.logger.info("Baris pengaturan default (passing grade 0.5, kuota 50) dibuat.")
+        except SQLAlchemyError:
+            db.session.rollback()
+        finally:
+            db.session.remove()
+    invalidate_settings()
+
+
+# ===============================
+# 2. Cache per Proses
+# ===============================
+def _load_snapshot():
+    row = db.session.execute(
+        select(Setting.passing_grade, Setting.kuota, Setting.kuota_level).order_by(Setting.id).limit(1)
+    ).first()
+    if row is None:
+        # Tabel dibuat setelah aplikasi mulai: seed sekali di sini, setelah itu jalur baca tidak pernah menulis
+        seed_setting()
+        return SettingSnapshot(DEFAULT_PASSING_GRADE, DEFAULT_KUOTA, KUOTA_GLOBAL)
+    return SettingSnapshot(row.passing_grade, row.kuota, row.kuota_level or KUOTA_GLOBAL)
+
+
+def get_settings():
+    """
+    Pengaturan aktif dari cache proses. Versi data 'setting' dicek paling sering tiap SETTINGS_CHECK_INTERVAL detik
+    (satu SELECT by primary key) agar perubahan dari proses lain ikut terbaca; baris Setting hanya dibaca ulang jika versinya berubah.
+    """
+    interval = current_app.config.get('SETTINGS_CHECK_INTERVAL', 2.0)
+    now = time.monotonic()
+    value = _cache['value']
+    if value is not None and now - _cache['checked_at'] < interval:
+        return value
+
+    version = get_versions(SETTING)[0]
+    with _cache_lock:
+        if _cache['value'] is None or version != _cache['version']:
+            _cache['value'] = _load_snapshot()
+            _cache['version'] = version
+        _cache['checked_at'] = now
+        return _cache['value']
+
+
+def invalidate_settings():
+    with _cache_lock:
+        _cache['value'] = None
+        _cache['version'] = None
+        _cache['checked_at'] = 0.0
+
+
+# ===============================
+# 3. Penyimpanan dari Halaman Admin
+# ===============================
+def parse_kuota_wilayah(text, kuota_level):
+    """
+    Teks kuota per wilayah (satu baris "kode, kuota", mis. "3201010001, 25") -> dict {kode: kuota}.
+    Baris kosong dan baris berawalan '#' diabaikan. ValueError berisi nomor baris jika formatnya salah.
+    """
+    result = {}
+    length = KODE_WILAYAH_LENGTH.get(kuota_level)
+    for number, line in enumerate((text or '').splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if length is None:
+            raise ValueError("Kuota per wilayah hanya berlaku untuk pembagian kuota per kecamatan atau per desa.")
+        parts = [part.strip() for part in line.replace(';', ',').split(',')]
+        if len(parts) != 2 or not parts[0].isdigit() or len(parts[0]) != length or not parts[1].isdigit():
+            raise ValueError(f"Baris {number}: format harus 'kode {kuota_level} ({length} digit), kuota'.")
+        if parts[0] in result:
+            raise ValueError(f"Baris {number}: kode {parts[0]} ditulis lebih dari sekali.")
+        result[parts[0]] = int(parts[1])
+    return result
+
+
+def get_kuota_wilayah(kuota_level):
+    """Kuota khusus per wilayah untuk pembagian kuota tertentu, berurutan kode: dict {kode: kuota}."""
+    rows = db.session.execute(
+        select(KuotaWilayah.wilayah_id, KuotaWilayah.kuota)
+        .where(KuotaWilayah.setting_id == SETTING_ID, KuotaWilayah.level == kuota_level)
+        .order_by(KuotaWilayah.wilayah_id)
+    ).all()
+    return dict(rows)
+
+
+def save_settings(passing_grade, kuota, kuota_level=None, kuota_wilayah=None):
+    """
+    Menyimpan pengaturan (versi data 'setting' ikut naik lewat event flush) lalu membuang cache proses ini.
+    kuota_level None = tidak diubah. kuota_wilayah (dict {kode: kuota}) menggantikan seluruh kuota khusus
+    untuk kuota_level tersebut; None = tidak diubah.
+    """
+    seed_setting()
+    setting = db.session.execute(select(Setting).order_by(Setting.id).limit(1)).scalar_one()
+    setting.passing_grade = passing_grade
+    setting.kuota = kuota
+    if kuota_level is not None:
+        setting.kuota_level = kuota_level
+    if kuota_wilayah is not None:
+        level = setting.kuota_level
+        db.session.execute(delete(KuotaWilayah).where(KuotaWilayah.setting_id == setting.id, KuotaWilayah.level == level))
+        db.session.add_all(
+            KuotaWilayah(setting_id=setting.id, level=level, wilayah_id=wilayah_id, kuota=value)
+            for wilayah_id, value in kuota_wilayah.items()
+        )
+        bump_version(SETTING, db.session) # DELETE massal tidak melewati event flush
+    try:
+        db.session.commit()
+    finally:
+        invalidate_settings()
+    return get_settings()
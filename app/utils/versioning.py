@@ -0,0 +1,72 @@
+from sqlalchemy import event, insert, select, update
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.database.models import DataVersion, KuotaWilayah, Penerima, Setting
+
+# Nama penghitung versi per jenis data
+PENERIMA = 'penerima'
+SETTING = 'setting'
+
+# Dialek dengan INSERT ... ON CONFLICT DO UPDATE; dialek lain memakai UPDATE lalu INSERT
+_UPSERT_INSERTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': postgresql_insert,
+}
+
+_MODEL_VERSION_NAMES = {
+    Penerima: PENERIMA,
+    Setting: SETTING,
+    KuotaWilayah: SETTING,
+}
+
+
+def bump_version(name, session=None):
+    """
+    Menaikkan versi data `name` di dalam transaksi session (commit dilakukan pemanggil).
+    Satu statement INSERT ... ON CONFLICT(name) DO UPDATE: dua transaksi yang sama-sama menaikkan nama
+    yang belum punya baris tidak bisa saling gagal di primary key seperti pola UPDATE lalu INSERT.
+    """
+    session = session or db.session
+    dialect_insert = _UPSERT_INSERTS.get(session.get_bind(mapper=DataVersion).dialect.name)
+    if dialect_insert is None:
+        updated = session.execute(
+            update(DataVersion).where(DataVersion.name == name).values(version=DataVersion.version + 1)
+        ).rowcount
+        if not updated:
+            session.execute(insert(DataVersion).values(name=name, version=1))
+        return
+    session.execute(
+        dialect_insert(DataVersion).values(name=name, version=1).on_conflict_do_update(
+            index_elements=[DataVersion.name], set_={'version': DataVersion.version + 1}
+        )
+    )
+
+
+def get_versions(*names):
+    """Versi saat ini untuk setiap nama (0 jika belum pernah dinaikkan), dalam satu query."""
+    rows = dict(db.session.execute(select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(names))).all())
+    return tuple(rows.get(name, 0) for name in names)
+
+
+def data_version():
+    """Versi gabungan data penerima + pengaturan; berubah setiap ada insert/edit/hapus, prediksi massal, atau simpan pengaturan."""
+    return get_versions(PENERIMA, SETTING)
+
+
+def _bump_on_flush(session, flush_context, instances):
+    names = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        name = _MODEL_VERSION_NAMES.get(type(obj))
+        if name and (obj in session.new or obj in session.deleted or session.is_modified(obj)):
+            names.add(name)
+    for name in sorted(names):
+        bump_version(name, session)
+
+
+def init_versioning():
+    """Perubahan lewat ORM (tambah/edit/hapus penerima, simpan pengaturan) otomatis menaikkan versi."""
+    if not event.contains(db.session, 'before_flush', _bump_on_flush):
+        event.listen(db.session, 'before_flush', _bump_on_flush)
@@ -0,0 +1,355 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+import click
+from flask import abort, current_app, request
+from flask.cli import AppGroup
+
+from app.utils.metrics import timed
+
+# ===============================
+# 0. Konfigurasi Data Wilayah
+# ===============================
+APP_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_WILAYAH_DATA_PATH = os.path.join(APP_ROOT_DIR, 'data', 'wilayah.tsv.gz')
+
+# Sumber data hanya dipakai oleh perintah `flask wilayah build`, tidak pernah saat melayani request.
+API_WILAYAH_BASE_URL = "https://www.emsifa.com/api-wilayah-indonesia/api/"
+
+# Panjang ID per tingkat wilayah (format kode Kemendagri yang dipakai EMSIFA).
+# Induk sebuah wilayah adalah prefiks ID-nya pada tingkat di atasnya.
+PANJANG_ID_WILAYAH = {
+    'provinsi': 2,
+    'kabupaten': 4,
+    'kecamatan': 7,
+    'desa': 10,
+}
+REGION_FIELDS = ['provinsi', 'kabupaten', 'kecamatan', 'desa']
+_PANJANG_ID_INDUK = {4: 2, 7: 4, 10: 7}
+
+# Endpoint WILAYAH_API_PREFIX (nama sama dengan EMSIFA) -> panjang ID induk yang diminta
+WILAYAH_API_PREFIX = '/api/wilayah'
+WILAYAH_API_LEVELS = {
+    'regencies': PANJANG_ID_WILAYAH['provinsi'],
+    'districts': PANJANG_ID_WILAYAH['kabupaten'],
+    'villages': PANJANG_ID_WILAYAH['kecamatan'],
+}
+# Urutan preferensi Content-Encoding respons JSON wilayah; 'br' hanya jika paket brotli terpasang
+WILAYAH_JSON_ENCODINGS = ('br', 'gzip')
+DEFAULT_WILAYAH_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# JSON daftar wilayah anak yang sudah dikompresi: etag (hash isi) dan bodies {'identity'|'gzip'|'br': bytes}
+RegionPayload = namedtuple('RegionPayload', ['etag', 'bodies'])
+
+
+def parent_id_of(region_id):
+    """Mengembalikan ID induk dari sebuah ID wilayah, atau None untuk provinsi."""
+    panjang_induk = _PANJANG_ID_INDUK.get(len(region_id))
+    return region_id[:panjang_induk] if panjang_induk else None
+
+
+# ===============================
+# 1. Indeks Wilayah (id -> nama) di Memori
+# ===============================
+class RegionIndex:
+    """
+    Indeks tunggal id -> nama untuk seluruh hierarki provinsi s/d desa.
+    Dimuat sekali dari berkas lokal (TSV terkompresi gzip, satu baris `id<TAB>nama`)
+    sehingga resolusi nama tidak pernah menunggu HTTP.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._children = {}
+        self._ids_by_name = None
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self.path = None
+        self.version = None
+        self.loaded = False
+
+    def init_app(self, app):
+        self.path = app.config.get('WILAYAH_DATA_PATH') or DEFAULT_WILAYAH_DATA_PATH
+        app.extensions['wilayah'] = self
+        app.cli.add_command(wilayah_cli)
+        self.load(self.path, app.logger)
+        if not self.loaded and app.config.get('WILAYAH_DATA_REQUIRED'):
+            raise RuntimeError(f"Data wilayah wajib ada (WILAYAH_DATA_REQUIRED) tetapi {self.path} tidak ditemukan atau kosong. "
+                               f"Bangun dengan `WILAYAH_DATA_REQUIRED=0 flask wilayah build` atau salin artefak `wilayah-data` dari CI.")
+
+    def load(self, path, logger):
+        names = {}
+        children = {}
+        version = None
+        if not os.path.exists(path):
+            # Bukan sekadar peringatan kecil: tanpa berkas ini laporan dan daftar penerima menampilkan kode wilayah
+            # mentah, dan dropdown wilayah di browser memanggil EMSIFA langsung (gagal pada instalasi offline)
+            logger.error(
+                f"DATA WILAYAH TIDAK ADA: {path} tidak ditemukan.\n"
+                f"  - Nama wilayah ditampilkan sebagai kode mentah (laporan, daftar penerima, saran nama).\n"
+                f"  - Dropdown provinsi s/d desa diambil browser langsung dari {API_WILAYAH_BASE_URL}.\n"
+                f"  Jalankan `flask wilayah build` (butuh internet) atau salin artefak `wilayah-data` dari CI ke lokasi tersebut, "
+                f"lalu periksa dengan `flask wilayah verify`. Set WILAYAH_DATA_REQUIRED=1 agar aplikasi menolak start tanpa berkas ini."
+            )
+        else:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            # Versi data = hash berkas; dipakai di URL /api/wilayah agar respons boleh di-cache browser selamanya
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            for line in gzip.decompress(raw).decode('utf-8').splitlines():
+                region_id, _, name = line.partition('\t')
+                if not region_id:
+                    continue
+                names[region_id] = name
+                children.setdefault(parent_id_of(region_id), []).append(region_id)
+            logger.info(f"Data wilayah dimuat: {len(names)} wilayah dari {path}")
+
+        with self._lock:
+            self._names = names
+            self._children = children
+            self._ids_by_name = None
+            self._payloads = {}
+            self.version = version
+            self.loaded = bool(names)
+
+    def resolve(self, region_id):
+        if not region_id:
+            return None
+        return self._names.get(str(region_id))
+
+    def resolve_many(self, ids):
+        """Resolusi massal: mengembalikan dict {id: nama} untuk setiap ID yang dikenal."""
+        names = self._names
+        result = {}
+        for region_id in ids:
+            if region_id:
+                name = names.get(str(region_id))
+                if name is not None:
+                    result[region_id] = name
+        return result
+
+    def children(self, parent_id=None):
+        """Daftar (id, nama) wilayah anak; parent_id=None mengembalikan seluruh provinsi."""
+        names = self._names
+        return [(child_id, names[child_id]) for child_id in self._children.get(parent_id, [])]
+
+    def children_payload(self, parent_id=None):
+        """
+        JSON [{"id", "name"}] wilayah anak (format EMSIFA), dikompresi sekali per induk lalu disimpan,
+        sehingga request berikutnya hanya mengirim bytes yang sudah jadi.
+        """
+        payloads = self._payloads
+        payload = payloads.get(parent_id)
+        if payload is None:
+            items = [{'id': child_id, 'name': name} for child_id, name in self.children(parent_id)]
+            body = json.dumps(items, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            payload = RegionPayload(hashlib.sha256(body).hexdigest()[:32], _compress_payload(body))
+            payloads[parent_id] = payload
+        return payload
+
+    def find_id(self, name, parent_id=None):
+        """
+        Pencarian balik nama -> ID di bawah induk tertentu (dipakai saat impor berkas yang berisi nama wilayah).
+        Nama kabupaten boleh ditulis tanpa awalan 'KABUPATEN'. Mengembalikan None jika tidak dikenal.
+        """
+        ids_by_name = self._ids_by_name
+        if ids_by_name is None:
+            ids_by_name = {}
+            for region_id, region_name in self._names.items():
+                ids_by_name[(parent_id_of(region_id), _normalize_region_name(region_name))] = region_id
+            for region_id, region_name in self._names.items():
+                short_name = _NAME_PREFIX_RE.sub('', _normalize_region_name(region_name))
+                ids_by_name.setdefault((parent_id_of(region_id), short_name), region_id)
+            self._ids_by_name = ids_by_name
+        normalized = _normalize_region_name(name)
+        return ids_by_name.get((parent_id, normalized)) or ids_by_name.get((parent_id, _NAME_PREFIX_RE.sub('', normalized)))
+
+    def __len__(self):
+        return len(self._names)
+
+
+_NAME_PREFIX_RE = re.compile(r'^(KABUPATEN|KAB\.?) ')
+
+
+def _compress_payload(body):
+    # mtime=0 agar hasil gzip (dan ETag-nya) sama di setiap proses
+    bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        bodies['br'] = brotli.compress(body, quality=11)
+    except ImportError:
+        pass
+    return bodies
+
+
+def _normalize_region_name(name):
+    return ' '.join(str(name).upper().split())
+
+
+region_index = RegionIndex()
+
+
+@timed('region_resolve')
+def resolve_region_names(rows):
+    """
+    Menerjemahkan kolom provinsi..desa dari sekumpulan baris (objek Penerima atau dict) menjadi nama,
+    dengan satu kali resolve_many. Mengembalikan list dict {'provinsi': .., ..., 'desa': ..}
+    yang jatuh kembali ke ID aslinya jika nama tidak dikenal.
+    """
+    rows = list(rows)
+    getter = (lambda row, field: row.get(field)) if rows and isinstance(rows[0], dict) else getattr
+    ids = {getter(row, field) for row in rows for field in REGION_FIELDS}
+    names = region_index.resolve_many(ids)
+    return [
+        {field: names.get(getter(row, field), getter(row, field)) for field in REGION_FIELDS}
+        for row in rows
+    ]
+
+
+# ===============================
+# 2. Respons /api/wilayah untuk Dropdown Form
+# ===============================
+def wilayah_api_base_url():
+    """Base URL data dropdown wilayah: /api/wilayah/ jika data lokal tersedia, selain itu EMSIFA langsung."""
+    if region_index.loaded:
+        return f"{request.script_root}{WILAYAH_API_PREFIX}/"
+    return API_WILAYAH_BASE_URL
+
+
+def wilayah_json_response(parent_id=None):
+    """
+    Daftar wilayah anak sebagai JSON terkompresi (brotli/gzip sesuai Accept-Encoding) dengan ETag kuat per encoding.
+    URL dengan ?v=<versi data> di-cache browser selama WILAYAH_CACHE_MAX_AGE (immutable);
+    tanpa versi yang cocok, browser wajib revalidasi dan dijawab 304 jika ETag masih sama.
+    """
+    if not region_index.loaded:
+        abort(503)
+    if parent_id is not None and region_index.resolve(parent_id) is None:
+        abort(404)
+
+    payload = region_index.children_payload(parent_id)
+    encoding = next(
+        (name for name in WILAYAH_JSON_ENCODINGS if name in payload.bodies and request.accept_encodings.quality(name) > 0),
+        'identity'
+    )
+    response = current_app.response_class(payload.bodies[encoding], mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # Representasi terkompresi adalah bytes yang berbeda, jadi ETag kuatnya juga harus berbeda
+    response.set_etag(payload.etag if encoding == 'identity' else f'{payload.etag}-{encoding}')
+    response.cache_control.public = True
+    if request.args.get('v') == region_index.version:
+        response.cache_control.max_age = current_app.config.get('WILAYAH_CACHE_MAX_AGE', DEFAULT_WILAYAH_CACHE_MAX_AGE)
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+# ===============================
+# 3. Perintah CLI: membangun berkas data wilayah dari EMSIFA
+# ===============================
+wilayah_cli = AppGroup('wilayah', help='Kelola data wilayah lokal.')
+
+
+def _fetch_wilayah(session, endpoint, timeout):
+    response = session.get(f"{API_WILAYAH_BASE_URL}{endpoint}", timeout=timeout)
+    response.raise_for_status()
+    return [(str(item['id']), item['name']) for item in response.json()]
+
+
+@wilayah_cli.command('build')
+@click.option('--output', default=None, help='Lokasi berkas keluaran (default: WILAYAH_DATA_PATH).')
+@click.option('--timeout', default=15, show_default=True, help='Batas waktu per request HTTP (detik).')
+def build_wilayah(output, timeout):
+    """Unduh seluruh hierarki wilayah dari EMSIFA sekali dan simpan sebagai berkas lokal."""
+    import requests
+
+    output = output or current_app.config.get('WILAYAH_DATA_PATH') or DEFAULT_WILAYAH_DATA_PATH
+    session = requests.Session()
+    rows = []
+
+    provinces = _fetch_wilayah(session, 'provinces.json', timeout)
+    rows.extend(provinces)
+    for provinsi_id, provinsi_name in provinces:
+        click.echo(f"Mengunduh wilayah {provinsi_name}...")
+        regencies = _fetch_wilayah(session, f'regencies/{provinsi_id}.json', timeout)
+        rows.extend(regencies)
+        for kabupaten_id, _ in regencies:
+            districts = _fetch_wilayah(session, f'districts/{kabupaten_id}.json', timeout)
+            rows.extend(districts)
+            for kecamatan_id, _ in districts:
+                rows.extend(_fetch_wilayah(session, f'villages/{kecamatan_id}.json', timeout))
+
+    write_wilayah_file(rows, output)
+    click.echo(f"{len(rows)} wilayah disimpan ke {output} (sha256 {file_sha256(output)})")
+
+
+def write_wilayah_file(rows, output):
+    """
+    Tulis berkas TSV gzip secara deterministik: baris diurutkan ID, header gzip tanpa nama berkas
+    dan mtime 0. Data sumber yang sama selalu menghasilkan byte (dan versi /api/wilayah) yang sama.
+    """
+    lines = ''.join(f"{region_id}\t{name}\n" for region_id, name in sorted(set(rows)))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, 'wb') as raw, gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as f:
+        f.write(lines.encode('utf-8'))
+    os.replace(tmp_path, output)
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def check_wilayah_rows(rows):
+    """Validasi struktur data wilayah. Mengembalikan (jumlah wilayah per tingkat, daftar pesan kesalahan)."""
+    level_by_length = {length: level for level, length in PANJANG_ID_WILAYAH.items()}
+    counts = dict.fromkeys(REGION_FIELDS, 0)
+    errors = []
+    ids = set()
+    for region_id, name in rows:
+        level = level_by_length.get(len(region_id))
+        if level is None or not region_id.isdigit():
+            errors.append(f"ID tidak valid: {region_id!r}")
+            continue
+        if region_id in ids:
+            errors.append(f"ID ganda: {region_id}")
+        if not name.strip():
+            errors.append(f"Nama kosong: {region_id}")
+        ids.add(region_id)
+        counts[level] += 1
+    for region_id in sorted(ids):
+        parent_id = parent_id_of(region_id)
+        if parent_id is not None and parent_id not in ids:
+            errors.append(f"Induk {parent_id} dari {region_id} tidak ada")
+    errors.extend(f"Tidak ada wilayah tingkat {level}" for level, count in counts.items() if not count)
+    return counts, errors
+
+
+@wilayah_cli.command('verify')
+@click.option('--path', default=None, help='Berkas yang diperiksa (default: WILAYAH_DATA_PATH).')
+@click.option('--sha256', 'expected_sha256', default=None, help='Hash berkas yang diharapkan (build yang dapat diulang).')
+def verify_wilayah(path, expected_sha256):
+    """Periksa berkas data wilayah: format ID, induk setiap wilayah, dan (opsional) hash berkasnya."""
+    path = path or current_app.config.get('WILAYAH_DATA_PATH') or DEFAULT_WILAYAH_DATA_PATH
+    if not os.path.exists(path):
+        raise click.ClickException(f"Berkas data wilayah tidak ditemukan di {path}")
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        rows = [line.rstrip('\n').partition('\t')[::2] for line in f if line.strip()]
+    counts, errors = check_wilayah_rows(rows)
+    sha256 = file_sha256(path)
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        errors.append(f"sha256 {sha256} tidak sama dengan {expected_sha256}")
+    for message in errors[:20]:
+        click.echo(message, err=True)
+    if errors:
+        raise click.ClickException(f"{len(errors)} kesalahan pada {path}")
+    click.echo(', '.join(f"{count} {level}" for level, count in counts.items()) + f"; sha256 {sha256}")
@@ -0,0 +1,287 @@
+"""
+Suite benchmark jalur skor dan laporan pada database SQLite sementara berisi data sintetis.
+
+    python -m benchmarks.run                          # 1k dan 100k baris, dibandingkan dengan baseline
+    python -m benchmarks.run --sizes 1k,100k,1m
+    python -m benchmarks.run --update-baseline        # simpan hasil sebagai baseline baru
+
+Setiap ukuran memakai database dan direktori model baru (salinan model bawaan app/models/knn_model.pkl).
+Hasil dibandingkan dengan benchmarks/baseline.json; exit 1 jika ada yang lebih lambat dari baseline
+melebihi toleransi. Ukuran tanpa baseline hanya dilaporkan.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_SIZES = '1k,100k'
+DEFAULT_TOLERANCE = 0.30 # Lebih lambat > 30% dari baseline = regresi
+# Selisih absolut di bawah batas ini dianggap derau pengukuran. Ditentukan per benchmark karena skalanya
+# berkisar dari puluhan mikrodetik sampai detik; batas tunggal 5 ms membuat regresi predict_individual
+# (~50 µs) tidak pernah terdeteksi. Nilai diambil dari sebaran beberapa run di mesin baseline.
+NOISE_FLOOR_SECONDS = {
+    'predict_individual': 0.00003,
+    'list_penerima': 0.003,
+    'list_penerima_skor': 0.003,
+    'eligible_recipients_cold': 0.005, # Cold: query + resolusi wilayah, sebarannya paling lebar
+    'eligible_recipients_warm': 0.003,
+    'eligible_recipients_desa_cold': 0.005,
+}
+DEFAULT_NOISE_FLOOR_SECONDS = 0.005 # Benchmark ratusan ms s/d detik: toleransi relatif yang menentukan
+INDIVIDUAL_SAMPLES = 200
+KUOTA_PER_DESA = 5 # Kuota default pada benchmark pembagian kuota per desa
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def _median_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+# ===============================
+# 1. Aplikasi & Data Benchmark
+# ===============================
+def make_benchmark_app(workdir, kuota):
+    from config import Config
+
+    from app import create_app, db
+    from app.utils.settings_service import save_settings
+
+    model_dir = os.path.join(workdir, 'models')
+    os.makedirs(model_dir)
+    shutil.copy(os.path.join(REPO_ROOT, 'app', 'models', 'knn_model.pkl'), model_dir)
+
+    class BenchmarkConfig(Config):
+        SECRET_KEY = 'benchmark'
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        MODEL_DIR = model_dir
+        MODEL_WARMUP = 'lazy'
+        REPORT_CACHE_DIR = os.path.join(workdir, 'reports')
+        TESTING = True
+        LOGIN_DISABLED = True # View diukur tanpa alur login
+        DEBUG = False
+
+    app = create_app(BenchmarkConfig)
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+        save_settings(0.5, kuota)
+    return app
+
+
+# ===============================
+# 2. Benchmark per Jalur
+# ===============================
+def bench_individual(app):
+    """Rata-rata satu panggilan predict_individual_status (model dari registry, baris dari database)."""
+    from app import db
+    from app.database.models import Penerima
+    from app.utils.model_handler import load_knn_model, predict_individual_status
+
+    with app.app_context():
+        knn_model = load_knn_model()
+        total = db.session.query(db.func.max(Penerima.id)).scalar()
+        step = max(total // INDIVIDUAL_SAMPLES, 1)
+        penerima_list = [db.session.get(Penerima, penerima_id) for penerima_id in range(1, total + 1, step)]
+        started = time.perf_counter()
+        for penerima in penerima_list:
+            predict_individual_status(penerima, knn_model, 0.5, app.logger)
+        return (time.perf_counter() - started) / len(penerima_list)
+
+
+def bench_mass_predict(app):
+    """Job prediksi massal penuh (semua baris baru perlu dinilai), seperti tombol Prediksi Massal."""
+    from app import db
+    from app.database.models import Job
+    from app.jobs import enqueue_job
+    from app.jobs.worker import run_next_job
+    from app.utils.model_handler import load_knn_model
+
+    with app.app_context():
+        load_knn_model() # Unpickle + kompilasi model tidak ikut diukur
+        job_id = enqueue_job('mass_predict', {'full': True})[0].id
+        started = time.perf_counter()
+        run_next_job()
+        elapsed = time.perf_counter() - started
+        job = db.session.get(Job, job_id)
+        assert job.status == 'completed', f'Prediksi massal gagal: {job.error}'
+        return elapsed
+
+
+def bench_train(app):
+    from app import db
+    from app.utils.model_handler import train_knn_model
+
+    with app.app_context():
+        started = time.perf_counter()
+        train_knn_model(db.session)
+        return time.perf_counter() - started
+
+
+def bench_view(app, path, repeat=5, before=None):
+    client = app.test_client()
+
+    def request_once():
+        if before:
+            before()
+        response = client.get(path)
+        assert response.status_code == 200, f'{path}: HTTP {response.status_code}'
+
+    request_once() # Pemanasan: template, model, cache proses
+    return _median_time(request_once, repeat)
+
+
+def bench_pdf(app):
+    """Render PDF daftar layak tanpa cache; None jika WeasyPrint (beserta pustaka sistemnya) tidak tersedia."""
+    try:
+        import weasyprint # noqa: F401
+    except (ImportError, OSError):
+        return None
+    from app.utils.pdf_report import build_report, report_key
+    from app.utils.ranking import get_eligible_ranking
+    from app.utils.settings_service import get_settings
+
+    with app.test_request_context():
+        setting = get_settings()
+        ranking, _ = get_eligible_ranking(setting.passing_grade, setting.kuota)
+        key = report_key(ranking, setting.passing_grade, setting.kuota)
+        started = time.perf_counter()
+        build_report(ranking, setting.passing_grade, setting.kuota, key)
+        return time.perf_counter() - started
+
+
+def run_size(rows, seed, kuota):
+    """Menjalankan seluruh benchmark untuk satu ukuran data. Mengembalikan dict {nama: detik}."""
+    from app import db
+    from app.utils.ranking import clear_ranking_cache
+    from app.utils.settings_service import save_settings
+
+    from benchmarks.synthetic import insert_penerima
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        app = make_benchmark_app(workdir, kuota)
+        with app.app_context():
+            started = time.perf_counter()
+            insert_penerima(db.session, rows, seed=seed)
+            results['insert_synthetic'] = time.perf_counter() - started
+
+        results['mass_predict'] = bench_mass_predict(app)
+        results['predict_individual'] = bench_individual(app)
+        results['train_knn_model'] = bench_train(app)
+        results['list_penerima'] = bench_view(app, '/petugas/list_penerima')
+        results['list_penerima_skor'] = bench_view(app, '/petugas/list_penerima?sort=skor')
+        results['eligible_recipients_cold'] = bench_view(app, '/petugas/eligible_recipients', before=clear_ranking_cache)
+        results['eligible_recipients_warm'] = bench_view(app, '/petugas/eligible_recipients')
+        with app.app_context():
+            save_settings(0.5, KUOTA_PER_DESA, 'desa')
+        results['eligible_recipients_desa_cold'] = bench_view(app, '/petugas/eligible_recipients', before=clear_ranking_cache)
+        with app.app_context():
+            save_settings(0.5, kuota, 'global')
+        pdf_seconds = bench_pdf(app)
+        if pdf_seconds is not None:
+            results['pdf_report'] = pdf_seconds
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    return results
+
+
+# ===============================
+# 3. Perbandingan dengan Baseline
+# ===============================
+def _format_ms(seconds):
+    ms = seconds * 1000
+    return f"{ms:.3f} ms" if ms < 1 else f"{ms:.1f} ms"
+
+
+def compare(results, baseline, tolerance):
+    """Mencetak tabel perbandingan dan mengembalikan list regresi (ukuran, benchmark, baseline, sekarang)."""
+    regressions = []
+    print(f"{'ukuran':>8}  {'benchmark':<28}{'baseline':>12}{'sekarang':>12}{'perubahan':>11}")
+    for size_label, size_results in results.items():
+        size_baseline = baseline.get(size_label, {})
+        for name, seconds in size_results.items():
+            base = size_baseline.get(name)
+            if base is None:
+                change = 'baru'
+            else:
+                change = f"{(seconds - base) / base * 100:+.0f}%" if base else '-'
+                noise_floor = NOISE_FLOOR_SECONDS.get(name, DEFAULT_NOISE_FLOOR_SECONDS)
+                if seconds > base * (1 + tolerance) and seconds - base > noise_floor:
+                    regressions.append((size_label, name, base, seconds))
+                    change += ' !'
+            base_text = _format_ms(base) if base is not None else '-'
+            print(f"{size_label:>8}  {name:<28}{base_text:>12}{_format_ms(seconds):>12}{change:>11}")
+    return regressions
+
+
+def machine_info():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark prediksi, pelatihan, view daftar, dan laporan PDF pada data sintetis.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Daftar ukuran, mis. 1k,100k,1m.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed generator data (default: seed bawaan).')
+    parser.add_argument('--kuota', type=int, default=500, help='Kuota daftar layak (jumlah baris PDF).')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true', help='Simpan hasil ke berkas baseline (menggabungkan ukuran lain).')
+    args = parser.parse_args(argv)
+
+    from benchmarks.synthetic import DEFAULT_SEED
+
+    seed = DEFAULT_SEED if args.seed is None else args.seed
+    results = {}
+    for size_label in [label.strip().lower() for label in args.sizes.split(',') if label.strip()]:
+        print(f"Menjalankan benchmark {size_label} baris...", flush=True)
+        results[size_label] = run_size(parse_size(size_label), seed, args.kuota)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if baseline.get('machine') and baseline['machine'] != machine_info():
+        print(f"Catatan: baseline diukur di mesin lain ({baseline['machine']}).")
+    if baseline.get('seed', seed) != seed or baseline.get('kuota', args.kuota) != args.kuota:
+        print("Catatan: seed/kuota berbeda dengan baseline; perbandingan tidak setara.")
+
+    print()
+    regressions = compare(results, baseline.get('results', {}), args.tolerance)
+
+    if args.update_baseline:
+        merged = dict(baseline.get('results', {}), **results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_info(), 'seed': seed, 'kuota': args.kuota, 'results': merged}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline disimpan ke {args.baseline}.")
+        return 0
+
+    for size_label, name, base, seconds in regressions:
+        print(f"REGRESI: {name} ({size_label}) {_format_ms(base)} -> {_format_ms(seconds)}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
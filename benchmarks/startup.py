@@ -0,0 +1,107 @@
+"""
+Benchmark cold start: waktu impor + create_app() pada proses Python baru, diukur dengan `python -X importtime`.
+
+    python benchmarks/startup.py                    # 5 kali ulang, anggaran default
+    python benchmarks/startup.py --budget-ms 900    # gagal (exit 1) jika median melewati anggaran
+
+Selain anggaran waktu, benchmark gagal jika modul berat (weasyprint, sklearn, pandas, ...) ikut dimuat saat
+aplikasi mulai: modul-modul itu seharusnya hanya diimpor di dalam fungsi/route yang memakainya.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 1500))
+
+# Tidak boleh ada di sys.modules setelah create_app()
+FORBIDDEN_MODULES = ['weasyprint', 'sklearn', 'scipy', 'pandas', 'joblib', 'openpyxl', 'pypdf', 'requests']
+
+_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+finished = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (finished - imported) * 1000,
+    'forbidden': [name for name in {FORBIDDEN_MODULES!r} if name in sys.modules],
+}}))
+"""
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """Baris `-X importtime` -> dict {paket teratas: waktu sendiri (ms)}, dijumlahkan per paket."""
+    per_package = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            package = match.group(4).split('.')[0]
+            per_package[package] = per_package.get(package, 0.0) + int(match.group(1)) / 1000
+    return per_package
+
+
+def run_once(env):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"create_app gagal:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['packages'] = parse_importtime(completed.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark waktu startup aplikasi (impor + create_app) dengan anggaran regresi.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='Batas median impor + create_app (ms).')
+    parser.add_argument('--top', type=int, default=10, help='Jumlah paket terlambat yang ditampilkan.')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            SECRET_KEY=os.environ.get('SECRET_KEY') or 'benchmark',
+            MODEL_WARMUP='lazy', # Yang diukur adalah create_app, bukan unpickle model
+        )
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    totals = [run['import_ms'] + run['create_app_ms'] for run in runs]
+    median_total = statistics.median(totals)
+    packages = {}
+    for run in runs:
+        for package, ms in run['packages'].items():
+            packages[package] = packages.get(package, 0.0) + ms / len(runs)
+
+    print(f"{'paket':<24}{'impor (ms)':>12}")
+    for package, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<24}{ms:>12.1f}")
+    print()
+    print(f"impor app      median {statistics.median(run['import_ms'] for run in runs):8.1f} ms")
+    print(f"create_app     median {statistics.median(run['create_app_ms'] for run in runs):8.1f} ms")
+    print(f"total          median {median_total:8.1f} ms  (anggaran {args.budget_ms:.0f} ms, {args.runs} kali)")
+
+    failures = []
+    forbidden = sorted({name for run in runs for name in run['forbidden']})
+    if forbidden:
+        failures.append(f"modul berat dimuat saat startup: {', '.join(forbidden)}")
+    if median_total > args.budget_ms:
+        failures.append(f"median {median_total:.1f} ms melewati anggaran {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"GAGAL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Generator data Penerima sintetis yang deterministik (seed yang sama -> baris yang sama) untuk benchmark.
+
+Sebaran kriteria dibuat menyerupai data lapangan: DTKS sekitar separuh, bantuan PKH/BST jauh lebih sering
+pada keluarga DTKS, tidak bekerja berkorelasi dengan kehilangan mata pencaharian, dan jumlah penerima per desa
+tidak merata. Kode wilayah memakai format Kemendagri; jika data wilayah lokal tersedia, desa diambil dari data asli.
+"""
+import numpy as np
+from sqlalchemy import insert
+
+from app.database.models import Penerima
+from app.forms import PEKERJAAN_CHOICES
+from app.utils.model_handler import BATCH_FEATURE_FIELDS, compute_saw_scores, masks_from_feature_matrix
+from app.utils.versioning import PENERIMA, bump_version
+from app.utils.wilayah import region_index
+
+DEFAULT_SEED = 20240601
+DEFAULT_DESA_COUNT = 400
+INSERT_CHUNK_SIZE = 10000
+
+NAMA_DEPAN = [
+    'Siti', 'Budi', 'Sri', 'Agus', 'Dewi', 'Ahmad', 'Nur', 'Eko', 'Wahyu', 'Rina', 'Joko', 'Sutrisno', 'Yanti',
+    'Slamet', 'Suparmi', 'Bambang', 'Tri', 'Endang', 'Heru', 'Sumarni', 'Dwi', 'Puji', 'Rahmat', 'Lestari',
+]
+NAMA_BELAKANG = [
+    'Rahayu', 'Santoso', 'Wati', 'Susanto', 'Hidayat', 'Lestari', 'Pratama', 'Handayani', 'Setiawan', 'Purnomo',
+    'Wibowo', 'Kurniawan', 'Sari', 'Nugroho', 'Utami', 'Saputra', 'Suryani', 'Hartono', 'Maryati', 'Prasetyo',
+]
+# Bobot pekerjaan (urutan PEKERJAAN_CHOICES): PNS, Swasta, Wiraswasta, Petani, Nelayan, Lainnya
+PEKERJAAN_WEIGHTS = [0.03, 0.17, 0.20, 0.30, 0.08, 0.22]
+
+# Peluang dasar tiap kriteria (selain yang dikondisikan di generate_features)
+CRITERIA_RATES = {
+    'dtks': 0.48,
+    'keluarga_miskin_ekstrem': 0.12,
+    'kehilangan_mata_pencaharian': 0.18,
+    'difabel': 0.04,
+    'penyakit_kronis': 0.11,
+    'rumah_tangga_tunggal_lansia': 0.07,
+    'kartu_pra_kerja': 0.06,
+    'bansos_lainnya': 0.14,
+}
+
+
+# ===============================
+# 1. Kriteria
+# ===============================
+def generate_features(rng, n):
+    """Matriks boolean (n x 11) berurutan BATCH_FEATURE_FIELDS."""
+    columns = {field: rng.random(n) < rate for field, rate in CRITERIA_RATES.items()}
+    dtks = columns['dtks']
+    columns['keluarga_miskin_ekstrem'] &= rng.random(n) < np.where(dtks, 1.0, 0.4)
+    columns['tidak_bekerja'] = rng.random(n) < np.where(columns['kehilangan_mata_pencaharian'], 0.65, 0.12)
+    columns['pkh'] = rng.random(n) < np.where(dtks, 0.42, 0.05)
+    columns['bst'] = rng.random(n) < np.where(dtks, 0.28, 0.08)
+    return np.column_stack([columns[field] for field in BATCH_FEATURE_FIELDS])
+
+
+# ===============================
+# 2. Wilayah
+# ===============================
+def _synthetic_desa_ids(rng, count):
+    desa_ids = set()
+    while len(desa_ids) < count:
+        provinsi = rng.choice(['32', '33', '34', '35', '36'])
+        desa_ids.add(f"{provinsi}{rng.integers(1, 30):02d}{rng.integers(1, 25) * 10:03d}{rng.integers(1, 20):03d}")
+    return sorted(desa_ids)
+
+
+def _indexed_desa_ids(rng, count):
+    desa_ids = []
+    for provinsi_id, _ in region_index.children():
+        for kabupaten_id, _ in region_index.children(provinsi_id):
+            for kecamatan_id, _ in region_index.children(kabupaten_id):
+                desa_ids.extend(desa_id for desa_id, _ in region_index.children(kecamatan_id))
+    if len(desa_ids) <= count:
+        return sorted(desa_ids)
+    return sorted(rng.choice(desa_ids, size=count, replace=False).tolist())
+
+
+def desa_pool(rng, count=DEFAULT_DESA_COUNT):
+    """ID desa (10 digit) yang dipakai; provinsi/kabupaten/kecamatan adalah prefiksnya."""
+    desa_ids = _indexed_desa_ids(rng, count) if region_index.loaded else []
+    return desa_ids or _synthetic_desa_ids(rng, count)
+
+
+# ===============================
+# 3. Baris Penerima
+# ===============================
+def generate_penerima(n, seed=DEFAULT_SEED, desa_count=DEFAULT_DESA_COUNT, chunk_size=INSERT_CHUNK_SIZE):
+    """Menghasilkan list dict baris Penerima per chunk, siap untuk INSERT massal."""
+    rng = np.random.default_rng(seed)
+    desa_ids = desa_pool(rng, desa_count)
+    # Ukuran desa tidak merata (mirip Zipf): sebagian kecil desa menampung banyak penerima
+    weights = 1.0 / (np.arange(len(desa_ids)) + 10)
+    weights /= weights.sum()
+    pekerjaan = [value for value, _ in PEKERJAAN_CHOICES]
+
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        features = generate_features(rng, size)
+        masks = masks_from_feature_matrix(features)
+        skor_aktual = compute_saw_scores(features)[0]
+        desa = rng.choice(len(desa_ids), size=size, p=weights)
+        depan = rng.integers(0, len(NAMA_DEPAN), size=size)
+        belakang = rng.integers(0, len(NAMA_BELAKANG), size=size)
+        kerja = rng.choice(len(pekerjaan), size=size, p=PEKERJAAN_WEIGHTS)
+        rows = []
+        for i in range(size):
+            desa_id = desa_ids[desa[i]]
+            row = dict(
+                nama=f"{NAMA_DEPAN[depan[i]]} {NAMA_BELAKANG[belakang[i]]}",
+                provinsi=desa_id[:2], kabupaten=desa_id[:4], kecamatan=desa_id[:7], desa=desa_id,
+                pekerjaan=pekerjaan[kerja[i]],
+                kriteria_mask=int(masks[i]), skor_saw_aktual=int(skor_aktual[i]),
+            )
+            row.update(zip(BATCH_FEATURE_FIELDS, features[i].tolist()))
+            rows.append(row)
+        yield rows
+
+
+def insert_penerima(session, n, seed=DEFAULT_SEED, desa_count=DEFAULT_DESA_COUNT, chunk_size=INSERT_CHUNK_SIZE):
+    """INSERT massal n baris sintetis (kolom denormalisasi diisi langsung, seperti impor berkas). Mengembalikan jumlah baris."""
+    inserted = 0
+    for rows in generate_penerima(n, seed, desa_count, chunk_size):
+        session.execute(insert(Penerima), rows)
+        bump_version(PENERIMA, session)
+        session.commit()
+        inserted += len(rows)
+    return inserted
@@ -9,3 +9,77 @@ class Config:
     # Konfigurasi database
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Tuning SQLite (app/database/engine.py): PRAGMA yang dijalankan pada setiap koneksi baru
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'True').lower() in ('true', '1', 'yes')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000)) # Tunggu kunci tulis sebelum "database is locked"
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536)) # Cache halaman per koneksi
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', 256))
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+    SQLITE_JOURNAL_SIZE_LIMIT_MB = int(os.environ.get('SQLITE_JOURNAL_SIZE_LIMIT_MB', 64)) # Batas ukuran berkas -wal setelah checkpoint
+    # Pool koneksi per proses web (thread); proses worker/shard memakai pool kecil sendiri
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 10))
+    SQLITE_MAX_OVERFLOW = int(os.environ.get('SQLITE_MAX_OVERFLOW', 10))
+    SQLITE_POOL_TIMEOUT = int(os.environ.get('SQLITE_POOL_TIMEOUT', 30)) # detik
+    # Engine baca-saja terpisah (PRAGMA query_only) untuk query laporan/ranking
+    SQLITE_READ_ENGINE = os.environ.get('SQLITE_READ_ENGINE', 'False').lower() in ('true', '1', 'yes')
+    # Cache pengaturan per proses: perubahan dari proses lain terbaca paling lambat setelah interval ini (detik)
+    SETTINGS_CHECK_INTERVAL = float(os.environ.get('SETTINGS_CHECK_INTERVAL', 2.0))
+    # Cache hasil cek kelayakan individu: 'memory' (per proses) atau 'sqlite' (berkas lokal bersama antar proses web)
+    RESULT_CACHE_BACKEND = os.environ.get('RESULT_CACHE_BACKEND', 'memory')
+    RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH') # default: instance/result_cache.sqlite
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 10000))
+    RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 600)) # detik
+    RESULT_TOKEN_MAX_AGE = int(os.environ.get('RESULT_TOKEN_MAX_AGE', 900)) # Umur token hasil pada URL redirect (detik)
+    # Berkas data wilayah lokal (dibuat dengan `flask wilayah build`)
+    WILAYAH_DATA_PATH = os.environ.get('WILAYAH_DATA_PATH')
+    # True = aplikasi menolak start jika berkas data wilayah tidak ada (disarankan di produksi)
+    WILAYAH_DATA_REQUIRED = os.environ.get('WILAYAH_DATA_REQUIRED', 'False').lower() in ('true', '1', 'yes')
+    # Umur cache browser untuk /api/wilayah/...?v=<versi data> (detik); versi berubah setiap data wilayah dibangun ulang
+    WILAYAH_CACHE_MAX_AGE = int(os.environ.get('WILAYAH_CACHE_MAX_AGE', 365 * 24 * 3600))
+    # Prediksi massal menilai satu kali per profil kriteria (kriteria_mask) lalu satu UPDATE per mask;
+    # commit dilakukan setiap kurang lebih sekian baris
+    MASS_PREDICT_CHUNK_SIZE = int(os.environ.get('MASS_PREDICT_CHUNK_SIZE', 5000))
+    # Antrean job latar belakang (prediksi massal, pelatihan model)
+    JOB_WORKER_PROCESSES = int(os.environ.get('JOB_WORKER_PROCESSES', 2))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0)) # detik
+    JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 300)) # detik tanpa heartbeat sebelum job dianggap mati
+    JOB_STALE_CHECK_INTERVAL = float(os.environ.get('JOB_STALE_CHECK_INTERVAL', 60)) # detik antar pemeriksaan job mati oleh worker yang berjalan
+    JOB_SUPERVISE_INTERVAL = float(os.environ.get('JOB_SUPERVISE_INTERVAL', 5)) # detik antar pemeriksaan proses worker yang keluar
+    JOB_HEARTBEAT_INTERVAL = float(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30)) # detik; ditulis thread terpisah selama job berjalan
+    # Progres job: worker menulis progres tiap N baris atau T milidetik; stream SSE mengirim paling sering tiap interval
+    JOB_PROGRESS_EVERY_ROWS = int(os.environ.get('JOB_PROGRESS_EVERY_ROWS', 1000))
+    JOB_PROGRESS_INTERVAL_MS = int(os.environ.get('JOB_PROGRESS_INTERVAL_MS', 500))
+    PROGRESS_STREAM_INTERVAL = float(os.environ.get('PROGRESS_STREAM_INTERVAL', 1.0)) # detik
+    # Laporan PDF: cache berkas di disk (default: instance/reports), render per chunk baris secara paralel
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+    REPORT_CACHE_MAX_FILES = int(os.environ.get('REPORT_CACHE_MAX_FILES', 50))
+    REPORT_INLINE_MAX_ROWS = int(os.environ.get('REPORT_INLINE_MAX_ROWS', 200)) # Laporan kecil dirender langsung di request
+    REPORT_CHUNK_ROWS = int(os.environ.get('REPORT_CHUNK_ROWS', 500))
+    REPORT_RENDER_WORKERS = int(os.environ.get('REPORT_RENDER_WORKERS', 2))
+    # Impor berkas penerima (xlsx/csv): jumlah baris per transaksi INSERT dan batas ukuran unggahan
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 2000))
+    IMPORT_MAX_UPLOAD_MB = int(os.environ.get('IMPORT_MAX_UPLOAD_MB', 20))
+    # Ekspor CSV/XLSX: jumlah baris yang dibaca dari cursor database per batch
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 2000))
+    # Registry model KNN: berkas versi di MODEL_DIR/versions, versi aktif ditunjuk oleh MODEL_DIR/ACTIVE.json
+    MODEL_DIR = os.environ.get('MODEL_DIR') # default: app/models
+    MODEL_KEEP_VERSIONS = int(os.environ.get('MODEL_KEEP_VERSIONS', 5))
+    # Model terkompilasi: prediksi KNN dari tabel 2^10 hasil yang dihitung sekali per versi (tanpa sklearn di jalur request)
+    MODEL_COMPILED = os.environ.get('MODEL_COMPILED', 'True').lower() in ('true', '1', 'yes')
+    # Kapan model dimuat saat proses mulai: 'background' (thread, tidak menahan create_app), 'lazy' (request pertama), 'eager'
+    MODEL_WARMUP = os.environ.get('MODEL_WARMUP', 'background')
+    # Pelatihan model: baris dibaca per chunk; validasi silang k & metrik jarak memakai n_jobs proses (-1 = semua core)
+    TRAIN_CHUNK_SIZE = int(os.environ.get('TRAIN_CHUNK_SIZE', 50000))
+    TRAIN_N_JOBS = int(os.environ.get('TRAIN_N_JOBS', -1))
+    # Metrik Prometheus di /metrics (per proses): hanya dengan header "Authorization: Bearer <METRICS_TOKEN>".
+    # METRICS_ALLOWED_IPS (opsional) membuka akses tanpa token dari alamat tertentu; di belakang reverse proxy
+    # remote_addr selalu alamat proxy, jadi jangan isi 127.0.0.1 di sana.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Header Server-Timing (waktu app & DB per request) selalu dikirim ke admin; True = kirim ke semua respons
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    # Profiling per request untuk admin (header "X-Profile: 1" atau "X-Profile: pyinstrument"); dump cProfile di PROFILE_DIR
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') # default: instance/profiles
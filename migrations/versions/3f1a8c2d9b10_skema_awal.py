@@ -0,0 +1,75 @@
+"""skema awal: user, setting, penerima
+
+Revision ID: 3f1a8c2d9b10
+Revises: 
+Create Date: 2026-10-18 14:00:00.000000
+
+Database yang sudah dibuat dengan db.create_all() sebelum migrasi ada cukup ditandai
+dengan `flask db stamp 3f1a8c2d9b10`, lalu `flask db upgrade`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a8c2d9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+PENERIMA_INDEXED_COLUMNS = ['nama', 'provinsi', 'kabupaten', 'kecamatan', 'desa', 'pekerjaan', 'dtks']
+KRITERIA_COLUMNS = [
+    'keluarga_miskin_ekstrem', 'kehilangan_mata_pencaharian', 'tidak_bekerja', 'difabel', 'penyakit_kronis',
+    'rumah_tangga_tunggal_lansia', 'pkh', 'kartu_pra_kerja', 'bst', 'bansos_lainnya',
+]
+
+
+def upgrade():
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=64), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=256), nullable=True),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_user_username', 'user', ['username'], unique=True)
+    op.create_index('ix_user_email', 'user', ['email'], unique=True)
+
+    op.create_table(
+        'setting',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('passing_grade', sa.Float(), nullable=False),
+        sa.Column('kuota', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'penerima',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nama', sa.String(length=150), nullable=False),
+        sa.Column('provinsi', sa.String(length=100), nullable=False),
+        sa.Column('kabupaten', sa.String(length=100), nullable=False),
+        sa.Column('kecamatan', sa.String(length=100), nullable=False),
+        sa.Column('desa', sa.String(length=100), nullable=False),
+        sa.Column('pekerjaan', sa.String(length=100), nullable=False),
+        sa.Column('dokumen_pendukung_path', sa.String(length=255), nullable=True),
+        sa.Column('dtks', sa.Boolean(), nullable=False),
+        *(sa.Column(column, sa.Boolean(), nullable=False) for column in KRITERIA_COLUMNS),
+        sa.Column('skor_saw_ternormalisasi', sa.Float(), nullable=True),
+        sa.Column('status_kelayakan_knn', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    for column in PENERIMA_INDEXED_COLUMNS:
+        op.create_index(f'ix_penerima_{column}', 'penerima', [column], unique=False)
+
+
+def downgrade():
+    for column in PENERIMA_INDEXED_COLUMNS:
+        op.drop_index(f'ix_penerima_{column}', table_name='penerima')
+    op.drop_table('penerima')
+    op.drop_table('setting')
+    op.drop_index('ix_user_email', table_name='user')
+    op.drop_index('ix_user_username', table_name='user')
+    op.drop_table('user')
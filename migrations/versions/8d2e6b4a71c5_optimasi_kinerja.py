@@ -0,0 +1,150 @@
+"""optimasi kinerja: antrean job, versi data, kuota per wilayah, index FTS nama, kolom denormalisasi penerima
+
+Revision ID: 8d2e6b4a71c5
+Revises: 3f1a8c2d9b10
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e6b4a71c5'
+down_revision = '3f1a8c2d9b10'
+branch_labels = None
+depends_on = None
+
+# Salinan SEARCH_DDL di app/utils/penerima_search.py pada saat migrasi ini dibuat
+_WILAYAH_TOKENS = " || ' ' || ".join(
+    f"'{prefix}' || replace(coalesce({{alias}}.{field}, ''), '.', '')"
+    for field, prefix in (('provinsi', 'p'), ('kabupaten', 'k'), ('kecamatan', 'c'), ('desa', 'd'))
+)
+SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS penerima_fts USING fts5(
+        nama, wilayah, tokenize = "unicode61 remove_diacritics 2", prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS penerima_fts_ai AFTER INSERT ON penerima BEGIN
+        INSERT INTO penerima_fts(rowid, nama, wilayah) VALUES (new.id, new.nama, {_WILAYAH_TOKENS.format(alias='new')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS penerima_fts_ad AFTER DELETE ON penerima BEGIN
+        DELETE FROM penerima_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS penerima_fts_au AFTER UPDATE OF nama, provinsi, kabupaten, kecamatan, desa ON penerima BEGIN
+        UPDATE penerima_fts SET nama = new.nama, wilayah = {_WILAYAH_TOKENS.format(alias='new')} WHERE rowid = old.id;
+    END""",
+]
+SEARCH_BACKFILL = f"INSERT INTO penerima_fts(rowid, nama, wilayah) SELECT id, nama, {_WILAYAH_TOKENS.format(alias='penerima')} FROM penerima"
+
+# Salinan BATCH_FEATURE_FIELDS dan SAW_WEIGHTS (app/utils/model_handler.py): bit = 1 << indeks kolom
+_KRITERIA_BOBOT = [
+    ('dtks', 10),
+    ('keluarga_miskin_ekstrem', 1), ('kehilangan_mata_pencaharian', 1), ('tidak_bekerja', 1),
+    ('difabel', 1), ('penyakit_kronis', 1), ('rumah_tangga_tunggal_lansia', 1),
+    ('pkh', -1), ('kartu_pra_kerja', -1), ('bst', -1), ('bansos_lainnya', -1),
+]
+
+
+def _backfill_kriteria_mask():
+    """Isi kriteria_mask dan skor_saw_aktual baris lama dalam satu UPDATE (rumus sama dengan kriteria_mask_sql)."""
+    penerima = sa.table(
+        'penerima', sa.column('kriteria_mask', sa.Integer), sa.column('skor_saw_aktual', sa.Integer),
+        *(sa.column(field, sa.Boolean) for field, _ in _KRITERIA_BOBOT)
+    )
+    mask = sum(sa.case((penerima.c[field], 1 << index), else_=0) for index, (field, _) in enumerate(_KRITERIA_BOBOT))
+    skor = sum(sa.case((penerima.c[field], bobot), else_=0) for field, bobot in _KRITERIA_BOBOT)
+    op.execute(penerima.update().values(kriteria_mask=mask, skor_saw_aktual=sa.case((skor < 0, 0), else_=skor)))
+
+
+def upgrade():
+    with op.batch_alter_table('setting') as batch_op:
+        batch_op.add_column(sa.Column('kuota_level', sa.String(length=20), server_default='global', nullable=False))
+
+    with op.batch_alter_table('penerima') as batch_op:
+        batch_op.add_column(sa.Column('kriteria_mask', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('skor_saw_aktual', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('perlu_dinilai_ulang', sa.Boolean(), server_default=sa.true(), nullable=False))
+        batch_op.add_column(sa.Column('skor_model_versi', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('skor_passing_grade', sa.Float(), nullable=True))
+    _backfill_kriteria_mask()
+    op.create_index('ix_penerima_kriteria_mask', 'penerima', ['kriteria_mask'], unique=False)
+    op.create_index('ix_penerima_skor_id', 'penerima', [sa.text('coalesce(skor_saw_ternormalisasi, -1.0)'), 'id'], unique=False)
+    op.create_index('ix_penerima_dinilai_ulang_mask', 'penerima', ['perlu_dinilai_ulang', 'kriteria_mask'], unique=False)
+    op.create_index('ix_penerima_desa_status_skor', 'penerima',
+                    ['desa', 'status_kelayakan_knn', sa.text('skor_saw_ternormalisasi DESC')], unique=False)
+
+    op.create_table(
+        'kuota_wilayah',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('setting_id', sa.Integer(), nullable=False),
+        sa.Column('level', sa.String(length=20), nullable=False),
+        sa.Column('wilayah_id', sa.String(length=100), nullable=False),
+        sa.Column('kuota', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['setting_id'], ['setting.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('setting_id', 'level', 'wilayah_id', name='ux_kuota_wilayah'),
+    )
+
+    op.create_table(
+        'data_version',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+    op.create_table(
+        'job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+        sa.Column('worker_pid', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_job_type', 'job', ['job_type'], unique=False)
+    op.create_index('ix_job_status', 'job', ['status'], unique=False)
+    op.create_index('ux_job_aktif_per_jenis', 'job', ['job_type'], unique=True,
+                    sqlite_where=sa.text("status IN ('queued', 'processing')"),
+                    postgresql_where=sa.text("status IN ('queued', 'processing')"))
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SEARCH_DDL:
+            op.execute(statement)
+        op.execute(SEARCH_BACKFILL)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for name in ('penerima_fts_au', 'penerima_fts_ad', 'penerima_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        op.execute('DROP TABLE IF EXISTS penerima_fts')
+
+    op.drop_index('ux_job_aktif_per_jenis', table_name='job')
+    op.drop_index('ix_job_status', table_name='job')
+    op.drop_index('ix_job_job_type', table_name='job')
+    op.drop_table('job')
+    op.drop_table('data_version')
+    op.drop_table('kuota_wilayah')
+
+    op.drop_index('ix_penerima_desa_status_skor', table_name='penerima')
+    op.drop_index('ix_penerima_dinilai_ulang_mask', table_name='penerima')
+    op.drop_index('ix_penerima_skor_id', table_name='penerima')
+    op.drop_index('ix_penerima_kriteria_mask', table_name='penerima')
+    with op.batch_alter_table('penerima') as batch_op:
+        batch_op.drop_column('skor_passing_grade')
+        batch_op.drop_column('skor_model_versi')
+        batch_op.drop_column('perlu_dinilai_ulang')
+        batch_op.drop_column('skor_saw_aktual')
+        batch_op.drop_column('kriteria_mask')
+
+    with op.batch_alter_table('setting') as batch_op:
+        batch_op.drop_column('kuota_level')
@@ -0,0 +1,25 @@
+"""index ranking kuota per kecamatan
+
+Revision ID: b47c0e93d5a2
+Revises: 8d2e6b4a71c5
+Create Date: 2026-10-18 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47c0e93d5a2'
+down_revision = '8d2e6b4a71c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_penerima_kecamatan_status_skor', 'penerima',
+                    ['kecamatan', 'status_kelayakan_knn', sa.text('skor_saw_ternormalisasi DESC')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_penerima_kecamatan_status_skor', table_name='penerima')
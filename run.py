@@ -1,6 +1,14 @@
+import os
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=app.config.get('DEBUG', True))
\ No newline at end of file
+    from app.jobs.worker import start_worker_pool, stop_worker_pool
+    # Mode pengembangan: worker job ikut dijalankan. Di produksi jalankan `flask jobs worker` terpisah.
+    # Proses anak reloader (WERKZEUG_RUN_MAIN) tidak menjalankan worker lagi.
+    pool = [] if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' else start_worker_pool(app)
+    try:
+        app.run(debug=app.config.get('DEBUG', True))
+    finally:
+        stop_worker_pool(pool)
@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+BUNDLED_MODEL_PATH = os.path.join(REPO_ROOT, 'app', 'models', 'knn_model.pkl')
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplikasi dengan database SQLite dan direktori model sementara (salinan model bawaan)."""
+    from config import Config
+
+    from app import create_app, db
+
+    model_dir = tmp_path / 'models'
+    model_dir.mkdir()
+    shutil.copy(BUNDLED_MODEL_PATH, model_dir)
+
+    class TestConfig(Config):
+        SECRET_KEY = 'test'
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        MODEL_DIR = str(model_dir)
+        MODEL_WARMUP = 'lazy'
+        REPORT_CACHE_DIR = str(tmp_path / 'reports')
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        DEBUG = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
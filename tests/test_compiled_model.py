@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.utils import model_registry as registry_module
+from app.utils.compiled_model import CompiledKNNModel, all_feature_patterns, compile_model, load_model_file, lut_path_for
+from app.utils.model_registry import model_registry
+
+BUNDLED_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'app', 'models', 'knn_model.pkl')
+
+
+@pytest.fixture
+def knn_model():
+    return load_model_file(BUNDLED_MODEL_PATH, compiled=False)
+
+
+def test_lut_sama_dengan_model_untuk_semua_kode(knn_model):
+    compiled = compile_model(knn_model)
+    codes = np.arange(1 << knn_model.n_features_in_)
+
+    assert compiled.table.shape == (1024,)
+    np.testing.assert_array_equal(compiled.predict_codes(codes), knn_model.predict(all_feature_patterns(knn_model.n_features_in_)))
+
+
+def test_publish_menyimpan_lut_yang_sudah_diverifikasi(app, knn_model):
+    version = model_registry.publish(knn_model)
+
+    assert model_registry.active_version() == version
+    assert os.path.exists(lut_path_for(model_registry.version_path(version)))
+
+
+def test_publish_menolak_lut_yang_tidak_cocok(app, knn_model, monkeypatch):
+    active_before = model_registry.active_version()
+    monkeypatch.setattr(registry_module, 'compile_model', lambda model: CompiledKNNModel(1 - compile_model(model).table))
+
+    with pytest.raises(ValueError, match='1024 kode fitur'):
+        model_registry.publish(knn_model)
+    assert model_registry.active_version() == active_before
@@ -0,0 +1,53 @@
+import io
+
+from app import db
+from app.database.models import Penerima
+from app.utils.importer import BOOLEAN_FIELDS, TEXT_FIELDS, ImportReport, coerce_chunk, import_penerima
+
+COLUMNS = TEXT_FIELDS + BOOLEAN_FIELDS
+
+
+def _row(nilai, nama='Siti Rahayu'):
+    return (nama, 'Petani', '34', '3404', '3404010', '3404010001') + (nilai,) * len(BOOLEAN_FIELDS)
+
+
+def test_coerce_chunk_menerima_angka_float_dari_xlsx():
+    # Kolom 0/1 dengan sel kosong dibaca pandas sebagai float (1.0, NaN, 0.0)
+    report = ImportReport()
+    frame = coerce_chunk([_row(1), _row(None), _row(0), _row(1.0), _row('0.0')], COLUMNS, [2, 3, 4, 5, 6], report)
+
+    assert report.errors == []
+    assert len(frame) == 5
+    assert frame['dtks'].tolist() == [True, False, False, True, False]
+
+
+def test_coerce_chunk_menolak_angka_lain():
+    report = ImportReport()
+    frame = coerce_chunk([_row(2), _row(1.5)], COLUMNS, [2, 3], report)
+
+    assert frame.empty
+    assert [row_number for row_number, _ in report.errors] == [2, 3]
+
+
+def test_nomor_baris_galat_mengikuti_baris_berkas_setelah_baris_kosong(app):
+    lines = [','.join(COLUMNS), ','.join(map(str, _row('Ya'))), ',' * (len(COLUMNS) - 1), ',' * (len(COLUMNS) - 1),
+             ','.join(map(str, _row('Mungkin'))), ','.join(map(str, _row('Tidak')))]
+    stream = io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+    report = import_penerima(stream, 'data.csv', chunk_size=2)
+
+    assert report.inserted == 2
+    assert [row_number for row_number, _ in report.errors] == [5]
+
+
+def test_baris_yang_diberi_skor_saat_impor_tidak_dinilai_ulang(app):
+    from app.utils.model_registry import model_registry
+
+    stream = io.BytesIO('\n'.join([','.join(COLUMNS), ','.join(map(str, _row('Ya')))]).encode('utf-8'))
+    report = import_penerima(stream, 'data.csv', score=True)
+
+    penerima = db.session.execute(db.select(Penerima)).scalar_one()
+    assert report.scored == 1
+    assert penerima.perlu_dinilai_ulang is False
+    assert penerima.skor_model_versi == model_registry.active_version()
+    assert penerima.skor_passing_grade is not None
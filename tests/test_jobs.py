@@ -0,0 +1,80 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.database.models import Job
+from app.jobs import enqueue_job
+from app.jobs import worker
+from app.jobs.queue import claim_next_job, requeue_stale_jobs
+from app.jobs.tasks import TASKS
+
+
+def test_claim_mengambil_job_tertua_dan_menandai_worker(app):
+    pertama, _ = enqueue_job('uji_a')
+    enqueue_job('uji_b')
+
+    job_id, job_type, params = claim_next_job()
+
+    assert (job_id, job_type, params) == (pertama.id, 'uji_a', {})
+    db.session.refresh(pertama)
+    assert (pertama.status, pertama.worker_pid) == ('processing', os.getpid())
+    assert claim_next_job(['uji_a']) is None
+
+
+def test_hanya_satu_job_aktif_per_jenis(app):
+    job, created = enqueue_job('uji', {'n': 1})
+    claim_next_job()
+    sama, created_lagi = enqueue_job('uji', {'n': 2})
+
+    assert created and not created_lagi
+    assert sama.id == job.id
+    db.session.add(Job(job_type='uji', status='queued'))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_job_tanpa_heartbeat_dikembalikan_ke_antrean(app):
+    job, _ = enqueue_job('uji')
+    claim_next_job()
+    assert requeue_stale_jobs(300) == 0
+
+    job.heartbeat_at = datetime.now() - timedelta(seconds=301)
+    db.session.commit()
+
+    assert requeue_stale_jobs(300) == 1
+    db.session.refresh(job)
+    assert (job.status, job.worker_pid) == ('queued', None)
+
+
+def test_worker_berjalan_mengambil_alih_job_dari_worker_yang_mati(app, monkeypatch):
+    stop = threading.Event()
+    jalan = []
+
+    def task(ctx):
+        jalan.append(ctx.job_id)
+        stop.set()
+        return {'ok': True}
+
+    monkeypatch.setitem(TASKS, 'uji', task)
+    sleeps = []
+
+    def sleep(seconds):
+        # Antrean kosong pada poll pertama; sesudahnya worker lain "mati" meninggalkan job processing yang basi
+        if not sleeps:
+            job, _ = enqueue_job('uji')
+            claim_next_job()
+            job.heartbeat_at = datetime.now() - timedelta(seconds=600)
+            db.session.commit()
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(worker.time, 'sleep', sleep)
+    worker.run_worker(poll_interval=0, stale_after=300, stop_event=stop, stale_check_interval=0)
+
+    job = db.session.get(Job, jalan[0])
+    db.session.refresh(job)
+    assert job.status == 'completed'
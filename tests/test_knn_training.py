@@ -0,0 +1,21 @@
+import warnings
+
+import numpy as np
+
+from app.utils import knn_training
+from app.utils.compiled_model import compile_model
+from app.utils.model_handler import predict_batch_status
+
+
+def test_model_jaccard_tanpa_data_conversion_warning(app, monkeypatch):
+    monkeypatch.setattr(knn_training, 'KNN_SEARCH_METRICS', ['jaccard'])
+    counts = np.random.default_rng(0).integers(0, 5, size=(1024, 2))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        knn, params, _ = knn_training.search_knn(counts, n_jobs=1)
+        knn_training.weighted_scores(knn, counts)
+        compile_model(knn)
+        predict_batch_status(np.ones((3, 11), dtype=bool), knn, app.logger)
+
+    assert params['metric'] == 'jaccard'
@@ -0,0 +1,44 @@
+def test_metrics_tertutup_tanpa_token_meski_dari_localhost(app):
+    response = app.test_client().get('/metrics', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+
+    assert response.status_code == 404
+
+
+def test_metrics_dengan_token(app):
+    app.config['METRICS_TOKEN'] = 'rahasia'
+    client = app.test_client()
+
+    assert client.get('/metrics', headers={'Authorization': 'Bearer salah'}).status_code == 404
+    response = client.get('/metrics', headers={'Authorization': 'Bearer rahasia'})
+    assert response.status_code == 200
+    assert b'bansos_' in response.data
+
+
+
+def _get(app, client, url):
+    # Context app baru per request: g (termasuk user login yang di-cache Flask-Login) tidak terbawa antar klien
+    with app.app_context():
+        return client.get(url)
+
+
+def _login(app, role):
+    from app import db
+    from app.database.models import User
+
+    user = User(username=role, email=f'{role}@contoh.id', role=role)
+    user.set_password('rahasia123')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    with app.app_context():
+        assert client.post('/login', data={'username': role, 'password': 'rahasia123'}).status_code == 302
+    return client
+
+
+def test_server_timing_hanya_untuk_admin(app):
+    assert 'Server-Timing' not in _get(app, app.test_client(), '/login').headers
+    assert 'Server-Timing' not in _get(app, _login(app, 'petugas'), '/petugas/dashboard').headers
+    assert 'Server-Timing' in _get(app, _login(app, 'admin'), '/admin/dashboard').headers
+
+    app.config['SERVER_TIMING_ENABLED'] = True
+    assert 'Server-Timing' in _get(app, app.test_client(), '/login').headers
@@ -0,0 +1,28 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.utils.compiled_model import all_feature_patterns, load_model_file
+from app.utils.model_handler import BATCH_FEATURE_FIELDS, predict_batch_status, predict_individual_status
+
+BUNDLED_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'app', 'models', 'knn_model.pkl')
+
+
+def _penerima(features):
+    return SimpleNamespace(
+        nama='Siti Rahayu', provinsi='34', kabupaten='3404', kecamatan='3404010', desa='3404010001',
+        **dict(zip(BATCH_FEATURE_FIELDS, map(bool, features)))
+    )
+
+
+def test_prediksi_batch_sama_dengan_individual_untuk_semua_pola(app):
+    model = load_model_file(BUNDLED_MODEL_PATH, compiled=False)
+    patterns = all_feature_patterns(len(BATCH_FEATURE_FIELDS)).astype(bool)
+
+    skor_batch, status_batch = predict_batch_status(patterns, model, app.logger)
+
+    for features, skor, status in zip(patterns, skor_batch, status_batch):
+        hasil = predict_individual_status(_penerima(features), model, 0.5, app.logger)
+        assert (hasil['skor_saw_ternormalisasi'], hasil['status_kelayakan_knn']) == (skor, status), features.astype(int)
+    assert len(np.unique(status_batch)) == 2
@@ -0,0 +1,94 @@
+import pytest
+
+
+def _get(app, client, url, **kwargs):
+    # Context app baru per request: g (termasuk user login yang di-cache Flask-Login) tidak terbawa antar klien
+    with app.app_context():
+        return client.get(url, **kwargs)
+
+
+def _login(app, role):
+    from app import db
+    from app.database.models import User
+
+    user = User(username=role, email=f'{role}@contoh.id', role=role)
+    user.set_password('rahasia123')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    with app.app_context():
+        assert client.post('/login', data={'username': role, 'password': 'rahasia123'}).status_code == 302
+    return client
+
+
+@pytest.fixture
+def warga(app):
+    from app import db
+    from app.database.models import Penerima
+
+    rows = [
+        ('Budi Santoso', '34.04.01.2001'),
+        ('Budi Santoso', '34.04.01.2002'),
+        ('Budiman', '34.04.01.2001'),
+        ('Siti Aminah', '34.04.02.2001'),
+    ]
+    for nama, desa in rows:
+        db.session.add(Penerima(nama=nama, provinsi='34', kabupaten='34.04', kecamatan=desa[:8], desa=desa,
+                                pekerjaan='Petani'))
+    db.session.commit()
+
+
+def test_autocomplete_publik_butuh_wilayah_dan_tiga_huruf(app, warga):
+    client = app.test_client()
+
+    assert _get(app, client, '/api/cari_nama?q=Budi').get_json()['hasil'] == []
+    assert _get(app, client, '/api/cari_nama?q=Bu&kecamatan=34.04.01').get_json()['hasil'] == []
+
+    response = _get(app, client, '/api/cari_nama?q=Bud&kecamatan=34.04.01')
+    hasil = response.get_json()['hasil']
+    assert sorted(item['nama'] for item in hasil) == ['Budi Santoso', 'Budi Santoso', 'Budiman']
+    assert all('id' not in item for item in hasil)
+    assert response.headers['Cache-Control'] == 'private, no-store'
+
+
+def test_autocomplete_petugas_menyertakan_id_dan_wajib_login(app, warga):
+    assert _get(app, app.test_client(), '/petugas/api/cari_nama?q=Bu').status_code == 302
+
+    response = _get(app, _login(app, 'petugas'), '/petugas/api/cari_nama?q=Bu')
+    hasil = response.get_json()['hasil']
+    assert len(hasil) == 3
+    assert all(isinstance(item['id'], int) for item in hasil)
+    assert response.headers['Cache-Control'] == 'private, no-store'
+
+
+def _post(app, client, url, data):
+    with app.app_context():
+        return client.post(url, data=data)
+
+
+def test_kandidat_cek_kelayakan_dibawa_di_url_bukan_session(app, warga):
+    client = app.test_client()
+
+    response = _post(app, client, '/', {'nama': 'Budi Santoso'})
+    assert response.status_code == 302
+    assert 'cari=Budi+Santoso' in response.location
+    with client.session_transaction() as session:
+        assert 'kandidat_penerima' not in session
+
+    page = _get(app, client, response.location).get_data(as_text=True)
+    assert 'value="34.04.01.2001"' in page and 'value="34.04.01.2002"' in page
+    assert 'name="penerima_id" value="' not in page
+
+    # Memilih kandidat = mengirim ulang nama dengan desanya
+    response = _post(app, client, '/', {'nama': 'Budi Santoso', 'desa': '34.04.01.2002'})
+    assert 'hasil=' in response.location
+
+
+def test_saran_nama_mirip_di_halaman_publik_butuh_wilayah(app, warga):
+    client = app.test_client()
+
+    response = _post(app, client, '/', {'nama': 'Bud'})
+    assert 'cari=' not in response.location
+
+    response = _post(app, client, '/', {'nama': 'Bud', 'kecamatan': '34.04.01'})
+    assert 'cari=Bud' in response.location and 'kecamatan=34.04.01' in response.location
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from app import db
+from app.database.models import Penerima
+from app.utils.model_registry import model_registry
+from app.utils.result_cache import result_cache
+
+
+class _JamTetap:
+    @staticmethod
+    def now():
+        return datetime(2030, 1, 2, 3, 4, 5)
+
+
+def _penerima():
+    penerima = Penerima(nama='Siti Rahayu', provinsi='34', kabupaten='3404', kecamatan='3404010', desa='3404010001',
+                        pekerjaan='Petani', dtks=True)
+    db.session.add(penerima)
+    db.session.commit()
+    return penerima
+
+
+def test_timestamp_tidak_ikut_disimpan_di_cache(app, monkeypatch):
+    penerima = _penerima()
+    pertama = result_cache.predict(penerima, 0.5, app.logger)
+
+    _, model_version = model_registry.get_model()
+    assert 'timestamp' not in result_cache.store.get(result_cache.key_for(penerima, model_version, 0.5))
+
+    monkeypatch.setattr('app.utils.result_cache.datetime', _JamTetap)
+    kedua = result_cache.predict(penerima, 0.5, app.logger)
+    assert kedua['timestamp'] == '02-01-2030 03:04:05'
+    assert dict(kedua, timestamp=None) == dict(pertama, timestamp=None)
+
+
+def test_model_belum_ada_mengembalikan_penanda_error(app, monkeypatch):
+    from app.utils.result_cache import MODEL_UNAVAILABLE_MESSAGE
+
+    monkeypatch.setattr(model_registry, 'get_model', lambda logger=None: (None, None))
+
+    assert result_cache.predict(_penerima(), 0.5, app.logger) == {'error': MODEL_UNAVAILABLE_MESSAGE}
@@ -0,0 +1,13 @@
+from app import db
+from app.utils.versioning import bump_version, get_versions
+
+
+def test_bump_version_membuat_lalu_menaikkan_baris(app):
+    assert get_versions('uji') == (0,)
+
+    bump_version('uji')
+    bump_version('uji')
+    db.session.commit()
+
+    assert get_versions('uji') == (2,)
+
@@ -0,0 +1,56 @@
+import pytest
+
+from app.utils.wilayah import RegionIndex, check_wilayah_rows, file_sha256, verify_wilayah, write_wilayah_file
+
+ROWS = [
+    ('34', 'DI YOGYAKARTA'),
+    ('3404', 'KABUPATEN SLEMAN'),
+    ('3404010', 'GAMPING'),
+    ('3404010001', 'BALECATUR'),
+    ('3404010002', 'AMBARKETAWANG'),
+]
+
+
+def test_build_wilayah_deterministik(tmp_path):
+    pertama, kedua = tmp_path / 'a.tsv.gz', tmp_path / 'b.tsv.gz'
+    write_wilayah_file(ROWS, str(pertama))
+    write_wilayah_file(list(reversed(ROWS)) + ROWS[:1], str(kedua))
+
+    assert pertama.read_bytes() == kedua.read_bytes()
+
+
+def test_check_wilayah_rows_menolak_induk_hilang_dan_id_rusak():
+    counts, errors = check_wilayah_rows(ROWS)
+    assert errors == []
+    assert counts == {'provinsi': 1, 'kabupaten': 1, 'kecamatan': 1, 'desa': 2}
+
+    _, errors = check_wilayah_rows(ROWS[:2] + ROWS[3:] + [('34.04', 'X')])
+    assert errors == ["ID tidak valid: '34.04'", 'Induk 3404010 dari 3404010001 tidak ada',
+                      'Induk 3404010 dari 3404010002 tidak ada', 'Tidak ada wilayah tingkat kecamatan']
+
+
+def test_verify_wilayah_membandingkan_hash(app, tmp_path):
+    path = tmp_path / 'wilayah.tsv.gz'
+    write_wilayah_file(ROWS, str(path))
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(verify_wilayah, ['--path', str(path), '--sha256', file_sha256(str(path))])
+    assert result.exit_code == 0, result.output
+    assert '2 desa' in result.output
+
+    result = runner.invoke(verify_wilayah, ['--path', str(path), '--sha256', '0' * 64])
+    assert result.exit_code != 0
+
+
+def test_berkas_wilayah_hilang_dicatat_sebagai_error(app, tmp_path, caplog):
+    index = RegionIndex()
+    index.load(str(tmp_path / 'tidak-ada.tsv.gz'), app.logger)
+
+    assert not index.loaded
+    assert any(record.levelname == 'ERROR' and 'DATA WILAYAH TIDAK ADA' in record.getMessage() for record in caplog.records)
+
+
+def test_wilayah_wajib_menolak_start_tanpa_berkas(app, tmp_path):
+    app.config.update(WILAYAH_DATA_PATH=str(tmp_path / 'tidak-ada.tsv.gz'), WILAYAH_DATA_REQUIRED=True)
+    with pytest.raises(RuntimeError, match='WILAYAH_DATA_REQUIRED'):
+        RegionIndex().init_app(app)